@@ -26,6 +26,7 @@ Lab 3 (Custom Functions):
 """
 
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -35,12 +36,43 @@ from dotenv import load_dotenv
 load_dotenv()
 project_endpoint = os.getenv("PROJECT_ENDPOINT")
 model_deployment = os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-4.1")
+use_upload_cache = os.getenv("UPLOAD_CACHE", "true").lower() == "true"
+persistent_agent = os.getenv("PERSISTENT_AGENT", "false").lower() == "true"
+stream_responses = os.getenv("STREAM_RESPONSES", "false").lower() == "true"
+use_answer_cache = os.getenv("ANSWER_CACHE", "false").lower() == "true"
+answer_cache_max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+answer_cache_ttl = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+context_window_messages = int(os.getenv("CONTEXT_WINDOW_MESSAGES", "0"))
+context_max_prompt_tokens = int(os.getenv("CONTEXT_MAX_PROMPT_TOKENS", "0"))
+context_memory_tokens = int(os.getenv("CONTEXT_MEMORY_TOKENS", "400"))
+context_rollover_turns = int(os.getenv("CONTEXT_ROLLOVER_TURNS", "0"))
+conversation_log_page_size = int(os.getenv("CONVERSATION_LOG_PAGE_SIZE", "20"))
+conversation_log_limit = int(os.getenv("CONVERSATION_LOG_LIMIT", "0"))
+agents_backend = os.getenv("AGENTS_BACKEND", "azure").lower()
+parallel_startup = os.getenv("PARALLEL_STARTUP", "true").lower() == "true"
+ledger_path = os.getenv("LEDGER_PATH", "")
+ledger_max_groups = int(os.getenv("LEDGER_MAX_GROUPS", "10000"))
+hot_reload = os.getenv("HOT_RELOAD", "false").lower() == "true"
+parallel_tools = os.getenv("PARALLEL_TOOLS", "false").lower() == "true"
+run_poll_policy = os.getenv("RUN_POLL_POLICY", "sdk").lower()
+run_timeout_seconds = float(os.getenv("RUN_TIMEOUT_SECONDS", "0"))
+use_router = os.getenv("ROUTER", "false").lower() == "true"
+
+# Local stand-in service for benchmarks and offline runs (see fake_agents.py)
+if agents_backend == "fake":
+    from fake_agents import FAKE_ENDPOINT, FakeAgentsClient
+    project_endpoint = FAKE_ENDPOINT
 
 if not project_endpoint or project_endpoint == "your_project_endpoint":
     print("ERROR: Please set PROJECT_ENDPOINT in the .env file.")
     print("       Copy it from the Foundry portal > Project > Overview page.")
     exit(1)
 
+# Streaming turns run through stream_turn, not the run driver
+if stream_responses and (parallel_tools or run_poll_policy != "sdk" or run_timeout_seconds > 0):
+    print("WARNING: STREAM_RESPONSES=true ignores PARALLEL_TOOLS, RUN_POLL_POLICY and "
+          "RUN_TIMEOUT_SECONDS; set STREAM_RESPONSES=false to use them.")
+
 # ---------------------------------------------------------------
 # Data file paths
 # ---------------------------------------------------------------
@@ -63,76 +95,215 @@ print(data_content[:500] + "..." if len(data_content) > 500 else data_content)
 print("--- End Preview ---\n")
 
 # ---------------------------------------------------------------
-# Add references (Lab 2 + Lab 3 combined)
+# Startup pipeline (see startup.py)
+# Independent steps run concurrently: connecting (which imports
+# the SDK client packages), token prefetch, both uploads and
+# thread creation. The script only waits where it needs a result.
 # ---------------------------------------------------------------
+from startup import PrefetchingCredential, StartupPipeline, TOKEN_SCOPE
 
-# Lab 2: AIProjectClient to connect to the Foundry project
-from azure.identity import DefaultAzureCredential
-from azure.ai.projects import AIProjectClient
-
-# Lab 2: CodeInterpreterTool + FilePurpose for file upload
-# Lab 3: FunctionTool, ToolSet for custom functions
-# Lab 3: ListSortOrder, MessageRole for conversation history
-from azure.ai.agents.models import (
-    CodeInterpreterTool,
-    FilePurpose,
-    FunctionTool,
-    ToolSet,
-    ListSortOrder,
-    MessageRole,
-)
+startup = StartupPipeline(parallel=parallel_startup)
+credential = None
 
-# Lab 3: Import our custom functions
-from user_functions import user_functions
 
-# ---------------------------------------------------------------
-# Connect to the AI Project (Lab 2)
-# project_client.agents gives us an AgentsClient (Lab 3)
-# ---------------------------------------------------------------
-print("Connecting to Azure AI Foundry project...")
+def connect():
+    """
+    Lab 2: AIProjectClient to connect to the Foundry project.
+    project_client.agents gives us an AgentsClient (Lab 3).
+    """
+    global credential
+    if agents_backend == "fake":
+        return FakeAgentsClient.from_env()
+
+    from azure.identity import DefaultAzureCredential
+    from azure.ai.projects import AIProjectClient
 
-project_client = AIProjectClient(
-    endpoint=project_endpoint,
-    credential=DefaultAzureCredential(
+    # One shared token for every request of the startup burst
+    credential = PrefetchingCredential(DefaultAzureCredential(
         exclude_environment_credential=True,
         exclude_managed_identity_credential=True,
-    ),
-)
+    ))
+    project_client = AIProjectClient(endpoint=project_endpoint, credential=credential)
+
+    # Get the AgentsClient from the project (bridges Lab 2 + Lab 3)
+    # Official docs: "The .agents property gives you access to an
+    # authenticated AgentsClient from the azure-ai-agents package."
+    return project_client.agents
+
+
+if agents_backend == "fake":
+    print("Using the local fake Agents service (AGENTS_BACKEND=fake)...")
+else:
+    print("Connecting to Azure AI Foundry project...")
+connect_future = startup.submit("connect", connect)
+
+# ---------------------------------------------------------------
+# Add references (Lab 2 + Lab 3 combined)
+# Imported while the client connects; modules of optional
+# features are imported further down only when enabled.
+# ---------------------------------------------------------------
+with startup.step("imports"):
+    # Lab 2: CodeInterpreterTool + FilePurpose for file upload
+    # Lab 3: FunctionTool, ToolSet for custom functions
+    # Lab 3: MessageRole for the agent's reply
+    from azure.ai.agents.models import (
+        CodeInterpreterTool,
+        FilePurpose,
+        FunctionTool,
+        ToolSet,
+        MessageRole,
+    )
+
+    # Lab 3: Import our custom functions
+    from user_functions import user_functions
 
-# Get the AgentsClient from the project (bridges Lab 2 + Lab 3)
-# Official docs: "The .agents property gives you access to an
-# authenticated AgentsClient from the azure-ai-agents package."
-agents_client = project_client.agents
+    # Lab 1: Grounding instructions shared with the other entry points
+    from instructions import ANALYZER_INSTRUCTIONS
+
+    # Lets the answer cache see when a side-effecting tool ran
+    from answer_cache import SideEffectTracker
+
+    # Per-phase turn timings, tool counts and token usage (JSONL + Prometheus)
+    from instrumentation import Instrumentation
+
+    # Bounded run context, turn memory, thread rollover, paged history
+    from thread_context import ThreadContext, iter_messages
+
+    # Run status helpers shared with the run driver
+    from tool_executor import run_error, run_status
+
+    # Tags remote objects; deletes the session's objects on any exit
+    from agent_registry import tag_metadata
+    from cleanup import SessionCleanup
+
+agents_client = connect_future.result()
+session_cleanup = SessionCleanup(agents_client)
+
+# Warm the token cache; the uploads and thread creation wait for it
+# instead of each requesting their own
+if credential is not None:
+    startup.submit("token prefetch", credential.get_token, TOKEN_SCOPE)
 
 # ---------------------------------------------------------------
 # Upload files (Lab 2: file upload for Code Interpreter)
 # Official SDK method: agents_client.files.upload_and_poll()
+# Unchanged files reuse their remote ID from the local upload
+# manifest (see upload_cache.py) instead of being uploaded again.
 # ---------------------------------------------------------------
-print("Uploading data file for Code Interpreter...")
-data_file = agents_client.files.upload_and_poll(
-    file_path=str(data_file_path),
-    purpose=FilePurpose.AGENTS,
-)
-print(f"  Uploaded: {data_file.id}")
+if use_upload_cache:
+    # Content-hash upload manifest (skips re-uploading unchanged files)
+    from upload_cache import UploadCache
+    upload_cache = UploadCache(agents_client, scope=project_endpoint)
+
+
+def upload_file(path):
+    if use_upload_cache:
+        return upload_cache.upload(path, FilePurpose.AGENTS)
+    uploaded = agents_client.files.upload_and_poll(
+        file_path=str(path),
+        purpose=FilePurpose.AGENTS,
+    )
+    # Without the upload cache nothing reuses the file after this session
+    session_cleanup.add("files", uploaded.id)
+    return uploaded
+
+
+# ---------------------------------------------------------------
+# Large expense ledger (LEDGER_PATH, CSV/JSONL/pipe table)
+# Ingested locally in bounded memory; only its compact summary
+# is uploaded for Code Interpreter (see ledger_ingest.py).
+# ---------------------------------------------------------------
+ledger_future = None
+if ledger_path:
+    from ledger_ingest import ingest_ledger
+
+    def ingest_and_upload_ledger():
+        ledger = ingest_ledger(ledger_path, max_groups=ledger_max_groups)
+        return ledger, upload_file(ledger.summary_path)
+
+    print(f"Ingesting ledger {ledger_path}...")
+    ledger_future = startup.submit("ingest ledger + upload summary", ingest_and_upload_ledger)
 
+print("Uploading data file for Code Interpreter...")
+data_future = startup.submit("upload data.txt", upload_file, data_file_path)
 print("Uploading expense policy file...")
-policy_file = agents_client.files.upload_and_poll(
-    file_path=str(policy_file_path),
-    purpose=FilePurpose.AGENTS,
-)
-print(f"  Uploaded: {policy_file.id}")
+policy_future = startup.submit("upload expense_policy.txt", upload_file, policy_file_path)
+
+# ---------------------------------------------------------------
+# Create a thread (Lab 2 + Lab 3: conversation thread)
+# The thread does not depend on the agent, so it is created
+# alongside the uploads.
+# ---------------------------------------------------------------
+print("Creating conversation thread...")
+thread_future = startup.submit("create thread", agents_client.threads.create,
+                               metadata=tag_metadata(source="chat"))
+
+data_upload = data_future.result()
+policy_upload = policy_future.result()
+if use_upload_cache:
+    print(f"  {'Reused' if data_upload.cache_hit else 'Uploaded'}: {data_upload.file_id}")
+    print(f"  {'Reused' if policy_upload.cache_hit else 'Uploaded'}: {policy_upload.file_id}")
+    print(f"  Upload cache: {upload_cache.summary()}")
+    data_file_id = data_upload.file_id
+    policy_file_id = policy_upload.file_id
+else:
+    data_file_id = data_upload.id
+    policy_file_id = policy_upload.id
+    print(f"  Uploaded: {data_file_id}")
+    print(f"  Uploaded: {policy_file_id}")
+file_ids = [data_file_id, policy_file_id]
+
+ledger = None
+if ledger_future is not None:
+    ledger, ledger_upload = ledger_future.result()
+    ledger_file_id = ledger_upload.file_id if use_upload_cache else ledger_upload.id
+    file_ids.append(ledger_file_id)
+    ingest_time = "cached" if ledger.cache_hit else f"ingested in {ledger.seconds:.1f}s"
+    print(f"  Ledger: {ledger.rows:,} rows -> {Path(ledger.summary_path).name} "
+          f"({ledger_file_id}, {ingest_time})")
 
 # ---------------------------------------------------------------
 # Create tools (Lab 1 + Lab 2 + Lab 3)
 # ---------------------------------------------------------------
 
-# Lab 1 + Lab 2: Code Interpreter with both uploaded files
+# Lab 1 + Lab 2: Code Interpreter with the uploaded files (plus the ledger summary)
 code_interpreter = CodeInterpreterTool(
-    file_ids=[data_file.id, policy_file.id]
+    file_ids=file_ids
 )
 
 # Lab 3: Custom function tools from user_functions.py
-functions = FunctionTool(user_functions)
+# (wrapped so the answer cache can see when a side-effecting tool ran,
+# and timed per turn by the instrumentation layer)
+side_effects = SideEffectTracker()
+metrics = Instrumentation.from_env()
+tool_functions = metrics.wrap(side_effects.wrap(user_functions))
+functions = FunctionTool(tool_functions)
+
+# Run loop: create_and_process, or a driver with adaptive polling
+# (RUN_POLL_POLICY) whose tool steps run the function calls
+# concurrently with per-tool timeouts (PARALLEL_TOOLS=true), with an
+# optional run timeout (RUN_TIMEOUT_SECONDS); non-streaming turns only
+run_driver = None
+if not stream_responses and (run_poll_policy != "sdk" or parallel_tools or run_timeout_seconds > 0):
+    from run_driver import RunDriver, RunTimedOut
+    run_driver = RunDriver.from_env(agents_client, tool_functions, parallel_tools)
+
+# Local answers for simple lookups against data.txt and the policy
+# (ROUTER=true, see intent_router.py); everything else goes to the agent
+router = None
+if use_router:
+    from intent_router import IntentRouter
+    router = IntentRouter.from_env()
+
+# Opt-in answer cache keyed on prompt + file hashes + model (ANSWER_CACHE=true)
+answer_cache = None
+if use_answer_cache:
+    from answer_cache import AnswerCache
+    answer_cache = AnswerCache(max_entries=answer_cache_max_entries, ttl_seconds=answer_cache_ttl)
+
+# Token-by-token output instead of create_and_process (STREAM_RESPONSES=true)
+if stream_responses:
+    from streaming import format_timings, stream_turn
 
 # Lab 3: Combine all tools into a ToolSet
 toolset = ToolSet()
@@ -146,45 +317,99 @@ agents_client.enable_auto_function_calls(toolset)
 # ---------------------------------------------------------------
 # Agent instructions (Lab 1: grounding with policy knowledge)
 # ---------------------------------------------------------------
-agent_instructions = """You are an RFP Expense Analyzer for Javista Services SAL.
-
-You have access to two uploaded files via the Code Interpreter:
-1. data.txt - RFP expense summary with consultant costs, hours, and project details
-2. expense_policy.txt - Company expense policy with rate caps and approval thresholds
-
-Your capabilities:
-- Analyze RFP expense data using Python (Code Interpreter)
-- Answer expense policy questions from the policy document
-- Create text-based charts and visualizations
-- Calculate statistics (averages, totals, standard deviations)
-- Compare actual costs against policy rate caps
-- Submit expense reports using submit_expense_report function
-  (collect email, project name, description, and amount first)
-- Flag budget overruns using flag_budget_overrun function
-  (collect category, budgeted amount, actual amount, and reason first)
-
-Always use Code Interpreter for calculations and charts.
-Be concise. Reference specific policy rules when relevant.
-"""
+agent_instructions = ANALYZER_INSTRUCTIONS
+if ledger is not None:
+    agent_instructions += (
+        f"\n\nLEDGER SUMMARY: The uploaded file {Path(ledger.summary_path).name} aggregates the full "
+        f"expense ledger ({ledger.rows:,} line items) by category, consultant and month. Use it for "
+        f"questions about the ledger; data.txt remains the RFP summary table."
+    )
 
 # ---------------------------------------------------------------
 # Create the agent (Lab 2 + Lab 3: create_agent with toolset)
+# In persistent mode an existing agent with the same fingerprint
+# (model + instructions + tools + file IDs) is reused instead.
 # ---------------------------------------------------------------
-print("\nCreating agent: rfp-expense-agent...")
-agent = agents_client.create_agent(
-    model=model_deployment,
-    name="rfp-expense-agent",
-    instructions=agent_instructions,
-    toolset=toolset,
+if persistent_agent:
+    # Fingerprinted agent reuse across sessions (PERSISTENT_AGENT=true)
+    from agent_registry import AgentRegistry
+
+    print("\nResolving persistent agent: rfp-expense-agent...")
+    with startup.step("resolve agent"):
+        agent_registry = AgentRegistry(agents_client, scope=project_endpoint)
+        resolved = agent_registry.get_or_create(
+            model=model_deployment,
+            name="rfp-expense-agent",
+            instructions=agent_instructions,
+            toolset=toolset,
+        )
+    agent = resolved.agent
+    print(f"  Agent {'reused' if resolved.reused else 'created'}: {agent.name} (ID: {agent.id})")
+else:
+    print("\nCreating agent: rfp-expense-agent...")
+    with startup.step("create agent"):
+        agent = agents_client.create_agent(
+            model=model_deployment,
+            name="rfp-expense-agent",
+            instructions=agent_instructions,
+            toolset=toolset,
+            metadata=tag_metadata(source="chat"),
+        )
+    session_cleanup.add("agents", agent.id)
+    print(f"  Agent created: {agent.name} (ID: {agent.id})")
+
+thread = thread_future.result()
+print(f"  Thread created (ID: {thread.id})")
+
+# Runs see a bounded window of the thread; older turns are kept as a
+# compact memory (CONTEXT_* settings, see thread_context.py)
+thread_context = ThreadContext(
+    agents_client,
+    thread,
+    window_messages=context_window_messages,
+    max_prompt_tokens=context_max_prompt_tokens,
+    memory_tokens=context_memory_tokens,
+    rollover_turns=context_rollover_turns,
 )
-print(f"  Agent created: {agent.name} (ID: {agent.id})")
+session_cleanup.add_source("threads", lambda: [t.id for t in thread_context.threads])
 
 # ---------------------------------------------------------------
-# Create a thread (Lab 2 + Lab 3: conversation thread)
+# Hot reload (HOT_RELOAD=true, see hot_reload.py)
+# An edited data.txt or expense_policy.txt is re-uploaded in the
+# background and swapped into the agent's Code Interpreter files
+# between turns; agent, thread and conversation stay the same.
 # ---------------------------------------------------------------
-print("Creating conversation thread...")
-thread = agents_client.threads.create()
-print(f"  Thread created (ID: {thread.id})")
+hot_reloader = None
+if hot_reload:
+    from hot_reload import HotReloader
+
+    watched_file_ids = {data_file_path: data_file_id, policy_file_path: policy_file_id}
+
+    def upload_changed_file(path):
+        upload = upload_file(path)
+        return upload.file_id if use_upload_cache else upload.id
+
+    def apply_file_changes(new_file_ids):
+        global code_interpreter, toolset
+        watched_file_ids.update(new_file_ids)
+        file_ids[:2] = [watched_file_ids[data_file_path], watched_file_ids[policy_file_path]]
+        code_interpreter = CodeInterpreterTool(file_ids=file_ids)
+        toolset = ToolSet()
+        toolset.add(code_interpreter)
+        toolset.add(functions)
+        agents_client.enable_auto_function_calls(toolset)
+        if persistent_agent:
+            agent_registry.update(agent.id, model_deployment, "rfp-expense-agent", agent_instructions, toolset)
+        else:
+            agents_client.update_agent(agent.id, tool_resources=toolset.resources)
+
+    hot_reloader = HotReloader.from_env(list(watched_file_ids), upload_changed_file, apply_file_changes)
+    print(f"  Watching {data_file_path.name} and {policy_file_path.name} for changes (HOT_RELOAD)")
+
+startup.finish()
+print("\nStartup timing:")
+for line in startup.breakdown_lines():
+    print(line)
 
 # ---------------------------------------------------------------
 # Interactive chat loop
@@ -202,44 +427,132 @@ print("Type 'quit' to exit.")
 print("=" * 60 + "\n")
 
 while True:
-    user_prompt = input("You: ").strip()
+    try:
+        user_prompt = input("You: ").strip()
+    except (EOFError, KeyboardInterrupt):
+        # End of input or Ctrl-C at the prompt ends the session normally
+        print()
+        user_prompt = "quit"
     if not user_prompt:
         continue
     if user_prompt.lower() == "quit":
         print("\nEnding conversation...\n")
         break
 
+    # Data/policy edits detected since the last turn go live now
+    if hot_reloader is not None:
+        for line in hot_reloader.apply_pending():
+            print(f"  ({line})")
+
+    # -----------------------------------------------------------
+    # Intent router: table and policy lookups skip the model run
+    # -----------------------------------------------------------
+    metrics.begin_turn(user_prompt)
+    if router is not None:
+        with metrics.phase("router"):
+            routed = router.route(user_prompt)
+        if routed is not None:
+            print(f"\nAgent: {routed.text}\n  (answered locally: {routed.intent}, "
+                  f"{routed.seconds * 1000:.1f} ms)\n")
+            thread_context.note_local_turn(user_prompt, routed.text)
+            metrics.end_turn("routed")
+            continue
+
+    # -----------------------------------------------------------
+    # Answer cache: repeated questions skip the model run
+    # -----------------------------------------------------------
+    cache_key = None
+    if answer_cache is not None:
+        with metrics.phase("answer_cache"):
+            cache_key = answer_cache.key_for(user_prompt, data_file_path, policy_file_path, model_deployment,
+                                             agent.name, agent_instructions,
+                                             [ledger.summary_path] if ledger is not None else [],
+                                             thread_context.history_text())
+            cached_answer = answer_cache.get(cache_key) if cache_key else None
+        if cached_answer is not None:
+            print(f"\nAgent: {cached_answer}\n  (answer cache hit)\n")
+            # Not posted to the thread; memory keeps it for follow-up questions
+            thread_context.note_local_turn(user_prompt, cached_answer)
+            metrics.end_turn("cache_hit")
+            continue
+    side_effects.reset()
+    turn_started = time.perf_counter()
+    run_kwargs = thread_context.run_kwargs()
+
     # -----------------------------------------------------------
     # Send a prompt to the agent (Lab 3 pattern)
     # -----------------------------------------------------------
-    message = agents_client.messages.create(
-        thread_id=thread.id,
-        role="user",
-        content=user_prompt,
-    )
+    with metrics.phase("messages.create"):
+        message = agents_client.messages.create(
+            thread_id=thread_context.thread.id,
+            role="user",
+            content=user_prompt,
+        )
+
+    # Streaming mode: print tokens as they arrive; tool calls still run
+    # automatically and the answer needs no extra message fetch
+    if stream_responses:
+        with metrics.phase("run"):
+            turn = stream_turn(agents_client, thread_context.thread.id, agent.id, **run_kwargs)
+        if turn.time_to_first_token is not None:
+            metrics.record_phase("run.first_token", turn.time_to_first_token)
+        metrics.record_run(turn.run, agents_client)
+        if turn.status != "completed":
+            print(f"\n  Run {turn.status}: {turn.error}\n")
+            metrics.end_turn()
+            continue
+        print(format_timings(turn) + "\n")
+        if cache_key and not side_effects.triggered:
+            answer_cache.put(cache_key, user_prompt, turn.text, turn.total_time)
+        if thread_context.record_turn(user_prompt, turn.text):
+            print(f"  (context rolled over to thread {thread_context.thread.id})\n")
+        metrics.end_turn()
+        continue
 
     # Lab 3 KEY CONCEPT: create_and_process handles auto function calling
-    run = agents_client.runs.create_and_process(
-        thread_id=thread.id,
-        agent_id=agent.id,
-    )
+    run_failure = None
+    with metrics.phase("run"):
+        if run_driver is not None:
+            try:
+                run = run_driver.process(thread_context.thread.id, agent.id, **run_kwargs)
+            except RunTimedOut as timed_out:
+                # RUN_TIMEOUT_SECONDS: cancelled, so the turn has no answer
+                run, run_failure = timed_out.run, str(timed_out)
+            metrics.record_phase("run.poll_wasted_wait", run_driver.last.wasted_wait)
+        else:
+            run = agents_client.runs.create_and_process(
+                thread_id=thread_context.thread.id,
+                agent_id=agent.id,
+                **run_kwargs,
+            )
+    metrics.record_run(run, agents_client)
 
     # -----------------------------------------------------------
     # Check for failures (Lab 2 + Lab 3)
     # -----------------------------------------------------------
-    if run.status == "failed":
-        print(f"\n  Run failed: {run.last_error}\n")
+    # Failed, incomplete (max_prompt_tokens), cancelled or expired: the
+    # thread's last agent message is from an earlier turn, never show it
+    if run_status(run) != "completed":
+        print(f"\n  Run {run_status(run)}: {run_failure or run_error(run)}\n")
+        metrics.end_turn()
         continue
 
     # -----------------------------------------------------------
     # Show response (Lab 3: get_last_message_text_by_role)
     # -----------------------------------------------------------
-    last_msg = agents_client.messages.get_last_message_text_by_role(
-        thread_id=thread.id,
-        role=MessageRole.AGENT,
-    )
+    with metrics.phase("message_fetch"):
+        last_msg = agents_client.messages.get_last_message_text_by_role(
+            thread_id=thread_context.thread.id,
+            role=MessageRole.AGENT,
+        )
     if last_msg:
         print(f"\nAgent: {last_msg.text.value}\n")
+        if cache_key and not side_effects.triggered:
+            answer_cache.put(cache_key, user_prompt, last_msg.text.value,
+                             time.perf_counter() - turn_started)
+        if thread_context.record_turn(user_prompt, last_msg.text.value):
+            print(f"  (context rolled over to thread {thread_context.thread.id})\n")
+    metrics.end_turn()
 
 # ---------------------------------------------------------------
 # Conversation history (Lab 2 + Lab 3)
@@ -248,15 +561,44 @@ print("=" * 60)
 print("CONVERSATION LOG")
 print("=" * 60 + "\n")
 
-messages = agents_client.messages.list(
-    thread_id=thread.id,
-    order=ListSortOrder.ASCENDING,
-)
-for msg in messages:
-    if msg.text_messages:
-        last_text = msg.text_messages[-1]
-        role = str(msg.role).upper()
-        print(f"  [{role}]: {last_text.text.value}\n")
+# Pages are fetched lazily as they are printed; after a rollover
+# the session spans several threads, printed oldest first
+shown = 0
+for log_thread in thread_context.threads:
+    if conversation_log_limit and shown >= conversation_log_limit:
+        break
+    if len(thread_context.threads) > 1:
+        print(f"  --- Thread {log_thread.id} ---\n")
+    for msg in iter_messages(agents_client, log_thread.id, page_size=conversation_log_page_size):
+        if conversation_log_limit and shown >= conversation_log_limit:
+            break
+        if msg.text_messages:
+            last_text = msg.text_messages[-1]
+            role = str(msg.role).upper()
+            print(f"  [{role}]: {last_text.text.value}\n", flush=True)
+            shown += 1
+if conversation_log_limit and shown >= conversation_log_limit:
+    print(f"  (log stopped after {conversation_log_limit} messages, CONVERSATION_LOG_LIMIT)\n")
+if thread_context.enabled:
+    print(f"  Context: {thread_context.summary()}\n")
+
+# ---------------------------------------------------------------
+# Turn metrics (see instrumentation.py)
+# ---------------------------------------------------------------
+print("=" * 60)
+print("TURN METRICS")
+print("=" * 60)
+for line in metrics.summary_lines():
+    print(line)
+if router is not None:
+    print()
+    for line in router.summary_lines():
+        print(line)
+if metrics.trace_path:
+    print(f"\n  Trace: {metrics.trace_path}")
+if metrics.prom_path:
+    print(f"  Prometheus: {metrics.prom_path}")
+print()
 
 # ---------------------------------------------------------------
 # Clean up (Lab 2 + Lab 3)
@@ -265,8 +607,24 @@ print("=" * 60)
 print("CLEANUP")
 print("=" * 60)
 
-agents_client.delete_agent(agent.id)
-print("  Agent deleted")
+if hot_reloader is not None:
+    hot_reloader.stop()
+    print(f"  File watcher stopped ({hot_reloader.reloads} reload(s))")
+
+if persistent_agent:
+    agent_registry.wait_for_cleanup(timeout=10)
+    print(f"  Agent kept for reuse (ID: {agent.id})")
+# Thread(s), the agent unless persistent, uploads made without the cache
+for line in session_cleanup.run():
+    print(f"  {line}")
+
+if run_driver is not None:
+    print(f"  Run driver: {run_driver.summary()}")
+    print(f"  Tool calls: {run_driver.tool_executor.summary()}")
+    run_driver.shutdown()
+if answer_cache is not None:
+    print(f"  Answer cache: {answer_cache.summary()}")
+    answer_cache.close()
 
 print("\n  All resources cleaned up successfully.")
 print("  Thank you for using the RFP Expense Analyzer!\n")
@@ -16,10 +16,11 @@ Demonstrates:
   - get_last_message_text_by_role (Lab 3)
   - Conversation history with ListSortOrder (Lab 3)
   - Grounding via instructions (Lab 1)
-  - Cleanup: delete_agent (Lab 3)
+  - Cleanup: delete_agent and the thread, also on Ctrl-C or a crash (Lab 3)
 """
 
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -29,17 +30,49 @@ from dotenv import load_dotenv
 load_dotenv()
 project_endpoint = os.getenv("PROJECT_ENDPOINT")
 model_deployment = os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-4.1")
+persistent_agent = os.getenv("PERSISTENT_AGENT", "false").lower() == "true"
+stream_responses = os.getenv("STREAM_RESPONSES", "false").lower() == "true"
+use_answer_cache = os.getenv("ANSWER_CACHE", "false").lower() == "true"
+answer_cache_max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+answer_cache_ttl = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+context_window_messages = int(os.getenv("CONTEXT_WINDOW_MESSAGES", "0"))
+context_max_prompt_tokens = int(os.getenv("CONTEXT_MAX_PROMPT_TOKENS", "0"))
+context_memory_tokens = int(os.getenv("CONTEXT_MEMORY_TOKENS", "400"))
+context_rollover_turns = int(os.getenv("CONTEXT_ROLLOVER_TURNS", "0"))
+conversation_log_page_size = int(os.getenv("CONVERSATION_LOG_PAGE_SIZE", "20"))
+conversation_log_limit = int(os.getenv("CONVERSATION_LOG_LIMIT", "0"))
+grounding_mode = os.getenv("GROUNDING_MODE", "full").lower()
+grounding_top_k = int(os.getenv("GROUNDING_TOP_K", "4"))
+grounding_token_budget = int(os.getenv("GROUNDING_TOKEN_BUDGET", "800"))
+agents_backend = os.getenv("AGENTS_BACKEND", "azure").lower()
+hot_reload = os.getenv("HOT_RELOAD", "false").lower() == "true"
+parallel_tools = os.getenv("PARALLEL_TOOLS", "false").lower() == "true"
+run_poll_policy = os.getenv("RUN_POLL_POLICY", "sdk").lower()
+run_timeout_seconds = float(os.getenv("RUN_TIMEOUT_SECONDS", "0"))
+use_router = os.getenv("ROUTER", "false").lower() == "true"
+
+# Local stand-in service for benchmarks and offline runs (see fake_agents.py)
+if agents_backend == "fake":
+    from fake_agents import FAKE_ENDPOINT, FakeAgentsClient
+    project_endpoint = FAKE_ENDPOINT
 
 if not project_endpoint or project_endpoint == "your_project_endpoint":
     print("ERROR: Please set PROJECT_ENDPOINT in the .env file.")
     exit(1)
 
+# Streaming turns run through stream_turn, not the run driver
+if stream_responses and (parallel_tools or run_poll_policy != "sdk" or run_timeout_seconds > 0):
+    print("WARNING: STREAM_RESPONSES=true ignores PARALLEL_TOOLS, RUN_POLL_POLICY and "
+          "RUN_TIMEOUT_SECONDS; set STREAM_RESPONSES=false to use them.")
+
 # Load policy + data content to embed in instructions (Lab 1 grounding)
 script_dir = Path(__file__).parent
+data_file_path = script_dir / "data.txt"
+policy_file_path = script_dir / "expense_policy.txt"
 
-with open(script_dir / "expense_policy.txt", "r") as f:
+with open(policy_file_path, "r") as f:
     policy_content = f.read()
-with open(script_dir / "data.txt", "r") as f:
+with open(data_file_path, "r") as f:
     data_content = f.read()
 
 print("\n" + "=" * 60)
@@ -51,71 +84,168 @@ print("=" * 60)
 # ---------------------------------------------------------------
 from azure.identity import DefaultAzureCredential
 from azure.ai.agents import AgentsClient
-from azure.ai.agents.models import FunctionTool, ToolSet, ListSortOrder, MessageRole
+from azure.ai.agents.models import FunctionTool, ToolSet, MessageRole
 
 # Import our custom functions (Lab 3)
 from user_functions import user_functions
 
+# Lab 1: Grounding instructions shared with the other entry points
+from instructions import RETRIEVAL_INSTRUCTIONS, build_functions_instructions
+
+# Per-turn BM25 retrieval of policy/data excerpts (GROUNDING_MODE=retrieval)
+from grounding import GroundingIndex
+
+# Fingerprinted agent reuse across sessions (PERSISTENT_AGENT=true)
+from agent_registry import AgentRegistry, tag_metadata
+
+# Deletes the session's thread(s) and agent on any exit
+from cleanup import SessionCleanup
+
+# Token-by-token output instead of create_and_process (STREAM_RESPONSES=true)
+from streaming import format_timings, stream_turn
+
+# Opt-in answer cache keyed on prompt + file hashes + model (ANSWER_CACHE=true)
+from answer_cache import AnswerCache, SideEffectTracker
+
+# Per-phase turn timings, tool counts and token usage (JSONL + Prometheus)
+from instrumentation import Instrumentation
+
+# Bounded run context, turn memory, thread rollover, paged history
+from thread_context import ThreadContext, iter_messages
+
+# Run status helpers shared with the run driver
+from tool_executor import run_error, run_status
+
 # ---------------------------------------------------------------
 # Connect to the Agent client (Lab 3 pattern)
 # ---------------------------------------------------------------
-print("\nConnecting to Azure AI Agent Service...")
-agent_client = AgentsClient(
-    endpoint=project_endpoint,
-    credential=DefaultAzureCredential(
-        exclude_environment_credential=True,
-        exclude_managed_identity_credential=True,
-    ),
-)
+if agents_backend == "fake":
+    print("\nUsing the local fake Agents service (AGENTS_BACKEND=fake)...")
+    agent_client = FakeAgentsClient.from_env()
+else:
+    print("\nConnecting to Azure AI Agent Service...")
+    agent_client = AgentsClient(
+        endpoint=project_endpoint,
+        credential=DefaultAzureCredential(
+            exclude_environment_credential=True,
+            exclude_managed_identity_credential=True,
+        ),
+    )
 
 # ---------------------------------------------------------------
 # Define agent with custom function tools (Lab 3)
 # ---------------------------------------------------------------
-with agent_client:
+with agent_client, SessionCleanup(agent_client) as session_cleanup:
 
     # Lab 3: Create FunctionTool from our custom functions
-    functions = FunctionTool(user_functions)
+    # (wrapped so the answer cache can see when a side-effecting tool ran,
+    # and timed per turn by the instrumentation layer)
+    side_effects = SideEffectTracker()
+    metrics = Instrumentation.from_env()
+    tool_functions = metrics.wrap(side_effects.wrap(user_functions))
+    functions = FunctionTool(tool_functions)
+
+    # Run loop: create_and_process, or a driver with adaptive polling
+    # (RUN_POLL_POLICY) whose tool steps run the function calls
+    # concurrently with per-tool timeouts (PARALLEL_TOOLS=true), with an
+    # optional run timeout (RUN_TIMEOUT_SECONDS); non-streaming turns only
+    run_driver = None
+    if not stream_responses and (run_poll_policy != "sdk" or parallel_tools or run_timeout_seconds > 0):
+        from run_driver import RunDriver, RunTimedOut
+        run_driver = RunDriver.from_env(agent_client, tool_functions, parallel_tools)
+
+    # Local answers for simple lookups (ROUTER=true, see intent_router.py)
+    router = None
+    if use_router:
+        from intent_router import IntentRouter
+        router = IntentRouter.from_env()
+
+    answer_cache = None
+    if use_answer_cache:
+        answer_cache = AnswerCache(max_entries=answer_cache_max_entries, ttl_seconds=answer_cache_ttl)
+
     toolset = ToolSet()
     toolset.add(functions)
 
     # Lab 3 KEY CONCEPT: Enable auto function calling
     agent_client.enable_auto_function_calls(toolset)
 
-    # Lab 1: Embed grounding data directly in instructions
-    agent_instructions = f"""You are an RFP Expense Analyzer for Javista Services SAL.
+    # Lab 1: Embed grounding data directly in instructions, or (retrieval
+    # mode) keep instructions small and attach the relevant excerpts per turn
+    grounding_index = None
+    if grounding_mode == "retrieval":
+        grounding_index = GroundingIndex.load([policy_file_path, data_file_path])
+        agent_instructions = RETRIEVAL_INSTRUCTIONS
+        print(f"Grounding: retrieval (top {grounding_top_k}, "
+              f"{grounding_token_budget} token budget, {len(grounding_index.index.chunks)} chunks)")
+    else:
+        agent_instructions = build_functions_instructions(policy_content, data_content)
 
-EXPENSE POLICY (reference this for policy questions):
-{policy_content}
+    # Lab 3: Create the agent with toolset
+    # (persistent mode reuses an agent with the same fingerprint)
+    if persistent_agent:
+        print("Resolving persistent agent with custom function tools...")
+        agent_registry = AgentRegistry(agent_client, scope=project_endpoint)
+        resolved = agent_registry.get_or_create(
+            model=model_deployment,
+            name="rfp-expense-functions-agent",
+            instructions=agent_instructions,
+            toolset=toolset,
+        )
+        agent = resolved.agent
+        print(f"  Agent {'reused' if resolved.reused else 'created'}: {agent.name} (ID: {agent.id})")
+    else:
+        print("Creating agent with custom function tools...")
+        agent = agent_client.create_agent(
+            model=model_deployment,
+            name="rfp-expense-functions-agent",
+            instructions=agent_instructions,
+            toolset=toolset,
+            metadata=tag_metadata(source="chat"),
+        )
+        session_cleanup.add("agents", agent.id)
+        print(f"  Agent created: {agent.name} (ID: {agent.id})")
 
-RFP DATA (reference this for data questions):
-{data_content}
+    # Lab 3: Create thread
+    thread = agent_client.threads.create(metadata=tag_metadata(source="chat"))
+    print(f"  Thread created (ID: {thread.id})")
 
-Your capabilities:
-1. Answer questions about the RFP expense data
-2. Answer questions about the expense policy
-3. Compare actual costs against policy rate caps
-4. Submit expense reports - collect email, project name, description, amount
-   then use submit_expense_report function
-5. Flag budget overruns - collect category, budgeted/actual amounts, reason
-   then use flag_budget_overrun function
+    # Bounded run window + memory of older turns (CONTEXT_* settings)
+    thread_context = ThreadContext(
+        agent_client,
+        thread,
+        window_messages=context_window_messages,
+        max_prompt_tokens=context_max_prompt_tokens,
+        memory_tokens=context_memory_tokens,
+        rollover_turns=context_rollover_turns,
+    )
+    session_cleanup.add_source("threads", lambda: [t.id for t in thread_context.threads])
 
-Be concise. Reference specific policy rules when relevant.
-Show calculations clearly when doing math.
-"""
+    # Hot reload (HOT_RELOAD=true, see hot_reload.py): edited data or
+    # policy files regenerate the grounding between turns, in place
+    hot_reloader = None
+    if hot_reload:
+        from hot_reload import HotReloader
 
-    # Lab 3: Create the agent with toolset
-    print("Creating agent with custom function tools...")
-    agent = agent_client.create_agent(
-        model=model_deployment,
-        name="rfp-expense-functions-agent",
-        instructions=agent_instructions,
-        toolset=toolset,
-    )
-    print(f"  Agent created: {agent.name} (ID: {agent.id})")
+        def apply_file_changes(contents):
+            global policy_content, data_content, grounding_index, agent_instructions
+            policy_content = contents.get(policy_file_path, policy_content)
+            data_content = contents.get(data_file_path, data_content)
+            if grounding_index is not None:
+                # Instructions stay the same; retrieval uses the new excerpts
+                grounding_index = GroundingIndex.load([policy_file_path, data_file_path])
+                return
+            agent_instructions = build_functions_instructions(policy_content, data_content)
+            if persistent_agent:
+                agent_registry.update(agent.id, model_deployment, "rfp-expense-functions-agent",
+                                      agent_instructions, toolset)
+            else:
+                agent_client.update_agent(agent.id, instructions=agent_instructions)
 
-    # Lab 3: Create thread
-    thread = agent_client.threads.create()
-    print(f"  Thread created (ID: {thread.id})")
+        hot_reloader = HotReloader.from_env(
+            [data_file_path, policy_file_path], lambda path: path.read_text(), apply_file_changes
+        )
+        print(f"  Watching {data_file_path.name} and {policy_file_path.name} for changes (HOT_RELOAD)")
 
     # -----------------------------------------------------------
     # Chat loop (Lab 3)
@@ -130,38 +260,130 @@ Show calculations clearly when doing math.
     print("=" * 60 + "\n")
 
     while True:
-        user_prompt = input("You: ").strip()
+        try:
+            user_prompt = input("You: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            # End of input or Ctrl-C at the prompt ends the session normally
+            print()
+            user_prompt = "quit"
         if not user_prompt:
             continue
         if user_prompt.lower() == "quit":
             print("\nEnding conversation...\n")
             break
 
+        # Data/policy edits detected since the last turn go live now
+        if hot_reloader is not None:
+            for line in hot_reloader.apply_pending():
+                print(f"  ({line})")
+
+        # Intent router: table and policy lookups skip the model run
+        metrics.begin_turn(user_prompt)
+        if router is not None:
+            with metrics.phase("router"):
+                routed = router.route(user_prompt)
+            if routed is not None:
+                print(f"\nAgent: {routed.text}\n  (answered locally: {routed.intent}, "
+                      f"{routed.seconds * 1000:.1f} ms)\n")
+                thread_context.note_local_turn(user_prompt, routed.text)
+                metrics.end_turn("routed")
+                continue
+
+        # Answer cache: repeated questions skip the model run
+        cache_key = None
+        if answer_cache is not None:
+            with metrics.phase("answer_cache"):
+                cache_key = answer_cache.key_for(user_prompt, data_file_path, policy_file_path, model_deployment,
+                                                 agent.name, agent_instructions,
+                                                 history=thread_context.history_text())
+                cached_answer = answer_cache.get(cache_key) if cache_key else None
+            if cached_answer is not None:
+                print(f"\nAgent: {cached_answer}\n  (answer cache hit)\n")
+                # Not posted to the thread; memory keeps it for follow-up questions
+                thread_context.note_local_turn(user_prompt, cached_answer)
+                metrics.end_turn("cache_hit")
+                continue
+        side_effects.reset()
+        turn_started = time.perf_counter()
+
+        # Retrieval grounding: only the relevant excerpts go with this run,
+        # next to the context window and the memory of older turns
+        context = ""
+        if grounding_index is not None:
+            with metrics.phase("retrieval"):
+                context = grounding_index.context_for(
+                    user_prompt, top_k=grounding_top_k, token_budget=grounding_token_budget
+                )
+        run_kwargs = thread_context.run_kwargs(context)
+
         # Lab 3: Send message to thread
-        message = agent_client.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=user_prompt,
-        )
+        with metrics.phase("messages.create"):
+            message = agent_client.messages.create(
+                thread_id=thread_context.thread.id,
+                role="user",
+                content=user_prompt,
+            )
+
+        # Streaming mode: print tokens as they arrive; tool calls still run
+        # automatically and the answer needs no extra message fetch
+        if stream_responses:
+            with metrics.phase("run"):
+                turn = stream_turn(agent_client, thread_context.thread.id, agent.id, **run_kwargs)
+            if turn.time_to_first_token is not None:
+                metrics.record_phase("run.first_token", turn.time_to_first_token)
+            metrics.record_run(turn.run, agent_client)
+            if turn.status != "completed":
+                print(f"\n  Run {turn.status}: {turn.error}\n")
+                metrics.end_turn()
+                continue
+            print(format_timings(turn) + "\n")
+            if cache_key and not side_effects.triggered:
+                answer_cache.put(cache_key, user_prompt, turn.text, turn.total_time)
+            if thread_context.record_turn(user_prompt, turn.text):
+                print(f"  (context rolled over to thread {thread_context.thread.id})\n")
+            metrics.end_turn()
+            continue
 
         # Lab 3: Run with auto function calling
-        run = agent_client.runs.create_and_process(
-            thread_id=thread.id,
-            agent_id=agent.id,
-        )
+        run_failure = None
+        with metrics.phase("run"):
+            if run_driver is not None:
+                try:
+                    run = run_driver.process(thread_context.thread.id, agent.id, **run_kwargs)
+                except RunTimedOut as timed_out:
+                    # RUN_TIMEOUT_SECONDS: cancelled, so the turn has no answer
+                    run, run_failure = timed_out.run, str(timed_out)
+                metrics.record_phase("run.poll_wasted_wait", run_driver.last.wasted_wait)
+            else:
+                run = agent_client.runs.create_and_process(
+                    thread_id=thread_context.thread.id,
+                    agent_id=agent.id,
+                    **run_kwargs,
+                )
+        metrics.record_run(run, agent_client)
 
         # Lab 3: Check for failures
-        if run.status == "failed":
-            print(f"\n  Run failed: {run.last_error}\n")
+        # Failed, incomplete (max_prompt_tokens), cancelled or expired: the
+        # thread's last agent message is from an earlier turn, never show it
+        if run_status(run) != "completed":
+            print(f"\n  Run {run_status(run)}: {run_failure or run_error(run)}\n")
+            metrics.end_turn()
             continue
 
         # Lab 3: Get agent response
-        last_msg = agent_client.messages.get_last_message_text_by_role(
-            thread_id=thread.id,
-            role=MessageRole.AGENT,
-        )
+        with metrics.phase("message_fetch"):
+            last_msg = agent_client.messages.get_last_message_text_by_role(
+                thread_id=thread_context.thread.id,
+                role=MessageRole.AGENT,
+            )
         if last_msg:
             print(f"\nAgent: {last_msg.text.value}\n")
+            if cache_key and not side_effects.triggered:
+                answer_cache.put(cache_key, user_prompt, last_msg.text.value,
+                                 time.perf_counter() - turn_started)
+            if thread_context.record_turn(user_prompt, last_msg.text.value):
+                print(f"  (context rolled over to thread {thread_context.thread.id})\n")
+        metrics.end_turn()
 
     # -----------------------------------------------------------
     # Conversation history (Lab 3)
@@ -170,15 +392,41 @@ Show calculations clearly when doing math.
     print("CONVERSATION LOG")
     print("=" * 60 + "\n")
 
-    messages = agent_client.messages.list(
-        thread_id=thread.id,
-        order=ListSortOrder.ASCENDING,
-    )
-    for msg in messages:
-        if msg.text_messages:
-            last_text = msg.text_messages[-1]
-            role = str(msg.role).upper()
-            print(f"  [{role}]: {last_text.text.value}\n")
+    # Pages are fetched lazily as they are printed; after a rollover
+    # the session spans several threads, printed oldest first
+    shown = 0
+    for log_thread in thread_context.threads:
+        if conversation_log_limit and shown >= conversation_log_limit:
+            break
+        if len(thread_context.threads) > 1:
+            print(f"  --- Thread {log_thread.id} ---\n")
+        for msg in iter_messages(agent_client, log_thread.id, page_size=conversation_log_page_size):
+            if conversation_log_limit and shown >= conversation_log_limit:
+                break
+            if msg.text_messages:
+                last_text = msg.text_messages[-1]
+                role = str(msg.role).upper()
+                print(f"  [{role}]: {last_text.text.value}\n", flush=True)
+                shown += 1
+    if conversation_log_limit and shown >= conversation_log_limit:
+        print(f"  (log stopped after {conversation_log_limit} messages, CONVERSATION_LOG_LIMIT)\n")
+    if thread_context.enabled:
+        print(f"  Context: {thread_context.summary()}\n")
+
+    print("=" * 60)
+    print("TURN METRICS")
+    print("=" * 60)
+    for line in metrics.summary_lines():
+        print(line)
+    if router is not None:
+        print()
+        for line in router.summary_lines():
+            print(line)
+    if metrics.trace_path:
+        print(f"\n  Trace: {metrics.trace_path}")
+    if metrics.prom_path:
+        print(f"  Prometheus: {metrics.prom_path}")
+    print()
 
     # -----------------------------------------------------------
     # Clean up (Lab 3)
@@ -187,6 +435,21 @@ Show calculations clearly when doing math.
     print("CLEANUP")
     print("=" * 60)
 
-    agent_client.delete_agent(agent.id)
-    print("  Agent deleted")
+    if hot_reloader is not None:
+        hot_reloader.stop()
+        print(f"  File watcher stopped ({hot_reloader.reloads} reload(s))")
+
+    if persistent_agent:
+        agent_registry.wait_for_cleanup(timeout=10)
+        print(f"  Agent kept for reuse (ID: {agent.id})")
+    # Thread(s) and the agent unless persistent
+    for line in session_cleanup.run():
+        print(f"  {line}")
+    if run_driver is not None:
+        print(f"  Run driver: {run_driver.summary()}")
+        print(f"  Tool calls: {run_driver.tool_executor.summary()}")
+        run_driver.shutdown()
+    if answer_cache is not None:
+        print(f"  Answer cache: {answer_cache.summary()}")
+        answer_cache.close()
     print("\n  All resources cleaned up successfully.\n")
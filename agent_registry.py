@@ -0,0 +1,201 @@
+"""
+Persistent Agent Registry for the RFP Expense Agent
+===================================================
+Reuses an existing agent across sessions instead of calling create_agent at
+startup and delete_agent at exit.
+
+Every agent created here is tagged with metadata holding a fingerprint of
+its definition: the model, the instructions and the toolset (function
+signatures from user_functions plus the CodeInterpreterTool file IDs).
+A session whose fingerprint matches an existing agent reuses it; a new agent
+is created only when the fingerprint changes, and the agent this registry
+recorded for the older fingerprint is deleted in the background. Agents of
+other users or checkouts (different instructions or files, same name) are
+never touched.
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from cache_utils import CACHE_DIR, read_json, write_json_atomic
+
+REGISTRY_PATH = CACHE_DIR / "agents.json"
+
+# Metadata tag that marks every remote object created by this tool
+RESOURCE_TAG_KEY = "created_by"
+RESOURCE_TAG_VALUE = "rfp-expense-analyzer"
+FINGERPRINT_KEY = "fingerprint"
+
+
+def tag_metadata(**extra: str) -> Dict[str, str]:
+    """Returns the metadata dict used to tag objects created by this tool."""
+    metadata = {RESOURCE_TAG_KEY: RESOURCE_TAG_VALUE}
+    metadata.update(extra)
+    return metadata
+
+
+def _as_plain(value: Any) -> Any:
+    """Converts SDK models into plain JSON-serializable structures."""
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    if isinstance(value, (list, tuple)):
+        return [_as_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _as_plain(v) for k, v in value.items()}
+    return value
+
+
+def agent_fingerprint(model: str, instructions: str, toolset) -> str:
+    """
+    Hashes everything that defines the agent's behaviour.
+
+    The toolset contributes its tool definitions (function names, docstrings
+    and parameter schemas) and its tool resources (Code Interpreter file IDs),
+    so re-uploading a changed data file produces a new fingerprint.
+    """
+    payload = {
+        "model": model,
+        "instructions": instructions,
+        "tools": _as_plain(toolset.definitions),
+        "resources": _as_plain(toolset.resources),
+    }
+    canonical = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ResolvedAgent:
+    """The agent to use for this session and whether it was reused."""
+    agent: Any
+    reused: bool
+    fingerprint: str
+
+
+class AgentRegistry:
+    """
+    Finds or creates the agent matching a fingerprint.
+
+    Lookup order: the locally recorded agent ID (one get_agent call), then a
+    scan of list_agents for a tagged agent with the same name and fingerprint.
+    """
+
+    def __init__(self, agents_client, scope: str, registry_path: Path = REGISTRY_PATH):
+        self._client = agents_client
+        self._scope = scope
+        self._registry_path = Path(registry_path)
+        self._registry = self._load()
+        self._cleanup_thread: Optional[threading.Thread] = None
+
+    # -----------------------------------------------------------
+    # Local registry persistence
+    # -----------------------------------------------------------
+    def _load(self) -> Dict[str, Any]:
+        registry = read_json(self._registry_path)
+        registry.setdefault("scopes", {})
+        return registry
+
+    def _save(self) -> None:
+        write_json_atomic(self._registry_path, self._registry)
+
+    @property
+    def _entries(self) -> Dict[str, Any]:
+        return self._registry["scopes"].setdefault(self._scope, {})
+
+    # -----------------------------------------------------------
+    # Lookup
+    # -----------------------------------------------------------
+    def _find_recorded(self, name: str, fingerprint: str):
+        entry = self._entries.get(name)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return None
+        try:
+            agent = self._client.get_agent(entry["agent_id"])
+        except ResourceNotFoundError:
+            return None
+        if (agent.metadata or {}).get(FINGERPRINT_KEY) != fingerprint:
+            return None
+        return agent
+
+    def _tagged_agents(self, name: str):
+        for agent in self._client.list_agents():
+            metadata = agent.metadata or {}
+            if agent.name == name and metadata.get(RESOURCE_TAG_KEY) == RESOURCE_TAG_VALUE:
+                yield agent
+
+    # -----------------------------------------------------------
+    # Public API
+    # -----------------------------------------------------------
+    def get_or_create(self, model: str, name: str, instructions: str, toolset) -> ResolvedAgent:
+        """
+        Returns the agent for this definition, creating it only when no agent
+        with the same fingerprint exists. The fast path (recorded agent still
+        matches) costs a single get_agent call; otherwise the tagged agents
+        are scanned for one with the same fingerprint. The agent previously
+        recorded for this scope, when superseded, is removed on a background
+        thread so it never delays startup. Tagged agents with other
+        fingerprints may belong to another user or checkout and are kept.
+        """
+        fingerprint = agent_fingerprint(model, instructions, toolset)
+        recorded = self._entries.get(name)
+
+        agent = self._find_recorded(name, fingerprint)
+        if agent is None:
+            agent = next((c for c in self._tagged_agents(name)
+                          if (c.metadata or {}).get(FINGERPRINT_KEY) == fingerprint), None)
+
+        reused = agent is not None
+        if agent is None:
+            agent = self._client.create_agent(
+                model=model,
+                name=name,
+                instructions=instructions,
+                toolset=toolset,
+                metadata=tag_metadata(**{FINGERPRINT_KEY: fingerprint}),
+            )
+
+        self._entries[name] = {"agent_id": agent.id, "fingerprint": fingerprint}
+        self._save()
+
+        stale_ids = [recorded["agent_id"]] if recorded and recorded.get("agent_id") != agent.id else []
+        if stale_ids:
+            self._cleanup_thread = threading.Thread(
+                target=self._delete_agents, args=(stale_ids,), daemon=True
+            )
+            self._cleanup_thread.start()
+
+        return ResolvedAgent(agent=agent, reused=reused, fingerprint=fingerprint)
+
+    def update(self, agent_id: str, model: str, name: str, instructions: str, toolset):
+        """
+        Applies a changed definition to an existing agent in place (hot
+        reload) and records its new fingerprint, so a later session with
+        the same files reuses the updated agent.
+        """
+        fingerprint = agent_fingerprint(model, instructions, toolset)
+        agent = self._client.update_agent(
+            agent_id,
+            instructions=instructions,
+            tool_resources=toolset.resources,
+            metadata=tag_metadata(**{FINGERPRINT_KEY: fingerprint}),
+        )
+        self._entries[name] = {"agent_id": agent_id, "fingerprint": fingerprint}
+        self._save()
+        return agent
+
+    def _delete_agents(self, agent_ids) -> None:
+        for agent_id in agent_ids:
+            try:
+                self._client.delete_agent(agent_id)
+            except ResourceNotFoundError:
+                pass
+
+    def wait_for_cleanup(self, timeout: Optional[float] = None) -> None:
+        """Blocks until the background stale-agent cleanup (if any) finishes."""
+        if self._cleanup_thread is not None:
+            self._cleanup_thread.join(timeout)
@@ -0,0 +1,183 @@
+"""
+Answer Cache for the RFP Expense Agent
+======================================
+Opt-in cache in front of the run call (ANSWER_CACHE=true).
+
+Answers are keyed on the normalized prompt, the content hashes of data.txt,
+expense_policy.txt and any other grounding file (the ledger summary), the
+model deployment, the agent's name and a hash of its instructions, so any
+change to the files, the model or the agent naturally misses. The key also
+covers the conversation so far (ThreadContext.history_text), so a follow-up
+like "and for QA?" is only answered from cache after the same earlier turns.
+Entries live in a small SQLite file under .agent_cache/ so they survive
+restarts, and are evicted by age (TTL) and by count (least recently used
+first).
+
+Side-effecting tools (submit_expense_report, flag_budget_overrun,
+export_expense_report) must never be answered from cache: prompts that ask for them bypass the cache,
+and any turn during which one of them actually ran is never stored.
+"""
+
+import functools
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Set
+
+from cache_utils import CACHE_DIR, cached_file_sha256
+
+ANSWER_DB_PATH = CACHE_DIR / "answers.sqlite"
+
+# Tools whose effects must happen on every request
+SIDE_EFFECT_TOOLS = {
+    "submit_expense_report",
+    "submit_expense_reports",
+    "flag_budget_overrun",
+    "flag_budget_overruns",
+    "sweep_budget_overruns",
+    "export_expense_report",
+}
+
+# Verbs that ask for something to be done rather than looked up
+_ACTION_VERBS = (r"submit(?:s|ted|ting)?|flag(?:s|ged|ging)?|file[sd]?|filing|rais(?:e|es|ed|ing)|"
+                 r"creat(?:e|es|ed|ing)|remov(?:e|es|ed|ing)|chang(?:e|es|ed|ing)|set(?:s|ting)?|"
+                 r"delet(?:e|es|ed|ing)|updat(?:e|es|ed|ing)|export(?:s|ed|ing)?")
+ACTION_VERB = re.compile(rf"\b({_ACTION_VERBS})\b", re.I)
+
+# Prompts that start a side-effecting flow are never looked up or stored
+_SIDE_EFFECT_HINTS = re.compile(rf"\b({_ACTION_VERBS})\b.*\b(report|overrun|alert)s?\b", re.I)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercases, collapses whitespace and drops trailing punctuation."""
+    text = re.sub(r"\s+", " ", prompt.strip().lower())
+    return text.rstrip(" ?.!")
+
+
+class SideEffectTracker:
+    """
+    Wraps user_functions so the chat loop can tell whether a side-effecting
+    tool ran during the current turn. The wrappers keep the original name,
+    docstring and signature, so FunctionTool builds identical definitions.
+    """
+
+    def __init__(self, tool_names: Iterable[str] = SIDE_EFFECT_TOOLS):
+        self._tool_names = set(tool_names)
+        self.triggered = False
+
+    def wrap(self, functions: Set[Callable[..., Any]]) -> Set[Callable[..., Any]]:
+        return {self._wrap_one(f) if f.__name__ in self._tool_names else f for f in functions}
+
+    def _wrap_one(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.triggered = True
+            return func(*args, **kwargs)
+        return wrapper
+
+    def reset(self) -> None:
+        self.triggered = False
+
+
+class AnswerCache:
+    """SQLite-backed prompt -> answer cache with TTL and LRU size eviction."""
+
+    def __init__(self, max_entries: int = 500, ttl_seconds: float = 86400,
+                 db_path: Path = ANSWER_DB_PATH):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key TEXT PRIMARY KEY,"
+            " prompt TEXT NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " latency_s REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_answers_access ON answers(last_access)")
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def key_for(prompt: str, data_path, policy_path, model: str, agent_name: str = "",
+                instructions: str = "", extra_paths: Iterable = (), history: str = "") -> Optional[str]:
+        """
+        Returns the cache key for a prompt, or None when the prompt must
+        bypass the cache because it asks for a side-effecting tool.
+        agent_name tells the agents of the two chat scripts apart; the
+        agent ID is left out so answers survive non-persistent sessions.
+        history is the conversation the prompt follows (empty for the
+        first turn), so context-dependent follow-ups never cross sessions.
+        """
+        if _SIDE_EFFECT_HINTS.search(prompt):
+            return None
+        parts = [
+            normalize_prompt(prompt),
+            cached_file_sha256(data_path),
+            cached_file_sha256(policy_path),
+            model,
+            agent_name,
+            hashlib.sha256(instructions.encode("utf-8")).hexdigest(),
+            hashlib.sha256(history.encode("utf-8")).hexdigest(),
+        ]
+        parts += [cached_file_sha256(path) for path in extra_paths]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached answer, or None on a miss or an expired entry."""
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT answer, latency_s, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE answers SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        self.hits += 1
+        self.saved_seconds += max(row[1] - (time.perf_counter() - start), 0.0)
+        return row[0]
+
+    def put(self, key: str, prompt: str, answer: str, latency_s: float) -> None:
+        """Stores an answer and evicts expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_prompt(prompt), answer, latency_s, now, now),
+            )
+            self._db.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._db.execute(
+                "DELETE FROM answers WHERE key IN ("
+                " SELECT key FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        """One-line hit rate and latency-saved summary."""
+        lookups = self.hits + self.misses
+        return (f"{self.hits} hit(s) / {lookups} lookup(s) ({self.hit_rate:.0%}), "
+                f"~{self.saved_seconds:.1f}s saved")
+
+    def close(self) -> None:
+        self._db.close()
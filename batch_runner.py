@@ -0,0 +1,345 @@
+"""
+Batch Runner for the RFP Expense Agent
+======================================
+Non-interactive alternative to the input() chat loop for nightly sweeps.
+
+Reads prompts from a JSONL file line by line, runs them with bounded
+concurrency on the async azure.ai.agents.aio client and appends one result
+line per prompt to an output JSONL file as soon as it completes.
+
+Input lines:
+    {"id": "q1", "prompt": "What is the highest cost category?"}
+    {"id": "q2", "prompt": "...", "conversation": "travel"}
+
+Prompts without a conversation key each get their own thread and run fully
+in parallel; that thread is deleted once the prompt's result is recorded.
+Prompts sharing a conversation key run in input order on one shared thread,
+so follow-up questions see the earlier answers; conversation threads are
+kept so a re-run can continue them.
+
+Re-running with the same output file resumes: prompts whose id already has
+a completed result are skipped, and conversations continue on the thread
+recorded in their last completed result. A prompt that was already posted
+to that thread by the interrupted or failed attempt is not posted again;
+its run is retried, or its answer collected if the run had finished.
+
+Input lines that are not valid JSON or lack the prompt field are reported
+and skipped. Custom functions run on worker threads
+(tool_executor.offload_tools), so tool calls never block the event loop.
+
+Usage:
+    python batch_runner.py prompts.jsonl results.jsonl --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from agent_registry import tag_metadata
+from instructions import build_functions_instructions
+from tool_executor import offload_tools, run_error, run_status
+from user_functions import user_functions
+
+script_dir = Path(__file__).parent
+
+
+# ---------------------------------------------------------------
+# Streaming JSONL input / output
+# ---------------------------------------------------------------
+def iter_prompts(path, id_field: str, prompt_field: str, group_field: str,
+                 invalid: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yields prompt records one line at a time; blank lines are skipped.
+    Malformed lines are reported, their line numbers appended to invalid
+    and skipped, so one bad line does not stop the batch.
+    """
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                prompt = record[prompt_field]
+                item = {
+                    "id": str(record.get(id_field, line_number)),
+                    "prompt": prompt,
+                    "conversation": record.get(group_field),
+                }
+            except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as exc:
+                print(f"  [invalid  ] line {line_number}: {type(exc).__name__}: {exc}")
+                if invalid is not None:
+                    invalid.append(line_number)
+                continue
+            yield item
+
+
+def load_completed(path) -> Tuple[Set[str], Dict[str, str]]:
+    """
+    Returns the ids already completed in an existing output file and the
+    thread id last used by each conversation, so a rerun can resume.
+    """
+    completed: Set[str] = set()
+    threads: Dict[str, str] = {}
+    if not Path(path).exists():
+        return completed, threads
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if result.get("status") == "completed":
+                completed.add(result["id"])
+                if result.get("conversation"):
+                    threads[result["conversation"]] = result["thread_id"]
+    return completed, threads
+
+
+class ResultWriter:
+    """Appends one JSON line per result and flushes it immediately."""
+
+    def __init__(self, path):
+        self._file = open(path, "a")
+
+    def write(self, result: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(result) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ---------------------------------------------------------------
+# Batch execution
+# ---------------------------------------------------------------
+class BatchRunner:
+    """
+    Runs prompts concurrently against one agent.
+
+    A semaphore caps the number of in-flight runs; a second, larger one
+    caps how many prompts are read ahead of the runs so the input file is
+    never loaded whole. Conversations are chained: each prompt in a
+    conversation waits for the previous one before it starts.
+    """
+
+    def __init__(self, agents_client, agent_id: str, writer: ResultWriter,
+                 concurrency: int, conversation_threads: Optional[Dict[str, str]] = None):
+        self._client = agents_client
+        self._agent_id = agent_id
+        self._writer = writer
+        self._run_slots = asyncio.Semaphore(concurrency)
+        self._read_ahead = asyncio.Semaphore(concurrency * 4)
+        self._threads: Dict[str, str] = dict(conversation_threads or {})
+        # Resumed conversations whose thread may hold the interrupted prompt
+        self._resumed: Set[str] = set(self._threads)
+        self._tails: Dict[str, asyncio.Task] = {}
+        self.stats = {"completed": 0, "failed": 0, "skipped": 0}
+
+    async def _thread_for(self, conversation: Optional[str]) -> str:
+        if conversation and conversation in self._threads:
+            return self._threads[conversation]
+        thread = await self._client.threads.create(metadata=tag_metadata(source="batch"))
+        if conversation:
+            self._threads[conversation] = thread.id
+        return thread.id
+
+    async def _interrupted_turn(self, thread_id: str, prompt: str) -> Tuple[bool, Optional[str]]:
+        """
+        Checks a resumed thread for this prompt from an earlier attempt.
+        Returns whether it is already posted and, if the run finished
+        before the interruption, the answer.
+        """
+        from azure.ai.agents.models import ListSortOrder
+
+        latest = []
+        async for msg in self._client.messages.list(thread_id=thread_id, order=ListSortOrder.DESCENDING, limit=2):
+            if msg.text_messages:
+                latest.append((str(getattr(msg.role, "value", msg.role)).lower(), msg.text_messages[-1].text.value))
+            if len(latest) == 2:
+                break
+        if latest and latest[0] == ("user", prompt):
+            return True, None
+        if len(latest) == 2 and latest[0][0] != "user" and latest[1] == ("user", prompt):
+            return True, latest[0][1]
+        return False, None
+
+    async def _run_one(self, item: Dict[str, Any], previous: Optional[asyncio.Task]) -> None:
+        from azure.ai.agents.models import MessageRole
+
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        result = {"id": item["id"], "conversation": item["conversation"], "prompt": item["prompt"]}
+        start = time.perf_counter()
+        try:
+            async with self._run_slots:
+                thread_id = await self._thread_for(item["conversation"])
+                result["thread_id"] = thread_id
+                posted, answer = False, None
+                if item["conversation"] in self._resumed:
+                    self._resumed.discard(item["conversation"])
+                    posted, answer = await self._interrupted_turn(thread_id, item["prompt"])
+                if answer is not None:
+                    # The run finished before the interruption
+                    result["status"] = "completed"
+                    result["response"] = answer
+                else:
+                    if not posted:
+                        await self._client.messages.create(
+                            thread_id=thread_id, role="user", content=item["prompt"]
+                        )
+                    run = await self._client.runs.create_and_process(
+                        thread_id=thread_id, agent_id=self._agent_id
+                    )
+                    result["run_id"] = run.id
+                    if run_status(run) != "completed":
+                        result["status"] = "failed"
+                        result["error"] = run_error(run)
+                    else:
+                        last_msg = await self._client.messages.get_last_message_text_by_role(
+                            thread_id=thread_id, role=MessageRole.AGENT
+                        )
+                        result["status"] = "completed"
+                        result["response"] = last_msg.text.value if last_msg else ""
+        except Exception as exc:
+            result["status"] = "failed"
+            result["error"] = f"{type(exc).__name__}: {exc}"
+
+        result["latency_s"] = round(time.perf_counter() - start, 3)
+        result["completed_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._writer.write(result)
+        self.stats[result["status"]] += 1
+        print(f"  [{result['status']:9s}] {item['id']} ({result['latency_s']:.1f}s)")
+        if not item["conversation"] and "thread_id" in result:
+            try:
+                await self._client.threads.delete(result["thread_id"])
+            except Exception as exc:
+                print(f"  Could not delete thread {result['thread_id']}: {exc}")
+
+    async def _tracked(self, item: Dict[str, Any], previous: Optional[asyncio.Task]) -> None:
+        try:
+            await self._run_one(item, previous)
+        finally:
+            self._read_ahead.release()
+            key = item["conversation"]
+            if key and self._tails.get(key) is asyncio.current_task():
+                del self._tails[key]
+
+    async def run(self, prompts: Iterator[Dict[str, Any]], completed: Set[str]) -> None:
+        pending: Set[asyncio.Task] = set()
+        try:
+            for item in prompts:
+                if item["id"] in completed:
+                    self.stats["skipped"] += 1
+                    continue
+                await self._read_ahead.acquire()
+                key = item["conversation"]
+                previous = self._tails.get(key) if key else None
+                task = asyncio.create_task(self._tracked(item, previous))
+                if key:
+                    self._tails[key] = task
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            # Prompts already started finish and are recorded even if
+            # reading the input fails
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def create_batch_agent(agents_client, model: str):
+    """Creates a functions-only agent grounded like agent_functions.py."""
+    from azure.ai.agents.models import AsyncFunctionTool, AsyncToolSet
+
+    policy_content = (script_dir / "expense_policy.txt").read_text()
+    data_content = (script_dir / "data.txt").read_text()
+
+    toolset = AsyncToolSet()
+    toolset.add(AsyncFunctionTool(offload_tools(user_functions)))
+    agents_client.enable_auto_function_calls(toolset)
+
+    return await agents_client.create_agent(
+        model=model,
+        name="rfp-expense-batch-agent",
+        instructions=build_functions_instructions(policy_content, data_content),
+        toolset=toolset,
+        metadata=tag_metadata(source="batch"),
+    )
+
+
+async def main_async(args) -> None:
+    from azure.identity.aio import DefaultAzureCredential
+    from azure.ai.agents.aio import AgentsClient
+
+    project_endpoint = os.getenv("PROJECT_ENDPOINT")
+    model_deployment = os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-4.1")
+    if not project_endpoint or project_endpoint == "your_project_endpoint":
+        print("ERROR: Please set PROJECT_ENDPOINT in the .env file.")
+        raise SystemExit(1)
+
+    completed, conversation_threads = load_completed(args.output)
+    invalid_lines: List[int] = []
+    prompts = iter_prompts(args.input, args.id_field, args.prompt_field, args.group_field, invalid_lines)
+
+    print("\n" + "=" * 60)
+    print("RFP EXPENSE AGENT - Batch Runner")
+    print("=" * 60)
+    print(f"Input:       {args.input}")
+    print(f"Output:      {args.output} ({len(completed)} already completed)")
+    print(f"Concurrency: {args.concurrency}\n")
+
+    credential = DefaultAzureCredential(
+        exclude_environment_credential=True,
+        exclude_managed_identity_credential=True,
+    )
+    async with credential, AgentsClient(endpoint=project_endpoint, credential=credential) as agents_client:
+        if args.agent_id:
+            agent_id = args.agent_id
+        else:
+            agent = await create_batch_agent(agents_client, model_deployment)
+            agent_id = agent.id
+            print(f"Agent created: {agent.name} (ID: {agent.id})\n")
+
+        writer = ResultWriter(args.output)
+        runner = BatchRunner(agents_client, agent_id, writer, args.concurrency, conversation_threads)
+        start = time.perf_counter()
+        try:
+            await runner.run(prompts, completed)
+        finally:
+            writer.close()
+            if not args.agent_id:
+                await agents_client.delete_agent(agent_id)
+
+    elapsed = time.perf_counter() - start
+    print("\n" + "=" * 60)
+    print(f"Completed: {runner.stats['completed']}  Failed: {runner.stats['failed']}  "
+          f"Skipped (resumed): {runner.stats['skipped']}  Invalid lines: {len(invalid_lines)}  "
+          f"Time: {elapsed:.1f}s")
+    print("=" * 60 + "\n")
+
+
+def main():
+    # Before the argument defaults read BATCH_CONCURRENCY
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run RFP expense prompts from JSONL in batch.")
+    parser.add_argument("input", help="prompts JSONL file")
+    parser.add_argument("output", help="results JSONL file (appended; reruns resume)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "8")))
+    parser.add_argument("--agent-id", help="use an existing agent instead of creating one")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--prompt-field", default="prompt")
+    parser.add_argument("--group-field", default="conversation",
+                        help="records sharing this key run in order on one thread")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark: local analytics tools vs the Code Interpreter path
+=============================================================
+Measures how long the local analytics functions in user_functions take to
+answer the data questions that used to require a Code Interpreter run.
+
+    python benchmarks/bench_analytics.py            # local tools only
+    python benchmarks/bench_analytics.py --live     # also time real agent turns
+
+With --live (requires PROJECT_ENDPOINT in .env) each question is asked on a
+fresh thread of two agents: one restricted to Code Interpreter over the
+uploaded data.txt, one using the local analytics function tools. The turn
+latency of both paths is reported side by side.
+"""
+
+import argparse
+import os
+import time
+
+from bench_common import REPO_DIR, save_results, summarize
+
+import expense_analytics
+from user_functions import (
+    compare_rates_to_policy_caps,
+    get_consultant_rates,
+    get_expense_totals,
+    get_rate_statistics,
+)
+
+LOCAL_TOOLS = {
+    "get_expense_totals": get_expense_totals,
+    "get_consultant_rates": get_consultant_rates,
+    "get_rate_statistics": get_rate_statistics,
+    "compare_rates_to_policy_caps": compare_rates_to_policy_caps,
+}
+
+QUESTIONS = [
+    "What is the grand total and the highest cost category?",
+    "What's the standard deviation of hourly rates?",
+    "Which consultants exceed their policy rate caps?",
+]
+
+
+def bench_local(iterations: int):
+    results = {}
+
+    # Cold: parse from disk (clears the in-process table cache first)
+    expense_analytics._TABLE_CACHE.clear()
+    start = time.perf_counter()
+    get_expense_totals()
+    results["cold_parse_and_totals"] = summarize([time.perf_counter() - start])
+
+    for name, tool in LOCAL_TOOLS.items():
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            tool()
+            samples.append(time.perf_counter() - start)
+        results[name] = summarize(samples)
+    return results
+
+
+def _time_turns(agents_client, agent_id: str, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        for question in QUESTIONS:
+            thread = agents_client.threads.create()
+            start = time.perf_counter()
+            agents_client.messages.create(thread_id=thread.id, role="user", content=question)
+            agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent_id)
+            samples.append(time.perf_counter() - start)
+            agents_client.threads.delete(thread.id)
+    return samples
+
+
+def bench_live(rounds: int):
+    from dotenv import load_dotenv
+    from azure.identity import DefaultAzureCredential
+    from azure.ai.agents import AgentsClient
+    from azure.ai.agents.models import CodeInterpreterTool, FilePurpose, FunctionTool, ToolSet
+
+    from upload_cache import UploadCache
+
+    load_dotenv(REPO_DIR / ".env")
+    endpoint = os.getenv("PROJECT_ENDPOINT")
+    model = os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-4.1")
+
+    agents_client = AgentsClient(
+        endpoint=endpoint,
+        credential=DefaultAzureCredential(
+            exclude_environment_credential=True,
+            exclude_managed_identity_credential=True,
+        ),
+    )
+    with agents_client:
+        uploads = UploadCache(agents_client, scope=endpoint)
+        data_id = uploads.upload(REPO_DIR / "data.txt", FilePurpose.AGENTS).file_id
+        policy_id = uploads.upload(REPO_DIR / "expense_policy.txt", FilePurpose.AGENTS).file_id
+
+        ci_toolset = ToolSet()
+        ci_toolset.add(CodeInterpreterTool(file_ids=[data_id, policy_id]))
+        ci_agent = agents_client.create_agent(
+            model=model,
+            name="bench-code-interpreter",
+            instructions="Answer using Python in Code Interpreter over data.txt and expense_policy.txt.",
+            toolset=ci_toolset,
+        )
+
+        fn_toolset = ToolSet()
+        fn_toolset.add(FunctionTool(set(LOCAL_TOOLS.values())))
+        agents_client.enable_auto_function_calls(fn_toolset)
+        fn_agent = agents_client.create_agent(
+            model=model,
+            name="bench-local-analytics",
+            instructions="Answer using the analytics functions.",
+            toolset=fn_toolset,
+        )
+
+        try:
+            return {
+                "code_interpreter_turn": summarize(_time_turns(agents_client, ci_agent.id, rounds)),
+                "local_analytics_turn": summarize(_time_turns(agents_client, fn_agent.id, rounds)),
+            }
+        finally:
+            agents_client.delete_agent(ci_agent.id)
+            agents_client.delete_agent(fn_agent.id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--live", action="store_true", help="also time real agent turns")
+    parser.add_argument("--rounds", type=int, default=3, help="live rounds per question")
+    args = parser.parse_args()
+
+    results = {"local_tools": bench_local(args.iterations)}
+    if args.live:
+        results["turn_latency"] = bench_live(args.rounds)
+
+    for section, entries in results.items():
+        print(f"\n{section}")
+        for name, stats in entries.items():
+            print(f"  {name:32s} {stats}")
+    print(f"\nSaved: {save_results('analytics', results)}")
+
+
+if __name__ == "__main__":
+    main()
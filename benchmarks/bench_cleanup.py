@@ -0,0 +1,130 @@
+"""
+Benchmark: garbage collection of stale agents, threads and files
+================================================================
+Seeds the local fake service (fake_agents.py) with a backlog of objects as
+left behind by crashed sessions: tagged agents and threads, uploads of
+data.txt / expense_policy.txt, plus untagged objects, a persistent agent
+and fresh objects that must survive. The fake enforces a request rate
+limit (HTTP 429 with Retry-After), like the real service.
+
+Each configuration runs cleanup.GarbageCollector on a fresh copy and
+reports plan and delete time, deletes per second, retries after 429s,
+stale objects left over and whether every survivor is still there.
+
+    python benchmarks/bench_cleanup.py
+    python benchmarks/bench_cleanup.py --objects 2000 --rate-limit 100
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from bench_common import save_results
+
+from agent_registry import tag_metadata
+from cache_utils import write_json_atomic
+from cleanup import GarbageCollector
+from fake_agents import FAKE_ENDPOINT, FakeAgentsClient
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# name -> (workers, client-side rate; 0 = unthrottled)
+CONFIGS = {
+    "sequential": (1, 0),
+    "concurrent_unthrottled": (16, 0),
+    "concurrent_throttled": (16, None),
+}
+
+
+def seed(client: FakeAgentsClient, stale: int, work_dir: Path):
+    """Creates the backlog; returns the IDs that must survive."""
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+    keep = set()
+
+    def aged(obj):
+        obj.created_at = old
+        return obj
+
+    per_kind = stale // 3
+    for i in range(per_kind):
+        aged(client.create_agent(model="m", name="rfp-expense-agent", metadata=tag_metadata()))
+        aged(client.threads.create(metadata=tag_metadata(source="chat")))
+        path = REPO_DIR / ("data.txt" if i % 2 else "expense_policy.txt")
+        aged(client.files.upload_and_poll(file_path=str(path), purpose="assistants"))
+
+    # Survivors: a persistent agent, today's session, objects of other tools
+    persistent = aged(client.create_agent(model="m", name="rfp-expense-agent", metadata=tag_metadata()))
+    keep.add(persistent.id)
+    keep.add(client.create_agent(model="m", name="rfp-expense-agent", metadata=tag_metadata()).id)
+    keep.add(client.threads.create(metadata=tag_metadata(source="chat")).id)
+    keep.add(aged(client.create_agent(model="m", name="someone-elses-agent")).id)
+    keep.add(aged(client.threads.create()).id)
+    cached = aged(client.files.upload_and_poll(file_path=str(REPO_DIR / "data.txt"), purpose="assistants"))
+    keep.add(cached.id)
+
+    registry_path = work_dir / "agents.json"
+    manifest_path = work_dir / "uploads.json"
+    write_json_atomic(registry_path, {"scopes": {FAKE_ENDPOINT: {
+        "rfp-expense-agent": {"agent_id": persistent.id, "fingerprint": "x"}}}})
+    write_json_atomic(manifest_path, {"scopes": {FAKE_ENDPOINT: {
+        "assistants:abc": {"file_id": cached.id, "file_name": "data.txt",
+                           "uploaded_at": "2026-01-01 00:00:00", "upload_seconds": 1.0}}}})
+    return keep, registry_path, manifest_path
+
+
+def run_config(stale: int, workers: int, rate: float, rate_limit: float, latency_scale: float):
+    client = FakeAgentsClient(latency_scale=0.0)
+    with tempfile.TemporaryDirectory() as work_dir:
+        keep, registry_path, manifest_path = seed(client, stale, Path(work_dir))
+        # Latency and the rate limit apply from here on
+        client.latency_scale = latency_scale
+        client.rate_limit = rate_limit
+        collector = GarbageCollector(client, FAKE_ENDPOINT, min_age_hours=24, concurrency=workers,
+                                     rate=rate, registry_path=registry_path, manifest_path=manifest_path)
+        start = time.perf_counter()
+        plan = collector.plan()
+        plan_seconds = time.perf_counter() - start
+        report = collector.delete(plan)
+
+    remaining = set(client._agents) | set(client._threads) | set(client._files)
+    deleted = sum(report.deleted.values())
+    return {
+        "stale": len(plan.stale),
+        "kept": len(plan.kept),
+        "plan_s": round(plan_seconds, 3),
+        "delete_s": round(report.seconds, 3),
+        "deletes_per_s": round(deleted / report.seconds, 1) if report.seconds else 0.0,
+        "retries": report.retries,
+        "throttled": report.throttled,
+        "failed": len(report.failed),
+        "survivors_intact": keep <= remaining,
+        "left_over": len(remaining - keep),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stale object cleanup benchmark.")
+    parser.add_argument("--objects", type=int, default=600, help="stale objects to seed")
+    parser.add_argument("--rate-limit", type=float, default=50, help="fake service requests per second")
+    parser.add_argument("--latency-scale", type=float, default=0.5,
+                        help="fake latency scale (delete requests take 0.1s unscaled)")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"  {args.objects} stale objects, service limit {args.rate_limit:g} req/s\n")
+    for name, (workers, rate) in CONFIGS.items():
+        rate = args.rate_limit * 0.9 if rate is None else rate
+        result = run_config(args.objects, workers, rate, args.rate_limit, args.latency_scale)
+        results[name] = result
+        print(f"  {name:24s} {result['delete_s']:7.2f}s  {result['deletes_per_s']:7.1f}/s  "
+              f"retries {result['retries']:4d} (429: {result['throttled']:4d})  failed {result['failed']}  "
+              f"left over {result['left_over']}  "
+              f"{'survivors ok' if result['survivors_intact'] else 'SURVIVORS DELETED'}")
+
+    print(f"\nSaved: {save_results('cleanup', results)}")
+
+
+if __name__ == "__main__":
+    main()
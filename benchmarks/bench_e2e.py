@@ -0,0 +1,168 @@
+"""
+Benchmark: end-to-end sessions against the local fake Agents service
+====================================================================
+Runs agent.py and agent_functions.py unmodified with AGENTS_BACKEND=fake
+(see fake_agents.py), feeding a fixed list of prompts through input(), and
+reports per script:
+
+  startup      process start until the first "You:" prompt
+  turns        p50/p95 turn latency (prompt submitted -> next prompt)
+  shutdown     "quit" until the script exits (conversation log + cleanup)
+  tools        scripted user_functions calls and their execution time
+  requests     calls per fake service operation
+
+    python benchmarks/bench_e2e.py                          # default latency profile
+    python benchmarks/bench_e2e.py --latency-scale 0        # local overhead only
+    python benchmarks/bench_e2e.py --env STREAM_RESPONSES=true --repeat 5
+    python benchmarks/bench_e2e.py --compare benchmarks/results/e2e-abc1234.json
+
+Script output is suppressed; results are saved to benchmarks/results/.
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import runpy
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from bench_common import REPO_DIR, save_results, summarize
+
+from fake_agents import FakeAgentsClient
+
+SCRIPTS = ["agent.py", "agent_functions.py"]
+
+PROMPTS = [
+    "What is the highest cost category?",
+    "Which consultants exceed their policy rate caps?",
+    "What approval is needed for a project of $75,000?",
+    "What is the standard deviation of the hourly rates?",
+    "Summarize the RFP in two sentences.",
+]
+
+
+class _ScriptedInput:
+    """Replacement for input() that replays prompts and timestamps each call."""
+
+    def __init__(self, prompts: List[str]):
+        self._prompts = list(prompts) + ["quit"]
+        self.calls: List[float] = []
+
+    def __call__(self, prompt: str = "") -> str:
+        self.calls.append(time.perf_counter())
+        return self._prompts[len(self.calls) - 1]
+
+
+def run_session(script: str, prompts: List[str]) -> Dict:
+    """Runs one script session in-process and returns its raw timings and counters."""
+    scripted = _ScriptedInput(prompts)
+    original_input = builtins.input
+    builtins.input = scripted
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(str(REPO_DIR / script), run_name="__main__")
+    finally:
+        builtins.input = original_input
+    end = time.perf_counter()
+
+    client = FakeAgentsClient.last_instance
+    calls = scripted.calls
+    return {
+        "startup": calls[0] - start,
+        "turns": [b - a for a, b in zip(calls, calls[1:])],
+        "shutdown": end - calls[-1],
+        "tool_seconds": client.tool_seconds,
+        "tool_calls": dict(client.tool_calls),
+        "requests": dict(client.request_counts),
+    }
+
+
+def bench_script(script: str, prompts: List[str], repeat: int) -> Dict:
+    sessions = [run_session(script, prompts) for _ in range(repeat)]
+    requests: Counter = Counter()
+    tool_calls: Counter = Counter()
+    for s in sessions:
+        requests.update(s["requests"])
+        tool_calls.update(s["tool_calls"])
+    return {
+        "startup": summarize([s["startup"] for s in sessions]),
+        "turn_latency": summarize([t for s in sessions for t in s["turns"]]),
+        "shutdown": summarize([s["shutdown"] for s in sessions]),
+        "tool_time_ms_per_session": round(sum(s["tool_seconds"] for s in sessions) / repeat * 1000, 3),
+        "tool_calls_per_session": {k: v / repeat for k, v in sorted(tool_calls.items())},
+        "requests_per_session": {k: v / repeat for k, v in sorted(requests.items())},
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """Prints p50/p95 deltas against a previously saved e2e result."""
+    print(f"\nCompared with {baseline['commit']} ({baseline['timestamp']}):")
+    for script, stats in results.items():
+        old = baseline["results"].get(script)
+        if not old or "startup" not in stats:
+            continue
+        for metric in ("startup", "turn_latency", "shutdown"):
+            for key in ("p50_ms", "p95_ms"):
+                before, after = old[metric].get(key), stats[metric].get(key)
+                if before is None or after is None:
+                    continue
+                change = (after - before) / before * 100 if before else 0.0
+                print(f"  {script:20s} {metric:13s} {key}  {before:10.1f} -> {after:10.1f}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scripts", nargs="+", default=SCRIPTS)
+    parser.add_argument("--repeat", type=int, default=3, help="sessions per script")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="multiplier for the fake service latency profile")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the scripts (repeatable)")
+    parser.add_argument("--compare", type=Path, help="earlier e2e result file to diff against")
+    args = parser.parse_args()
+
+    # Read the baseline first: a rerun on the same commit overwrites its file
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Defaults pinned so results do not depend on the local .env;
+        # load_dotenv() in the scripts does not override these
+        os.environ.update({
+            "AGENTS_BACKEND": "fake",
+            "FAKE_AGENTS_LATENCY_SCALE": str(args.latency_scale),
+            "UPLOAD_CACHE": "true",
+            "PERSISTENT_AGENT": "false",
+            "STREAM_RESPONSES": "false",
+            "ANSWER_CACHE": "false",
+            "GROUNDING_MODE": "full",
+            "REPORT_DB_PATH": str(Path(tmp) / "reports.sqlite"),
+        })
+        for pair in args.env:
+            key, _, value = pair.partition("=")
+            os.environ[key] = value
+
+        results = {script: bench_script(script, PROMPTS, args.repeat) for script in args.scripts}
+
+    for script, stats in results.items():
+        print(f"\n{script}")
+        for name, value in stats.items():
+            print(f"  {name:26s} {value}")
+    results["config"] = {"latency_scale": args.latency_scale, "repeat": args.repeat,
+                         "prompts": len(PROMPTS), "env": args.env}
+    print(f"\nSaved: {save_results('e2e', results)}")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
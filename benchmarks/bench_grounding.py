@@ -0,0 +1,166 @@
+"""
+Benchmark: full-document grounding vs retrieval grounding
+=========================================================
+Compares the prompt size of agent_functions.py's two grounding modes:
+
+  full       expense_policy.txt and data.txt embedded in the instructions
+  retrieval  short instructions + top-k BM25 excerpts per question
+
+    python benchmarks/bench_grounding.py                 # prompt size + retrieval time
+    python benchmarks/bench_grounding.py --rows 5000     # also with a synthetic 5,000-row ledger
+    python benchmarks/bench_grounding.py --live         # also real turn latency + prompt tokens
+
+Token counts offline are estimates (about 4 characters per token); --live
+reports the prompt_tokens the service actually billed for each run.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import REPO_DIR, save_results, summarize
+
+from grounding import GroundingIndex, estimate_tokens
+from instructions import RETRIEVAL_INSTRUCTIONS, build_functions_instructions
+
+QUESTIONS = [
+    "What is the maximum rate for an AI Engineer?",
+    "What approval is needed for a $75,000 project?",
+    "How much was spent on travel and is it within policy?",
+    "What is the grand total of the RFP?",
+    "Which consultant has the highest hourly rate?",
+]
+
+ROLES = ["Senior D365 Developer", "Junior D365 Developer", "AI Engineer", "Project Manager",
+         "QA Tester", "DevOps Engineer", "UX Designer", "Business Analyst", "Technical Writer"]
+
+
+def synthetic_ledger(rows: int, path: Path) -> Path:
+    """Writes data.txt-style content with `rows` extra consultant lines."""
+    rng = random.Random(42)
+    lines = [(REPO_DIR / "data.txt").read_text(), "", "Category | Amount (USD) | Hours | Consultant"]
+    for i in range(rows):
+        hours = rng.randint(40, 160)
+        rate = rng.randint(45, 160)
+        lines.append(f"{rng.choice(ROLES)} | {hours * rate:,} | {hours} | Consultant {i:05d}")
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def bench_offline(data_path: Path, top_k: int, budget: int, iterations: int):
+    policy_path = REPO_DIR / "expense_policy.txt"
+    full = build_functions_instructions(policy_path.read_text(), data_path.read_text())
+
+    start = time.perf_counter()
+    index = GroundingIndex.load([policy_path, data_path])
+    build_time = time.perf_counter() - start
+
+    retrieval_tokens = []
+    samples = []
+    for question in QUESTIONS:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            context = index.context_for(question, top_k=top_k, token_budget=budget)
+            samples.append(time.perf_counter() - start)
+        retrieval_tokens.append(estimate_tokens(RETRIEVAL_INSTRUCTIONS) + estimate_tokens(context))
+
+    return {
+        "full_prompt_tokens_est": estimate_tokens(full),
+        "retrieval_prompt_tokens_est_mean": round(sum(retrieval_tokens) / len(retrieval_tokens)),
+        "retrieval_prompt_tokens_est_max": max(retrieval_tokens),
+        "index_load_ms": round(build_time * 1000, 3),
+        "chunks": len(index.index.chunks),
+        "retrieval_latency": summarize(samples),
+    }
+
+
+def bench_live(top_k: int, budget: int):
+    from dotenv import load_dotenv
+    from azure.identity import DefaultAzureCredential
+    from azure.ai.agents import AgentsClient
+    from azure.ai.agents.models import FunctionTool, ToolSet
+
+    from user_functions import user_functions
+
+    load_dotenv(REPO_DIR / ".env")
+    agents_client = AgentsClient(
+        endpoint=os.getenv("PROJECT_ENDPOINT"),
+        credential=DefaultAzureCredential(
+            exclude_environment_credential=True,
+            exclude_managed_identity_credential=True,
+        ),
+    )
+    model = os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-4.1")
+    policy_path = REPO_DIR / "expense_policy.txt"
+    data_path = REPO_DIR / "data.txt"
+    index = GroundingIndex.load([policy_path, data_path])
+
+    results = {}
+    with agents_client:
+        toolset = ToolSet()
+        toolset.add(FunctionTool(user_functions))
+        agents_client.enable_auto_function_calls(toolset)
+        modes = {
+            "full": build_functions_instructions(policy_path.read_text(), data_path.read_text()),
+            "retrieval": RETRIEVAL_INSTRUCTIONS,
+        }
+        for mode, instructions in modes.items():
+            agent = agents_client.create_agent(
+                model=model, name=f"bench-grounding-{mode}", instructions=instructions, toolset=toolset,
+            )
+            latencies, prompt_tokens = [], []
+            try:
+                for question in QUESTIONS:
+                    thread = agents_client.threads.create()
+                    kwargs = {}
+                    if mode == "retrieval":
+                        kwargs["additional_instructions"] = index.context_for(question, top_k, budget)
+                    start = time.perf_counter()
+                    agents_client.messages.create(thread_id=thread.id, role="user", content=question)
+                    run = agents_client.runs.create_and_process(
+                        thread_id=thread.id, agent_id=agent.id, **kwargs
+                    )
+                    latencies.append(time.perf_counter() - start)
+                    if run.usage:
+                        prompt_tokens.append(run.usage.prompt_tokens)
+                    agents_client.threads.delete(thread.id)
+            finally:
+                agents_client.delete_agent(agent.id)
+            results[mode] = {
+                "turn_latency": summarize(latencies),
+                "prompt_tokens_mean": round(sum(prompt_tokens) / len(prompt_tokens)) if prompt_tokens else None,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--budget", type=int, default=800)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=0, help="also bench a synthetic ledger of this many rows")
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    results = {"data.txt": bench_offline(REPO_DIR / "data.txt", args.top_k, args.budget, args.iterations)}
+    if args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = synthetic_ledger(args.rows, Path(tmp) / "data.txt")
+            results[f"synthetic_{args.rows}_rows"] = bench_offline(
+                ledger, args.top_k, args.budget, args.iterations
+            )
+    if args.live:
+        results["live"] = bench_live(args.top_k, args.budget)
+
+    for section, stats in results.items():
+        print(f"\n{section}")
+        for name, value in stats.items():
+            print(f"  {name:34s} {value}")
+    print(f"\nSaved: {save_results('grounding', results)}")
+
+
+if __name__ == "__main__":
+    main()
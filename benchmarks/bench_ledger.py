@@ -0,0 +1,127 @@
+"""
+Benchmark: streaming ledger ingestion throughput
+================================================
+Generates synthetic ledgers and times ledger_ingest.ingest_ledger on them:
+rows/s, MB/s and peak resident memory of the ingesting process (each run
+happens in a fresh child process, so the peak is that run's alone).
+
+    python benchmarks/bench_ledger.py                          # 1M and 10M CSV rows
+    python benchmarks/bench_ledger.py --rows 1000000 --formats csv,jsonl,pipe
+    python benchmarks/bench_ledger.py --no-columns             # aggregation only
+
+Generated ledgers are kept in --workdir (default: system temp dir) and
+reused by later runs with the same size and format.
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import save_results
+
+import ledger_ingest
+
+CATEGORIES = [
+    ("Senior D365 Developer", 100), ("Junior D365 Developer", 60), ("AI Engineer", 140),
+    ("Project Manager", 100), ("QA Tester", 50), ("DevOps Engineer", 100), ("UX Designer", 70),
+    ("Business Analyst", 75), ("Technical Writer", 50),
+]
+OTHER_CATEGORIES = ["Travel", "Software Licenses", "Training Materials", "Office Equipment"]
+
+
+def generate_ledger(path: Path, rows: int, fmt: str, consultants: int = 2000, seed: int = 42) -> None:
+    """Writes a synthetic ledger of rows line items spread over 24 months."""
+    rng = random.Random(seed)
+    names = [f"Consultant {i:04d}" for i in range(consultants)]
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        if fmt == "csv":
+            f.write("date,category,consultant,hours,amount\n")
+        elif fmt == "pipe":
+            f.write("Date       | Category              | Amount (USD) | Hours | Consultant\n")
+        batch = []
+        for i in range(rows):
+            date = f"{2025 + (i % 24) // 12}-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+            if rng.random() < 0.15:
+                category, hours, consultant = rng.choice(OTHER_CATEGORIES), None, "Team"
+                amount = round(rng.uniform(50, 2500), 2)
+            else:
+                category, rate = rng.choice(CATEGORIES)
+                hours = rng.randint(1, 12)
+                amount = hours * rate
+                consultant = names[rng.randrange(consultants)]
+            if fmt == "csv":
+                batch.append(f"{date},{category},{consultant},{'' if hours is None else hours},{amount}\n")
+            elif fmt == "jsonl":
+                batch.append(json.dumps({"date": date, "category": category, "consultant": consultant,
+                                         "hours": hours, "amount": amount}) + "\n")
+            else:
+                batch.append(f"{date} | {category:21s} | {amount:,.2f} | {'-' if hours is None else hours} "
+                             f"| {consultant}\n")
+            if len(batch) >= 100_000:
+                f.writelines(batch)
+                batch = []
+        f.writelines(batch)
+    tmp_path.replace(path)
+
+
+def _ingest_child(path: str, cache_dir: str, write_columns: bool, queue) -> None:
+    start = time.perf_counter()
+    summary = ledger_ingest.ingest_ledger(path, cache_dir=Path(cache_dir), write_columns=write_columns, force=True)
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({"rows": summary.rows, "seconds": seconds, "peak_rss_mb": round(peak_kb / 1024, 1),
+               "grand_total": summary.grand_total})
+
+
+def bench_ingest(path: Path, cache_dir: Path, write_columns: bool):
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_ingest_child, args=(str(path), str(cache_dir), write_columns, queue))
+    child.start()
+    result = queue.get()
+    child.join()
+    size_mb = path.stat().st_size / (1 << 20)
+    result.update({
+        "file_mb": round(size_mb, 1),
+        "seconds": round(result["seconds"], 3),
+        "rows_per_s": round(result["rows"] / result["seconds"]),
+        "mb_per_s": round(size_mb / result["seconds"], 1),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ledger ingestion throughput.")
+    parser.add_argument("--rows", default="1000000,10000000", help="comma-separated ledger sizes")
+    parser.add_argument("--formats", default="csv", help="comma-separated: csv, jsonl, pipe")
+    parser.add_argument("--workdir", default=tempfile.gettempdir())
+    parser.add_argument("--no-columns", action="store_true", help="skip writing the columnar cache")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    cache_dir = workdir / "bench_ledger_cache"
+    results = {"config": {"write_columns": not args.no_columns, "python": sys.version.split()[0]}}
+    for fmt in args.formats.split(","):
+        for rows in (int(r) for r in args.rows.split(",")):
+            suffix = {"csv": ".csv", "jsonl": ".jsonl", "pipe": ".txt"}[fmt]
+            path = workdir / f"bench_ledger_{rows}{suffix}"
+            if not path.exists():
+                print(f"Generating {rows:,} {fmt} rows -> {path}")
+                generate_ledger(path, rows, fmt)
+            result = bench_ingest(path, cache_dir, not args.no_columns)
+            results[f"{fmt}_{rows}"] = result
+            print(f"  {fmt:5s} {rows:>11,} rows  {result['file_mb']:8.1f} MB  {result['seconds']:8.2f}s  "
+                  f"{result['rows_per_s']:>10,} rows/s  {result['mb_per_s']:6.1f} MB/s  "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB")
+
+    print(f"\nSaved: {save_results('ledger', results)}")
+
+
+if __name__ == "__main__":
+    main()
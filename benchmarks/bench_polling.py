@@ -0,0 +1,117 @@
+"""
+Benchmark: run polling policies
+===============================
+Drives runs of different lengths against the local fake service
+(fake_agents.py, manual run loop) with each RunDriver poll policy and
+reports per scenario and policy:
+
+  turn        p50 time from runs.create to the final state
+  overshoot   turn time minus the time the run actually needed (queue +
+              tool round trip + model), i.e. waiting on a finished phase
+  polls       runs.get requests per run
+  estimate    the driver's own wasted-wait estimate (RunStats.wasted_wait)
+
+"fixed" is the one-second poll of runs.create_and_process. --scale shrinks
+the fake latencies and every policy's intervals alike, so the comparison
+holds at a fraction of the wall time.
+
+    python benchmarks/bench_polling.py
+    python benchmarks/bench_polling.py --scale 1 --rounds 5
+    python benchmarks/bench_polling.py --custom '{"initial": 0.15, "max_interval": 2}'
+"""
+
+import argparse
+import statistics
+import time
+from dataclasses import replace
+
+from bench_common import save_results, summarize
+
+from azure.ai.agents.models import FunctionTool, ToolSet
+
+from fake_agents import DEFAULT_LATENCY, FakeAgentsClient
+from run_driver import POLICIES, RunDriver, policy_from_spec
+from tool_executor import ParallelToolExecutor
+from user_functions import user_functions
+
+# name -> (model seconds per phase, prompt; "grand total" makes one tool step)
+SCENARIOS = {
+    "short": (0.6, "Summarize the RFP in one sentence."),
+    "short_tool": (0.6, "What is the grand total?"),
+    "long": (6.0, "Draw a chart of the spend per month."),
+    "long_tool": (6.0, "What is the grand total? Draw it as a chart."),
+    "code_interpreter": (30.0, "Draw a chart of the spend per month and export it."),
+}
+
+
+def ideal_seconds(client: FakeAgentsClient, tool_step: bool) -> float:
+    """Time the fake run needs when every phase end is noticed at once."""
+    seconds = client._latency("run.queue") + client._latency("run.model")
+    if tool_step:
+        seconds += client._latency("run.tool_round_trip")
+    return seconds
+
+
+def bench_policy(policy, model_seconds: float, prompt: str, rounds: int, scale: float):
+    client = FakeAgentsClient(latency={"run.model": model_seconds}, latency_scale=scale)
+    toolset = ToolSet()
+    toolset.add(FunctionTool(user_functions))
+    client.enable_auto_function_calls(toolset)
+    agent = client.create_agent(model="bench", name="bench-polling", toolset=toolset)
+    driver = RunDriver(client, policy, ParallelToolExecutor(user_functions), seed=7)
+
+    samples, overshoot = [], []
+    for _ in range(rounds):
+        thread = client.threads.create()
+        client.messages.create(thread_id=thread.id, role="user", content=prompt)
+        start = time.perf_counter()
+        run = driver.process(thread.id, agent.id)
+        elapsed = time.perf_counter() - start
+        assert run.status == "completed", run.status
+        samples.append(elapsed)
+        overshoot.append(elapsed - ideal_seconds(client, driver.last.tool_steps > 0))
+    driver.shutdown()
+
+    return {
+        **summarize(samples),
+        "overshoot_ms": round(statistics.median(overshoot) * 1000, 1),
+        "polls_per_run": round(sum(r.polls for r in driver.runs) / rounds, 1),
+        "estimate_ms": round(statistics.median(r.wasted_wait for r in driver.runs) * 1000, 1),
+    }
+
+
+def scaled(policy, scale: float):
+    return replace(policy, initial=policy.initial * scale, max_interval=policy.max_interval * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run polling policy benchmark.")
+    parser.add_argument("--scale", type=float, default=0.25,
+                        help="factor applied to fake latencies and poll intervals")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenarios")
+    parser.add_argument("--custom", help="JSON overrides of the adaptive policy to compare as well")
+    args = parser.parse_args()
+
+    policies = list(POLICIES.values())
+    if args.custom:
+        policies.append(policy_from_spec(args.custom))
+
+    print(f"  fake latency scale {args.scale:g} (queue {DEFAULT_LATENCY['run.queue']}s, "
+          f"tool round trip {DEFAULT_LATENCY['run.tool_round_trip']}s before scaling)")
+    results = {}
+    for scenario in args.scenarios.split(","):
+        model_seconds, prompt = SCENARIOS[scenario]
+        print(f"\n  {scenario} (model {model_seconds:g}s)")
+        for policy in policies:
+            result = bench_policy(scaled(policy, args.scale), model_seconds, prompt, args.rounds, args.scale)
+            results[f"{scenario}_{policy.name}"] = result
+            print(f"    {policy.name:9s} turn p50 {result['p50_ms']:8.1f} ms   overshoot "
+                  f"{result['overshoot_ms']:7.1f} ms   polls {result['polls_per_run']:5.1f}   "
+                  f"estimate {result['estimate_ms']:7.1f} ms")
+
+    print(f"\nSaved: {save_results('polling', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: local intent router
+==============================
+Feeds a labelled prompt set through intent_router.IntentRouter: lookups it
+should answer locally (with a fact the answer must contain) and questions
+that need the agent. Reports per threshold:
+
+  local        share of prompts answered locally
+  correct      routed prompts whose answer holds the expected fact, and
+               agent prompts that were forwarded
+  wrong path   prompts sent down the other path than labelled
+  latency      p50/p95 of route() per intent and for forward decisions
+
+For the end-to-end effect on turn latency, compare
+    python benchmarks/bench_e2e.py --env ROUTER=true
+
+    python benchmarks/bench_router.py
+    python benchmarks/bench_router.py --thresholds 0.5,0.75,0.9 --rounds 200
+"""
+
+import argparse
+
+from bench_common import save_results, summarize
+
+from expense_analytics import load_expense_table
+from intent_router import IntentRouter
+from policy_index import load_policy_index
+
+# (prompt, expected intent or None for the agent, fact the answer must contain)
+PROMPTS = [
+    ("What's the max rate for an AI Engineer?", "rate_cap", "$150/hour"),
+    ("What is the rate cap for senior developers?", "rate_cap", "Senior Developers"),
+    ("Maximum hourly rate allowed for a QA Tester?", "rate_cap", "/hour"),
+    ("What is the grand total?", "totals", "$100,900"),
+    ("What are the total hours?", "totals", "1,041 hours"),
+    ("What is the average hourly rate?", "totals", "$84.53/hour"),
+    ("What is the highest cost category?", "totals", "Senior D365 Developer"),
+    ("How much did Lina Haddad bill?", "totals", "$14,000"),
+    ("What is the total for Travel?", "totals", "$3,200"),
+    ("Total personnel cost?", "totals", "Total personnel cost"),
+    ("Who needs to approve $30,000?", "approval", "Director"),
+    ("Who approves 75k?", "approval", "CTO + CEO"),
+    ("Approval needed for $4,500?", "approval", "Team Lead"),
+    ("Create a bar chart of costs by consultant", "chart", "Lina Haddad"),
+    ("Bar chart of hours by category", "chart", "Hours by category"),
+    ("Plot the hourly rate per consultant", "chart", "Hourly rate by consultant"),
+    ("Summarize the RFP.", None, None),
+    ("Which consultants exceed their policy rate caps?", None, None),
+    ("Submit an expense report", None, None),
+    ("Flag a budget overrun for travel", None, None),
+    ("Why is the AI Engineer rate so much higher than the market?", None, None),
+    ("Who approves a software license purchase of $6,000?", None, None),
+    ("Draw a chart of the spend per month and export it as a PNG.", None, None),
+    ("Compare the total for Travel with last year's budget", None, None),
+    ("Flag the AI Engineer rate cap", None, None),
+    ("Remove the AI Engineer cap", None, None),
+    ("Is the grand total over budget?", None, None),
+    ("How much did Lina Haddad bill in March?", None, None),
+    ("Who needs to approve $-500?", None, None),
+]
+
+
+def bench_threshold(threshold: float, rounds: int):
+    router = IntentRouter(threshold=threshold)
+    correct = wrong_path = wrong_answer = 0
+    for prompt, intent, fact in PROMPTS:
+        for _ in range(rounds):
+            routed = router.route(prompt)
+        if routed is None:
+            if intent is None:
+                correct += 1
+            else:
+                wrong_path += 1
+        elif intent is None or routed.intent != intent:
+            wrong_path += 1
+        elif fact in routed.text:
+            correct += 1
+        else:
+            wrong_answer += 1
+    routed_total = sum(router.routed.values())
+    return {
+        "local_share": round(routed_total / (routed_total + router.forwarded), 3),
+        "correct": correct,
+        "wrong_path": wrong_path,
+        "wrong_answer": wrong_answer,
+        "latency": {name: summarize(values) for name, values in sorted(router.seconds.items()) if values},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent router benchmark.")
+    parser.add_argument("--thresholds", default="0.5,0.75,0.9", help="comma-separated confidence thresholds")
+    parser.add_argument("--rounds", type=int, default=100, help="route() calls per prompt")
+    args = parser.parse_args()
+
+    # Parse data.txt and the policy once, as the chat scripts do at startup
+    load_expense_table()
+    load_policy_index()
+    expected_local = sum(1 for _, intent, _ in PROMPTS if intent)
+    print(f"  {len(PROMPTS)} prompts, {expected_local} labelled local, {args.rounds} rounds each\n")
+
+    results = {}
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        result = bench_threshold(threshold, args.rounds)
+        results[f"threshold_{threshold:g}"] = result
+        print(f"  threshold {threshold:<5g} local {result['local_share']:5.0%}   correct "
+              f"{result['correct']:2d}/{len(PROMPTS)}   wrong path {result['wrong_path']}   "
+              f"wrong answer {result['wrong_answer']}")
+        for name, stats in result["latency"].items():
+            print(f"      {name:18s} p50 {stats['p50_ms']:6.3f} ms   p95 {stats['p95_ms']:6.3f} ms")
+
+    print(f"\nSaved: {save_results('router', results)}")
+
+
+if __name__ == "__main__":
+    main()
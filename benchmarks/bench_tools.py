@@ -0,0 +1,122 @@
+"""
+Benchmark: parallel vs sequential execution of a step's tool calls
+==================================================================
+Times one required-action step with several function calls, where each
+user_function is given an artificial I/O delay (standing in for storage
+or validation lookups):
+
+  - executor: ParallelToolExecutor with one worker (sequential, what auto
+    function calling does) vs one worker per call
+  - e2e: full turns against the local fake service (fake_agents.py),
+    runs.create_and_process with auto function calls vs
+    run_driver.RunDriver with the parallel executor
+
+    python benchmarks/bench_tools.py
+    python benchmarks/bench_tools.py --io-ms 50,200 --calls 3,6 --rounds 10
+"""
+
+import argparse
+import functools
+import time
+
+from bench_common import save_results, summarize
+
+from azure.ai.agents.models import FunctionTool, ToolSet
+
+from fake_agents import FakeAgentsClient
+from run_driver import PollPolicy, RunDriver
+from tool_executor import ParallelToolExecutor
+from user_functions import user_functions
+
+TOOL_NAMES = ["get_expense_totals", "get_rate_statistics", "compare_rates_to_policy_caps",
+              "get_consultant_rates"]
+
+
+def with_io_delay(functions, seconds: float):
+    """Wraps each function so it sleeps for `seconds` before running."""
+    def slow(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            time.sleep(seconds)
+            return func(*args, **kwargs)
+        return wrapper
+    return {slow(f) for f in functions}
+
+
+class _Call:
+    def __init__(self, i: int, name: str):
+        self.id = f"call_{i}"
+        self.function = type("Function", (), {"name": name, "arguments": "{}"})()
+
+
+def bench_executor(functions, calls: int, rounds: int):
+    tool_calls = [_Call(i, TOOL_NAMES[i % len(TOOL_NAMES)]) for i in range(calls)]
+    results = {}
+    for label, workers in (("sequential", 1), ("parallel", calls)):
+        executor = ParallelToolExecutor(functions, max_workers=workers)
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            outputs = executor.execute(tool_calls)
+            samples.append(time.perf_counter() - start)
+            assert [o.tool_call_id for o in outputs] == [c.id for c in tool_calls]
+        executor.shutdown()
+        results[label] = summarize(samples)
+    return results
+
+
+def bench_e2e(functions, rounds: int, latency_scale: float):
+    script = [{"pattern": "full review", "tools": [{"name": n, "arguments": {}} for n in TOOL_NAMES[:3]]}]
+    results = {}
+    for label in ("create_and_process", "parallel_executor"):
+        client = FakeAgentsClient(latency_scale=latency_scale, script=script)
+        toolset = ToolSet()
+        toolset.add(FunctionTool(functions))
+        client.enable_auto_function_calls(toolset)
+        driver = RunDriver(client, PollPolicy("bench", initial=0.05, fast_polls=1, factor=1.0,
+                                              max_interval=0.05, jitter=0.0),
+                           ParallelToolExecutor(functions, max_workers=8))
+        agent = client.create_agent(model="bench", name="bench-tools", toolset=toolset)
+        samples = []
+        for _ in range(rounds):
+            thread = client.threads.create()
+            client.messages.create(thread_id=thread.id, role="user", content="Run a full review")
+            start = time.perf_counter()
+            if label == "create_and_process":
+                run = client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
+            else:
+                run = driver.process(thread.id, agent.id)
+            samples.append(time.perf_counter() - start)
+            assert run.status == "completed", run.status
+        driver.shutdown()
+        results[label] = {**summarize(samples), "requests": dict(client.request_counts)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel tool execution benchmark.")
+    parser.add_argument("--io-ms", default="20,100", help="comma-separated I/O delays per tool call")
+    parser.add_argument("--calls", default="3,6", help="comma-separated tool calls per step")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="fake service latency scale for e2e")
+    args = parser.parse_args()
+
+    results = {}
+    for io_ms in (int(v) for v in args.io_ms.split(",")):
+        functions = with_io_delay(user_functions, io_ms / 1000)
+        for calls in (int(v) for v in args.calls.split(",")):
+            step = bench_executor(functions, calls, args.rounds)
+            results[f"executor_{calls}calls_{io_ms}ms"] = step
+            print(f"  {calls} calls x {io_ms:4d} ms I/O: sequential p50 {step['sequential']['p50_ms']:8.1f} ms"
+                  f"   parallel p50 {step['parallel']['p50_ms']:8.1f} ms")
+        e2e = bench_e2e(functions, args.rounds, args.latency_scale)
+        results[f"e2e_{io_ms}ms"] = e2e
+        print(f"  e2e turn ({io_ms} ms I/O, 3 calls): create_and_process p50 "
+              f"{e2e['create_and_process']['p50_ms']:8.1f} ms   parallel executor p50 "
+              f"{e2e['parallel_executor']['p50_ms']:8.1f} ms")
+
+    print(f"\nSaved: {save_results('tools', results)}")
+
+
+if __name__ == "__main__":
+    main()
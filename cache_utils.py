@@ -0,0 +1,67 @@
+"""
+Shared Cache Helpers for the RFP Expense Agent
+==============================================
+Small helpers used by every on-disk cache in this project: the cache
+directory, content hashing and atomic JSON manifests.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# Local cache directory shared by all on-disk caches of this project
+CACHE_DIR = Path(__file__).parent / ".agent_cache"
+
+
+def file_sha256(path) -> str:
+    """Returns the SHA-256 hex digest of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_json(path) -> Dict[str, Any]:
+    """Loads a JSON manifest, returning {} when it is missing or corrupt."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_json_atomic(path, data: Dict[str, Any]) -> None:
+    """Writes a JSON manifest via a temp file so readers never see a partial write."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# path -> (mtime_ns, size, sha256)
+_HASH_MEMO: Dict[str, Tuple[int, int, str]] = {}
+
+
+def cached_file_sha256(path) -> str:
+    """
+    file_sha256 memoized on (mtime, size), so callers that need the hash on
+    every turn only re-read the file after it was modified.
+    """
+    key = str(Path(path).resolve())
+    stat = os.stat(key)
+    memo = _HASH_MEMO.get(key)
+    if memo and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+        return memo[2]
+    digest = file_sha256(key)
+    _HASH_MEMO[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def invalidate_file_hash(path) -> None:
+    """Forgets the memoized hash of path, so the next call re-reads the file."""
+    _HASH_MEMO.pop(str(Path(path).resolve()), None)
@@ -0,0 +1,606 @@
+"""
+Cleanup of Remote Objects for the RFP Expense Agent
+===================================================
+Agents, threads and uploaded files outlive the sessions that created them
+when a script crashes, is interrupted, or (for uploads) keeps them for
+reuse. Two tools keep the project tidy:
+
+GarbageCollector (python cleanup.py) finds the objects this tool created
+and deletes the stale ones:
+
+  - agents: tagged with created_by=rfp-expense-analyzer (untagged agents
+    named like one of the scripts' agents only with
+    --include-untagged-agents). Persistent agents (tagged with a
+    fingerprint) are kept, whoever created them, unless a newer agent of
+    the same name with a different fingerprint superseded them; agents
+    recorded in this machine's agent registry are always kept, and so are
+    server agents (source=server) unless --include-server-agents is given,
+    since the server may still be running
+  - threads: tagged with created_by=rfp-expense-analyzer
+  - files: data.txt, expense_policy.txt, ledger summaries and anything else
+    named in the upload manifest; for each name the newest manifest entry
+    is kept for reuse, older entries are stale and dropped from the manifest.
+    Files attached to an agent that is not deleted (its Code Interpreter
+    file IDs) are always kept
+  - only objects older than --min-age-hours count as stale, so running
+    sessions are left alone
+
+Deletes run on a thread pool in batches. A shared throttle spaces requests
+to --rate per second; an HTTP 429 pauses every worker for the Retry-After
+period and halves the rate, transient 5xx errors are retried with
+exponential backoff and jitter.
+
+SessionCleanup is used by agent.py and agent_functions.py to delete the
+session's thread(s), its agent (unless persistent) and files uploaded
+without the upload cache, on a normal exit as well as on an exception,
+Ctrl-C or SIGTERM.
+
+    python cleanup.py                        # dry run: report what would be deleted
+    python cleanup.py --delete               # delete stale objects
+    python cleanup.py --delete --kinds threads --min-age-hours 2
+"""
+
+import argparse
+import atexit
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+
+from agent_registry import FINGERPRINT_KEY, REGISTRY_PATH, RESOURCE_TAG_KEY, RESOURCE_TAG_VALUE
+from cache_utils import read_json, write_json_atomic
+from upload_cache import MANIFEST_PATH
+
+KINDS = ("agents", "threads", "files")
+
+# Names of the agents the scripts create
+AGENT_NAMES = {
+    "rfp-expense-agent",
+    "rfp-expense-functions-agent",
+    "rfp-expense-server-agent",
+    "rfp-expense-batch-agent",
+}
+
+# Uploads recognised by file name (ledger summaries end in -summary.txt)
+FILE_NAMES = {"data.txt", "expense_policy.txt"}
+LEDGER_SUMMARY_SUFFIX = "-summary.txt"
+
+# Errors worth retrying; 429 additionally slows the whole collector down
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def delete_resource(agents_client, kind: str, resource_id: str) -> bool:
+    """Deletes one object; False if it was already gone."""
+    try:
+        if kind == "agents":
+            agents_client.delete_agent(resource_id)
+        elif kind == "threads":
+            agents_client.threads.delete(resource_id)
+        elif kind == "files":
+            agents_client.files.delete(resource_id)
+        else:
+            raise ValueError(f"Unknown resource kind '{kind}'")
+    except ResourceNotFoundError:
+        return False
+    return True
+
+
+def _is_tagged(obj) -> bool:
+    return (getattr(obj, "metadata", None) or {}).get(RESOURCE_TAG_KEY) == RESOURCE_TAG_VALUE
+
+
+def _agent_file_ids(agent) -> Set[str]:
+    """Code Interpreter file IDs attached to an agent."""
+    resources = getattr(agent, "tool_resources", None)
+    if hasattr(resources, "as_dict"):
+        resources = resources.as_dict()
+    code_interpreter = (resources or {}).get("code_interpreter") or {}
+    return set(code_interpreter.get("file_ids") or [])
+
+
+def _age_hours(created_at) -> Optional[float]:
+    if created_at is None:
+        return None
+    if isinstance(created_at, (int, float)):
+        created_at = datetime.fromtimestamp(created_at, timezone.utc)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - created_at).total_seconds() / 3600
+
+
+def _retry_after(exc: HttpResponseError) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After") or headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------
+# Garbage collection of stale objects
+# ---------------------------------------------------------------
+@dataclass
+class Candidate:
+    """A remote object created by this tool, with the reason it is kept or deleted."""
+    kind: str
+    id: str
+    name: str
+    age_hours: Optional[float]
+    reason: str
+
+
+@dataclass
+class CleanupPlan:
+    stale: List[Candidate] = field(default_factory=list)
+    kept: List[Candidate] = field(default_factory=list)
+    scanned: Counter = field(default_factory=Counter)
+    # Upload manifest keys to drop once their file is deleted: file ID -> key
+    manifest_keys: Dict[str, str] = field(default_factory=dict)
+    # Files attached to agents that survive this plan (None: agents not planned)
+    agent_file_ids: Optional[Set[str]] = None
+
+
+@dataclass
+class DeleteReport:
+    deleted: Counter = field(default_factory=Counter)
+    already_gone: Counter = field(default_factory=Counter)
+    failed: List[Tuple[Candidate, str]] = field(default_factory=list)
+    throttled: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+
+class Throttle:
+    """
+    Spaces requests from all workers to `rate` per second (0 = as fast as
+    the workers go). A rate-limit response pauses every worker and halves
+    the rate (an unthrottled collector starts from half the rate it reached
+    in the last second); afterwards the rate creeps back up by
+    `recovery` per request, at most to the configured rate.
+    """
+
+    def __init__(self, rate: float, min_rate: float = 1.0, recovery: float = 0.1):
+        self.rate = rate
+        self._max_rate = rate if rate > 0 else float("inf")
+        self._recovery = recovery
+        self._min_rate = min(min_rate, rate) if rate > 0 else min_rate
+        self._next = 0.0
+        self._recent: deque = deque()
+        self._slowed_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            if self.rate > 0:
+                self._next = slot + 1.0 / self.rate
+                if slot >= self._slowed_until:
+                    self.rate = min(self.rate + self._recovery, self._max_rate)
+            else:
+                self._recent.append(slot)
+                while self._recent and slot - self._recent[0] > 1.0:
+                    self._recent.popleft()
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds: float, slow_down: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(self._next, now + seconds)
+            # Requests in flight when the limit hit get 429s too; count those once
+            if slow_down and now >= self._slowed_until:
+                current = self.rate if self.rate > 0 else len(self._recent)
+                self.rate = max(current / 2, self._min_rate)
+                self._slowed_until = now + max(seconds, 1.0)
+
+
+class GarbageCollector:
+    """Lists the objects created by this tool and deletes the stale ones."""
+
+    def __init__(self, agents_client, scope: str, min_age_hours: float = 24.0,
+                 concurrency: int = 8, rate: float = 10.0, batch_size: int = 100,
+                 max_retries: int = 5, registry_path: Path = REGISTRY_PATH,
+                 manifest_path: Path = MANIFEST_PATH, include_untagged_agents: bool = False,
+                 include_server_agents: bool = False):
+        self._client = agents_client
+        self._scope = scope
+        self.min_age_hours = min_age_hours
+        self.include_untagged_agents = include_untagged_agents
+        self.include_server_agents = include_server_agents
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.throttle = Throttle(rate)
+        self._registry_path = Path(registry_path)
+        self._manifest_path = Path(manifest_path)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, agents_client, scope: str, **overrides) -> "GarbageCollector":
+        """Configured from CLEANUP_MIN_AGE_HOURS, CLEANUP_CONCURRENCY and CLEANUP_RATE."""
+        settings = {
+            "min_age_hours": float(os.getenv("CLEANUP_MIN_AGE_HOURS", "24")),
+            "concurrency": int(os.getenv("CLEANUP_CONCURRENCY", "8")),
+            "rate": float(os.getenv("CLEANUP_RATE", "10")),
+        }
+        settings.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(agents_client, scope, **settings)
+
+    # -----------------------------------------------------------
+    # Planning
+    # -----------------------------------------------------------
+    def _classify(self, plan: CleanupPlan, candidate: Candidate, keep_reason: Optional[str]) -> bool:
+        """Files the candidate as kept or stale; returns True when stale."""
+        if keep_reason is None and candidate.age_hours is not None and candidate.age_hours < self.min_age_hours:
+            keep_reason = f"younger than {self.min_age_hours:g}h"
+        if keep_reason is not None:
+            candidate.reason = keep_reason
+            plan.kept.append(candidate)
+            return False
+        plan.stale.append(candidate)
+        return True
+
+    def _plan_agents(self, plan: CleanupPlan) -> None:
+        registry = read_json(self._registry_path).get("scopes", {}).get(self._scope, {})
+        reused_ids = {entry.get("agent_id") for entry in registry.values()}
+        agents, listed = [], []
+        for agent in self._client.list_agents():
+            plan.scanned["agents"] += 1
+            listed.append(agent)
+            untagged_match = self.include_untagged_agents and agent.name in AGENT_NAMES
+            if _is_tagged(agent) or untagged_match:
+                agents.append(agent)
+
+        # Persistent agents of any user or checkout carry a fingerprint; one
+        # is only stale once a newer agent of its name has another fingerprint
+        fingerprinted: Dict[str, List[Tuple[float, str]]] = {}
+        for agent in agents:
+            fingerprint = (agent.metadata or {}).get(FINGERPRINT_KEY)
+            if fingerprint:
+                age = _age_hours(agent.created_at)
+                fingerprinted.setdefault(agent.name or "", []).append((age if age is not None else 0.0, fingerprint))
+
+        stale_ids = set()
+        for agent in agents:
+            age = _age_hours(agent.created_at)
+            metadata = agent.metadata or {}
+            fingerprint = metadata.get(FINGERPRINT_KEY)
+            keep_reason = "persistent agent" if agent.id in reused_ids else None
+            if keep_reason is None and metadata.get("source") == "server" and not self.include_server_agents:
+                keep_reason = "server agent"
+            if keep_reason is None and fingerprint:
+                superseded = age is not None and any(
+                    other_age < age and other != fingerprint
+                    for other_age, other in fingerprinted.get(agent.name or "", [])
+                )
+                keep_reason = None if superseded else "fingerprinted persistent agent"
+            if fingerprint:
+                reason = "superseded persistent agent"
+            else:
+                reason = "tagged agent" if _is_tagged(agent) else "agent name"
+            if self._classify(plan, Candidate("agents", agent.id, agent.name or "", age, reason), keep_reason):
+                stale_ids.add(agent.id)
+
+        plan.agent_file_ids = set()
+        for agent in listed:
+            if agent.id not in stale_ids:
+                plan.agent_file_ids |= _agent_file_ids(agent)
+
+    def _plan_threads(self, plan: CleanupPlan) -> None:
+        for thread in self._client.threads.list():
+            plan.scanned["threads"] += 1
+            if not _is_tagged(thread):
+                continue
+            source = (thread.metadata or {}).get("source", "")
+            candidate = Candidate("threads", thread.id, source, _age_hours(thread.created_at), "tagged thread")
+            self._classify(plan, candidate, None)
+
+    def _plan_files(self, plan: CleanupPlan) -> None:
+        entries = read_json(self._manifest_path).get("scopes", {}).get(self._scope, {})
+        # Newest manifest entry per (purpose, name) stays for reuse
+        newest: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        by_file_id: Dict[str, str] = {}
+        for key, entry in entries.items():
+            purpose = key.split(":", 1)[0]
+            slot = (purpose, entry.get("file_name", ""))
+            by_file_id[entry["file_id"]] = key
+            if slot not in newest or entry.get("uploaded_at", "") >= newest[slot][0]:
+                newest[slot] = (entry.get("uploaded_at", ""), entry["file_id"])
+        reused_ids = {file_id for _, file_id in newest.values()}
+        agent_file_ids = plan.agent_file_ids
+        if agent_file_ids is None:
+            # Agents are not being deleted, so every agent's files stay
+            agent_file_ids = set()
+            for agent in self._client.list_agents():
+                agent_file_ids |= _agent_file_ids(agent)
+        names = FILE_NAMES | {entry.get("file_name", "") for entry in entries.values()}
+
+        listing = self._client.files.list()
+        for file in getattr(listing, "data", listing):
+            plan.scanned["files"] += 1
+            name = file.filename or ""
+            if not (name in names or name.endswith(LEDGER_SUMMARY_SUFFIX)):
+                continue
+            if file.id in reused_ids:
+                keep_reason = "cached upload"
+            elif file.id in agent_file_ids:
+                keep_reason = "attached to an agent"
+            else:
+                keep_reason = None
+                if file.id in by_file_id:
+                    plan.manifest_keys[file.id] = by_file_id[file.id]
+            reason = "superseded upload" if file.id in by_file_id else "uncached upload"
+            self._classify(plan, Candidate("files", file.id, name, _age_hours(file.created_at), reason),
+                           keep_reason)
+
+    def plan(self, kinds: Iterable[str] = KINDS) -> CleanupPlan:
+        """Lists the requested kinds and splits our objects into stale and kept."""
+        plan = CleanupPlan()
+        planners = {"agents": self._plan_agents, "threads": self._plan_threads, "files": self._plan_files}
+        # Agents first: files attached to surviving agents are kept
+        for kind in sorted(kinds, key=KINDS.index):
+            plan.scanned[kind] = 0
+            planners[kind](plan)
+        return plan
+
+    # -----------------------------------------------------------
+    # Deleting
+    # -----------------------------------------------------------
+    def _delete_one(self, candidate: Candidate, report: DeleteReport) -> None:
+        for attempt in range(self.max_retries + 1):
+            self.throttle.wait()
+            try:
+                deleted = delete_resource(self._client, candidate.kind, candidate.id)
+            except HttpResponseError as exc:
+                status = getattr(exc, "status_code", None)
+                if status not in _RETRY_STATUS or attempt == self.max_retries:
+                    with self._lock:
+                        report.failed.append((candidate, f"{type(exc).__name__}: {exc}"))
+                    return
+                delay = _retry_after(exc)
+                if delay is None:
+                    delay = min(0.5 * 2 ** attempt, 30.0) * random.uniform(0.8, 1.2)
+                with self._lock:
+                    report.retries += 1
+                    if status == 429:
+                        report.throttled += 1
+                self.throttle.pause(delay, slow_down=status == 429)
+                continue
+            except Exception as exc:
+                with self._lock:
+                    report.failed.append((candidate, f"{type(exc).__name__}: {exc}"))
+                return
+            with self._lock:
+                (report.deleted if deleted else report.already_gone)[candidate.kind] += 1
+            return
+
+    def delete(self, plan: CleanupPlan,
+               progress: Optional[Callable[[int, int, DeleteReport], None]] = None) -> DeleteReport:
+        """
+        Deletes the stale objects of a plan in concurrent batches and drops
+        the manifest entries of deleted files. progress(batch, batches,
+        report) is called after each batch.
+        """
+        report = DeleteReport()
+        start = time.perf_counter()
+        batches = [plan.stale[i:i + self.batch_size] for i in range(0, len(plan.stale), self.batch_size)]
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="cleanup") as pool:
+            for number, batch in enumerate(batches, start=1):
+                list(pool.map(lambda c: self._delete_one(c, report), batch))
+                if progress is not None:
+                    progress(number, len(batches), report)
+        report.seconds = time.perf_counter() - start
+
+        failed_ids = {candidate.id for candidate, _ in report.failed}
+        dropped = [key for file_id, key in plan.manifest_keys.items() if file_id not in failed_ids]
+        if dropped:
+            manifest = read_json(self._manifest_path)
+            entries = manifest.get("scopes", {}).get(self._scope, {})
+            for key in dropped:
+                entries.pop(key, None)
+            write_json_atomic(self._manifest_path, manifest)
+        return report
+
+
+# ---------------------------------------------------------------
+# Per-session cleanup for the interactive scripts
+# ---------------------------------------------------------------
+class SessionCleanup:
+    """
+    Deletes the objects one chat session created. run() is called by the
+    script's normal cleanup; if the script never gets there (exception,
+    Ctrl-C during a run, SIGTERM) the context manager exit or the atexit
+    hook runs it instead.
+    """
+
+    def __init__(self, agents_client, concurrency: int = 4):
+        self._client = agents_client
+        self._concurrency = concurrency
+        self._items: List[Tuple[str, str]] = []
+        self._sources: List[Tuple[str, Callable[[], Iterable[str]]]] = []
+        self._done = False
+        # Thread pools are shut down before atexit hooks run: delete one by one there
+        atexit.register(self._on_exit, False)
+        # SIGTERM normally skips atexit; turn it into a regular exit
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    def add(self, kind: str, resource_id: str) -> None:
+        self._items.append((kind, resource_id))
+
+    def add_source(self, kind: str, ids: Callable[[], Iterable[str]]) -> None:
+        """Registers objects known only at exit time (e.g. rolled-over threads)."""
+        self._sources.append((kind, ids))
+
+    def run(self, parallel: bool = True) -> List[str]:
+        """Deletes everything registered (once) and returns a line per kind."""
+        if self._done:
+            return []
+        self._done = True
+        items = list(dict.fromkeys(self._items + [(kind, resource_id)
+                                                  for kind, ids in self._sources for resource_id in ids()]))
+        if not items:
+            return []
+
+        deleted: Counter = Counter()
+        errors = []
+        lock = threading.Lock()
+
+        def delete(item):
+            kind, resource_id = item
+            try:
+                if delete_resource(self._client, kind, resource_id):
+                    with lock:
+                        deleted[kind] += 1
+            except Exception as exc:
+                with lock:
+                    errors.append(f"Could not delete {kind[:-1]} {resource_id}: {exc}")
+
+        if parallel:
+            with ThreadPoolExecutor(min(self._concurrency, len(items))) as pool:
+                list(pool.map(delete, items))
+        else:
+            for item in items:
+                delete(item)
+        lines = [f"{kind.capitalize()} deleted: {count}" for kind, count in deleted.items()]
+        return lines + errors
+
+    def _on_exit(self, parallel: bool = True) -> None:
+        if not self._done:
+            print("\n  Cleaning up session resources...")
+            for line in self.run(parallel):
+                print(f"  {line}")
+
+    def __enter__(self) -> "SessionCleanup":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._on_exit()
+
+
+# ---------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------
+def _connect(agents_backend: str, project_endpoint: str):
+    if agents_backend == "fake":
+        from fake_agents import FakeAgentsClient
+        return FakeAgentsClient.from_env()
+
+    from azure.identity import DefaultAzureCredential
+    from azure.ai.agents import AgentsClient
+
+    return AgentsClient(
+        endpoint=project_endpoint,
+        credential=DefaultAzureCredential(
+            exclude_environment_credential=True,
+            exclude_managed_identity_credential=True,
+        ),
+    )
+
+
+def print_plan(plan: CleanupPlan, show: int) -> None:
+    print(f"  {'Kind':8s} {'listed':>8s} {'ours':>6s} {'stale':>6s} {'kept':>6s}")
+    for kind in KINDS:
+        if kind not in plan.scanned:
+            continue
+        stale = sum(1 for c in plan.stale if c.kind == kind)
+        kept = sum(1 for c in plan.kept if c.kind == kind)
+        print(f"  {kind:8s} {plan.scanned[kind]:8d} {stale + kept:6d} {stale:6d} {kept:6d}")
+
+    kept_reasons = Counter(f"{c.kind}: {c.reason}" for c in plan.kept)
+    if kept_reasons:
+        print("\n  Kept:")
+        for reason, count in sorted(kept_reasons.items()):
+            print(f"    {count:6d}  {reason}")
+    if plan.stale and show:
+        print(f"\n  Stale ({min(show, len(plan.stale))} of {len(plan.stale)}):")
+        for c in plan.stale[:show]:
+            age = f"{c.age_hours:.1f}h" if c.age_hours is not None else "?"
+            print(f"    {c.kind[:-1]:6s} {c.id:32s} {c.name[:28]:28s} {age:>8s}  {c.reason}")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Find and delete stale agents, threads and files.")
+    parser.add_argument("--delete", action="store_true", help="delete the stale objects (default: dry run)")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="comma-separated subset of agents,threads,files")
+    parser.add_argument("--min-age-hours", type=float, help="only older objects are stale (CLEANUP_MIN_AGE_HOURS)")
+    parser.add_argument("--concurrency", type=int, help="parallel delete requests (CLEANUP_CONCURRENCY)")
+    parser.add_argument("--rate", type=float, help="delete requests per second, 0 = unthrottled (CLEANUP_RATE)")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--include-untagged-agents", action="store_true",
+                        help="also delete untagged agents named like the scripts' agents (may be other people's)")
+    parser.add_argument("--include-server-agents", action="store_true",
+                        help="also delete server agents (source=server); only when no server is running")
+    parser.add_argument("--show", type=int, default=20, help="stale objects to list in the report")
+    args = parser.parse_args()
+
+    agents_backend = os.getenv("AGENTS_BACKEND", "azure").lower()
+    project_endpoint = os.getenv("PROJECT_ENDPOINT")
+    if agents_backend == "fake":
+        from fake_agents import FAKE_ENDPOINT
+        project_endpoint = FAKE_ENDPOINT
+    if not project_endpoint or project_endpoint == "your_project_endpoint":
+        print("ERROR: Please set PROJECT_ENDPOINT in the .env file.")
+        raise SystemExit(1)
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(sorted(unknown))}")
+
+    client = _connect(agents_backend, project_endpoint)
+    collector = GarbageCollector.from_env(
+        client, project_endpoint, min_age_hours=args.min_age_hours, concurrency=args.concurrency,
+        rate=args.rate, batch_size=args.batch_size, include_untagged_agents=args.include_untagged_agents,
+        include_server_agents=args.include_server_agents,
+    )
+
+    print("\n" + "=" * 60)
+    print(f"RFP EXPENSE AGENT - Cleanup ({'delete' if args.delete else 'dry run'})")
+    print("=" * 60)
+    print(f"Stale after {collector.min_age_hours:g}h; listing {', '.join(kinds)}...\n")
+    start = time.perf_counter()
+    plan = collector.plan(kinds)
+    print_plan(plan, args.show)
+    print(f"\n  Listed in {time.perf_counter() - start:.1f}s")
+
+    if not args.delete:
+        print(f"\n  Dry run: {len(plan.stale)} object(s) would be deleted. Re-run with --delete.\n")
+        return
+    if not plan.stale:
+        print("\n  Nothing to delete.\n")
+        return
+
+    print(f"\n  Deleting {len(plan.stale)} object(s) ({collector.concurrency} workers, "
+          f"{collector.throttle.rate:g}/s)...")
+
+    def progress(batch, batches, report):
+        done = sum(report.deleted.values()) + sum(report.already_gone.values())
+        print(f"    batch {batch}/{batches}: {done} deleted, {len(report.failed)} failed, "
+              f"{report.throttled} throttled")
+
+    report = collector.delete(plan, progress)
+    for kind in KINDS:
+        if report.deleted[kind] or report.already_gone[kind]:
+            print(f"  {kind:8s} {report.deleted[kind]} deleted, {report.already_gone[kind]} already gone")
+    for candidate, error in report.failed[:10]:
+        print(f"  FAILED {candidate.kind[:-1]} {candidate.id}: {error}")
+    print(f"\n  {sum(report.deleted.values())} deleted in {report.seconds:.1f}s, "
+          f"{report.retries} retried ({report.throttled} rate limited), {len(report.failed)} failed\n")
+
+
+if __name__ == "__main__":
+    main()
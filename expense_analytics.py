@@ -0,0 +1,280 @@
+"""
+Local Expense Analytics for the RFP Expense Agent
+=================================================
+Parses the pipe-delimited expense table in data.txt once into a compact
+columnar structure (array-backed columns) and answers the arithmetic
+questions that previously needed a Code Interpreter run: totals, hourly
+rates, rate statistics and policy rate-cap comparisons (caps come from
+the compiled policy index in policy_index.py).
+
+Parsed tables are cached by file content hash, so repeated tool calls only
+re-parse the file after it actually changes.
+"""
+
+import math
+import os
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from cache_utils import file_sha256
+
+DATA_FILE_PATH = Path(__file__).parent / "data.txt"
+
+
+# ---------------------------------------------------------------
+# Columnar expense table
+# ---------------------------------------------------------------
+@dataclass
+class ExpenseTable:
+    """
+    One row per line item. Numeric columns are array('d'); hours is NaN
+    for non-personnel rows (Travel, Software Licenses, ...).
+    """
+    categories: List[str] = field(default_factory=list)
+    consultants: List[str] = field(default_factory=list)
+    amounts: array = field(default_factory=lambda: array("d"))
+    hours: array = field(default_factory=lambda: array("d"))
+    content_hash: str = ""
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def personnel_rows(self) -> List[int]:
+        """Indexes of rows billed by the hour."""
+        return [i for i, h in enumerate(self.hours) if not math.isnan(h)]
+
+    def hourly_rates(self) -> array:
+        """Amount / hours per row (NaN for non-personnel rows)."""
+        return array("d", (
+            a / h if not math.isnan(h) and h > 0 else math.nan
+            for a, h in zip(self.amounts, self.hours)
+        ))
+
+
+def _parse_number(text: str) -> float:
+    text = text.strip().replace(",", "").replace("$", "")
+    if not text or text == "-":
+        return math.nan
+    return float(text)
+
+
+def parse_expense_table(text: str) -> ExpenseTable:
+    """
+    Parses the 'Category | Amount (USD) | Hours | Consultant' table.
+    Header, separator and non-table lines are ignored.
+    """
+    table = ExpenseTable()
+    for line in text.splitlines():
+        if line.count("|") != 3:
+            continue
+        category, amount, hours, consultant = (c.strip() for c in line.split("|"))
+        if category.lower() == "category":
+            continue
+        try:
+            amount_value = _parse_number(amount)
+            hours_value = _parse_number(hours)
+        except ValueError:
+            continue
+        table.categories.append(category)
+        table.consultants.append(consultant)
+        table.amounts.append(amount_value)
+        table.hours.append(hours_value)
+    return table
+
+
+# Cache: path -> (mtime_ns, size, content hash, table)
+_TABLE_CACHE: Dict[str, Tuple[int, int, str, ExpenseTable]] = {}
+
+
+def load_expense_table(path=DATA_FILE_PATH) -> ExpenseTable:
+    """
+    Returns the parsed table for path. The file is only hashed when its
+    mtime/size changed and only re-parsed when its content hash changed.
+    """
+    key = str(Path(path).resolve())
+    stat = os.stat(key)
+    cached = _TABLE_CACHE.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[3]
+
+    content_hash = file_sha256(key)
+    if cached and cached[2] == content_hash:
+        table = cached[3]
+    else:
+        with open(key, "r") as f:
+            table = parse_expense_table(f.read())
+        table.content_hash = content_hash
+    _TABLE_CACHE[key] = (stat.st_mtime_ns, stat.st_size, content_hash, table)
+    return table
+
+
+def invalidate_expense_table(path=DATA_FILE_PATH) -> None:
+    """Drops the cached table for path; the next load re-parses the file."""
+    _TABLE_CACHE.pop(str(Path(path).resolve()), None)
+
+
+# ---------------------------------------------------------------
+# Analytics
+# ---------------------------------------------------------------
+def expense_totals(table: ExpenseTable) -> Dict[str, float]:
+    """Personnel, other and grand totals, total hours and average rate."""
+    personnel = table.personnel_rows()
+    personnel_cost = sum(table.amounts[i] for i in personnel)
+    total_hours = sum(table.hours[i] for i in personnel)
+    grand_total = sum(table.amounts)
+
+    by_category: Dict[str, float] = {}
+    for category, amount in zip(table.categories, table.amounts):
+        by_category[category] = by_category.get(category, 0.0) + amount
+    highest = max(by_category, key=by_category.get) if by_category else ""
+
+    return {
+        "total_personnel_cost": personnel_cost,
+        "total_other_costs": grand_total - personnel_cost,
+        "grand_total": grand_total,
+        "total_hours": total_hours,
+        "average_hourly_rate": round(personnel_cost / total_hours, 2) if total_hours else 0.0,
+        "highest_cost_category": highest,
+        "by_category": by_category,
+    }
+
+
+def consultant_rates(table: ExpenseTable) -> List[Dict[str, object]]:
+    """Hourly rate per personnel row, highest first."""
+    rates = table.hourly_rates()
+    rows = [
+        {
+            "consultant": table.consultants[i],
+            "category": table.categories[i],
+            "amount": table.amounts[i],
+            "hours": table.hours[i],
+            "hourly_rate": round(rates[i], 2),
+        }
+        for i in table.personnel_rows()
+    ]
+    rows.sort(key=lambda r: r["hourly_rate"], reverse=True)
+    return rows
+
+
+def rate_statistics(table: ExpenseTable) -> Dict[str, float]:
+    """Mean, population/sample standard deviation, min and max hourly rate."""
+    rates = [r for r in table.hourly_rates() if not math.isnan(r)]
+    n = len(rates)
+    if n == 0:
+        return {"count": 0}
+    mean = sum(rates) / n
+    squared = sum((r - mean) ** 2 for r in rates)
+    return {
+        "count": n,
+        "mean": round(mean, 2),
+        "std_population": round(math.sqrt(squared / n), 2),
+        "std_sample": round(math.sqrt(squared / (n - 1)), 2) if n > 1 else 0.0,
+        "min": round(min(rates), 2),
+        "max": round(max(rates), 2),
+    }
+
+
+def compare_to_caps(table: ExpenseTable, policy) -> List[Dict[str, object]]:
+    """Each personnel row's hourly rate against its PolicyIndex rate cap."""
+    rates = table.hourly_rates()
+    results = []
+    for i in table.personnel_rows():
+        role = policy.policy_role(table.categories[i])
+        cap = policy.rate_caps[role] if role else None
+        rate = rates[i]
+        exceeds = cap is not None and rate > cap
+        results.append({
+            "consultant": table.consultants[i],
+            "category": table.categories[i],
+            "hourly_rate": round(rate, 2),
+            "policy_role": role,
+            "rate_cap": cap,
+            "exceeds_cap": exceeds,
+            "excess_per_hour": round(rate - cap, 2) if exceeds else 0.0,
+        })
+    return results
+
+
+# ---------------------------------------------------------------
+# Overrun sweep
+# ---------------------------------------------------------------
+def category_actuals(table: ExpenseTable) -> Dict[str, float]:
+    """Actual spend per category in a single pass over the amount column."""
+    actuals: Dict[str, float] = {}
+    for category, amount in zip(table.categories, table.amounts):
+        actuals[category] = actuals.get(category, 0.0) + amount
+    return actuals
+
+
+def _overrun(category: str, actual: float, limit: float, source: str, rule: str) -> Dict[str, object]:
+    overrun = actual - limit
+    return {
+        "category": category,
+        "source": source,
+        "actual_amount": actual,
+        "budgeted_amount": limit,
+        "overrun": round(overrun, 2),
+        "overrun_pct": round(overrun / limit * 100, 1) if limit > 0 else 0.0,
+        "rule": rule,
+    }
+
+
+def sweep_overruns(table: ExpenseTable, budget: Dict[str, float], policy) -> Dict[str, List[Dict[str, object]]]:
+    """
+    Checks every category in the table against the budget and the policy
+    limits in one pass. Returns budget overruns, policy limit overruns,
+    approvals the policy requires, and budget lines with no actual spend.
+
+    Policy limits applied: travel maximum per project, training budget per
+    consultant (times the number of consultants in the table), and the
+    equipment / license amounts that need approval.
+    """
+    actuals = category_actuals(table)
+    budget_by_key = {k.strip().lower(): (k, float(v)) for k, v in budget.items()}
+    consultants = len({table.consultants[i] for i in table.personnel_rows()}) or 1
+
+    overruns: List[Dict[str, object]] = []
+    approvals: List[Dict[str, object]] = []
+    for category, actual in actuals.items():
+        budgeted = budget_by_key.pop(category.lower(), None)
+        if budgeted is not None and actual > budgeted[1]:
+            overruns.append(_overrun(category, actual, budgeted[1], "budget",
+                                     f"Budgeted ${budgeted[1]:,.2f} for {budgeted[0]}"))
+
+        words = set(category.lower().split())
+        travel_max = policy.travel.get("max_per_project")
+        if "travel" in words and travel_max is not None and actual > travel_max:
+            overruns.append(_overrun(category, actual, travel_max, "policy",
+                                     f"Maximum travel budget per project: ${travel_max:,.2f}"))
+        if "training" in words and policy.training_max_per_consultant is not None:
+            limit = policy.training_max_per_consultant * consultants
+            if actual > limit:
+                overruns.append(_overrun(
+                    category, actual, limit, "policy",
+                    f"Maximum training budget ${policy.training_max_per_consultant:,.2f} "
+                    f"per consultant x {consultants} consultant(s)",
+                ))
+        if "equipment" in words and policy.equipment_approval_over is not None \
+                and actual > policy.equipment_approval_over:
+            approvals.append({
+                "category": category,
+                "actual_amount": actual,
+                "approval": f"{policy.equipment_approver} approval "
+                            f"(equipment over ${policy.equipment_approval_over:,.2f})",
+            })
+        if ({"license", "licenses"} & words) and policy.license_approval_over is not None \
+                and actual > policy.license_approval_over:
+            approvals.append({
+                "category": category,
+                "actual_amount": actual,
+                "approval": f"{policy.license_approver} approval "
+                            f"(licenses over ${policy.license_approval_over:,.2f})",
+            })
+
+    return {
+        "overruns": overruns,
+        "approvals_required": approvals,
+        "budget_without_actuals": [name for name, _ in budget_by_key.values()],
+    }
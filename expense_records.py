@@ -0,0 +1,159 @@
+"""
+Expense Record Preparation for the RFP Expense Agent
+====================================================
+Validation and derived-field computation for expense reports and budget
+overrun alerts, shared by the single-item and bulk tools in
+user_functions.py.
+
+Records are validated all at once, overrun amounts and percentages are
+computed column-wise over array('d') columns, and the valid rows come back
+ready for a single ReportStore write.
+"""
+
+import math
+import re
+import uuid
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+REPORT_FIELDS = ("email_address", "project_name", "description", "total_amount")
+ALERT_FIELDS = ("category", "budgeted_amount", "actual_amount", "reason")
+
+
+# 64 random bits: bulk submissions and overrun sweeps write thousands of
+# rows per batch into a TEXT PRIMARY KEY column, so IDs must not collide
+ID_HEX_DIGITS = 16
+
+
+def new_report_id() -> str:
+    return uuid.uuid4().hex[:ID_HEX_DIGITS].upper()
+
+
+def new_alert_id() -> str:
+    return uuid.uuid4().hex[:ID_HEX_DIGITS].upper()
+
+
+def _as_amount(value: Any) -> float:
+    if isinstance(value, str):
+        value = value.replace(",", "").replace("$", "").strip()
+    amount = float(value)
+    if math.isnan(amount) or math.isinf(amount):
+        raise ValueError("amount must be a finite number")
+    return amount
+
+
+def _missing(item: Dict[str, Any], fields) -> List[str]:
+    return [f for f in fields if item.get(f) in (None, "")]
+
+
+# ---------------------------------------------------------------
+# Expense reports
+# ---------------------------------------------------------------
+def prepare_reports(items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validates report items and returns (rows to store, per-item status).
+    Invalid items get status "invalid" with the reason and are not stored.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows: List[Dict[str, Any]] = []
+    statuses: List[Dict[str, Any]] = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            statuses.append({"index": i, "status": "invalid", "error": "item must be an object"})
+            continue
+        missing = _missing(item, REPORT_FIELDS)
+        if missing:
+            statuses.append({"index": i, "status": "invalid", "error": f"missing {', '.join(missing)}"})
+            continue
+        if not _EMAIL.match(str(item["email_address"])):
+            statuses.append({"index": i, "status": "invalid", "error": "invalid email_address"})
+            continue
+        try:
+            amount = _as_amount(item["total_amount"])
+        except (TypeError, ValueError):
+            statuses.append({"index": i, "status": "invalid", "error": "total_amount must be a number"})
+            continue
+        if amount <= 0:
+            statuses.append({"index": i, "status": "invalid", "error": "total_amount must be positive"})
+            continue
+
+        report_id = new_report_id()
+        rows.append({
+            "report_id": report_id,
+            "submitted_at": timestamp,
+            "submitter": str(item["email_address"]),
+            "project": str(item["project_name"]),
+            "description": str(item["description"]),
+            "amount": amount,
+        })
+        statuses.append({"index": i, "id": report_id, "status": "submitted", "amount": amount})
+    return rows, statuses
+
+
+# ---------------------------------------------------------------
+# Budget overrun alerts
+# ---------------------------------------------------------------
+def compute_overruns(budgeted: array, actual: array) -> Tuple[array, array]:
+    """Column-wise overrun amount and percentage (0% when nothing was budgeted)."""
+    overrun = array("d", (a - b for a, b in zip(actual, budgeted)))
+    pct = array("d", ((o / b) * 100 if b > 0 else 0.0 for o, b in zip(overrun, budgeted)))
+    return overrun, pct
+
+
+def prepare_alerts(items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validates overrun items and returns (rows to store, per-item status).
+    Amounts of all valid items are computed in one column-wise pass.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    statuses: List[Dict[str, Any]] = [{} for _ in items]
+    valid: List[int] = []
+    budgeted = array("d")
+    actual = array("d")
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            statuses[i] = {"index": i, "status": "invalid", "error": "item must be an object"}
+            continue
+        missing = _missing(item, ALERT_FIELDS)
+        if missing:
+            statuses[i] = {"index": i, "status": "invalid", "error": f"missing {', '.join(missing)}"}
+            continue
+        try:
+            b = _as_amount(item["budgeted_amount"])
+            a = _as_amount(item["actual_amount"])
+        except (TypeError, ValueError):
+            statuses[i] = {"index": i, "status": "invalid", "error": "amounts must be numbers"}
+            continue
+        if b < 0 or a < 0:
+            statuses[i] = {"index": i, "status": "invalid", "error": "amounts must not be negative"}
+            continue
+        valid.append(i)
+        budgeted.append(b)
+        actual.append(a)
+
+    overrun, pct = compute_overruns(budgeted, actual)
+
+    rows: List[Dict[str, Any]] = []
+    for k, i in enumerate(valid):
+        alert_id = new_alert_id()
+        rows.append({
+            "alert_id": alert_id,
+            "created_at": timestamp,
+            "category": str(items[i]["category"]),
+            "budgeted_amount": budgeted[k],
+            "actual_amount": actual[k],
+            "overrun": overrun[k],
+            "overrun_pct": pct[k],
+            "reason": str(items[i]["reason"]),
+        })
+        statuses[i] = {
+            "index": i,
+            "id": alert_id,
+            "status": "flagged",
+            "overrun": round(overrun[k], 2),
+            "overrun_pct": round(pct[k], 1),
+        }
+    return rows, statuses
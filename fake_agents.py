@@ -0,0 +1,719 @@
+"""
+Local Stand-in for the Azure AI Agents Service
+==============================================
+An in-process fake of the AgentsClient surface used by agent.py,
+agent_functions.py and the helper modules, for benchmarking and local
+testing without a Foundry endpoint (AGENTS_BACKEND=fake).
+
+  - files.upload_and_poll / get / list / delete, create_agent /
+    update_agent / get_agent / list_agents / delete_agent, threads.create /
+    list / delete, messages.create / list /
+    get_last_message_text_by_role, runs.create_and_process / stream,
+    and the manual run loop runs.create / get / submit_tool_outputs / cancel
+  - Configurable latency per operation (FAKE_AGENTS_LATENCY as JSON,
+    scaled by FAKE_AGENTS_LATENCY_SCALE)
+  - Optional request rate limit (FAKE_AGENTS_RATE_LIMIT, requests per
+    second): requests above it fail with HTTP 429 and a Retry-After header
+  - Scripted tool calls: prompts matching a pattern make the fake "model"
+    call the given user_functions (FAKE_AGENTS_SCRIPT, a JSON file)
+  - Request counts and tool execution time for the benchmark suite
+
+AsyncFakeAgentsClient offers the same service on the async
+(azure.ai.agents.aio) surface for the HTTP server.
+
+Only the service is faked; tool definitions (ToolSet, FunctionTool, ...)
+still come from the real azure-ai-agents package.
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+
+# Endpoint the scripts report (and scope their local caches to) in fake mode
+FAKE_ENDPOINT = "fake://local-agents"
+
+# Seconds per operation before FAKE_AGENTS_LATENCY_SCALE is applied
+DEFAULT_LATENCY = {
+    "files.upload_and_poll": 0.8,
+    "files.get": 0.05,
+    "files.list": 0.2,
+    "files.delete": 0.1,
+    "create_agent": 0.5,
+    "update_agent": 0.3,
+    "get_agent": 0.05,
+    "list_agents": 0.1,
+    "delete_agent": 0.1,
+    "threads.create": 0.15,
+    "threads.list": 0.1,
+    "threads.delete": 0.1,
+    "messages.create": 0.1,
+    "messages.list": 0.1,
+    "messages.get_last_message_text_by_role": 0.1,
+    "run_steps.list": 0.1,
+    "run.queue": 0.3,
+    "run.model": 1.0,
+    "run.tool_round_trip": 0.4,
+}
+
+# Prompt pattern -> tool calls the fake model makes for it
+DEFAULT_SCRIPT = [
+    {"pattern": r"highest cost|grand total|total cost", "tools": [{"name": "get_expense_totals", "arguments": {}}]},
+    {"pattern": r"standard deviation|average .*rate|statistic", "tools": [{"name": "get_rate_statistics", "arguments": {}}]},
+    {"pattern": r"rate caps?|exceed", "tools": [{"name": "compare_rates_to_policy_caps", "arguments": {}}]},
+    {"pattern": r"approv\w* .*\$(?P<amount>[\d,]+)", "tools": [{"name": "required_approval", "arguments": {"amount": "{amount}"}}]},
+    {"pattern": r"hourly rate|consultant rates?", "tools": [{"name": "get_consultant_rates", "arguments": {}}]},
+    {"pattern": r"full review", "tools": [
+        {"name": "get_expense_totals", "arguments": {}},
+        {"name": "get_rate_statistics", "arguments": {}},
+        {"name": "compare_rates_to_policy_caps", "arguments": {}},
+    ]},
+]
+
+_ids = itertools.count(1)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_fake{next(_ids):06d}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _json_value(text: str) -> Any:
+    """Decodes a templated argument the way tool-call JSON would ("75000" -> 75000)."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _functions_from(tools) -> Dict[str, Callable[..., Any]]:
+    """Extracts name -> callable from a ToolSet, FunctionTool or set of functions."""
+    if isinstance(tools, (set, list, tuple)):
+        return {f.__name__: f for f in tools if callable(f)}
+    if hasattr(tools, "_functions"):
+        return dict(tools._functions)
+    functions: Dict[str, Callable[..., Any]] = {}
+    for tool in getattr(tools, "_tools", []):
+        functions.update(_functions_from(tool))
+    return functions
+
+
+class _Operations(SimpleNamespace):
+    """Namespace for files / threads / messages / runs sub-operations."""
+
+
+class FakeAgentsClient:
+    """In-memory AgentsClient stand-in with latency injection and counters."""
+
+    # The most recently constructed client, so benchmarks can read its counters
+    last_instance: Optional["FakeAgentsClient"] = None
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None, latency_scale: float = 1.0,
+                 script: Optional[List[Dict[str, Any]]] = None, rate_limit: float = 0.0):
+        self.latency = dict(DEFAULT_LATENCY)
+        self.latency.update(latency or {})
+        self.latency_scale = latency_scale
+        self.rate_limit = rate_limit
+        self._recent_requests: deque = deque()
+        self.script = [(re.compile(rule["pattern"], re.I), rule["tools"]) for rule in (script or DEFAULT_SCRIPT)]
+
+        self.request_counts: Counter = Counter()
+        self.tool_calls: Counter = Counter()
+        self.tool_seconds = 0.0
+        self._lock = threading.Lock()
+
+        self._files: Dict[str, Any] = {}
+        self._agents: Dict[str, Any] = {}
+        self._threads: Dict[str, Any] = {}
+        self._messages: Dict[str, List[Any]] = {}
+        self._runs: Dict[str, Any] = {}
+        self._functions: Dict[str, Callable[..., Any]] = {}
+
+        self.files = _Operations(
+            upload_and_poll=self._upload_and_poll,
+            get=self._get_file,
+            list=self._list_files,
+            delete=self._delete_file,
+        )
+        self.threads = _Operations(create=self._create_thread, list=self._list_threads,
+                                   delete=self._delete_thread)
+        self.messages = _Operations(
+            create=self._create_message,
+            list=self._list_messages,
+            get_last_message_text_by_role=self._get_last_message_text_by_role,
+        )
+        self.runs = _Operations(
+            create_and_process=self._create_and_process,
+            stream=self._stream,
+            create=self._create_run,
+            get=self._get_run,
+            submit_tool_outputs=self._submit_tool_outputs,
+            cancel=self._cancel_run,
+        )
+        self.run_steps = _Operations(list=self._list_run_steps)
+        FakeAgentsClient.last_instance = self
+
+    @classmethod
+    def from_env(cls) -> "FakeAgentsClient":
+        """
+        Builds a client from FAKE_AGENTS_LATENCY, FAKE_AGENTS_LATENCY_SCALE,
+        FAKE_AGENTS_SCRIPT and FAKE_AGENTS_RATE_LIMIT.
+        """
+        latency = json.loads(os.getenv("FAKE_AGENTS_LATENCY") or "{}")
+        scale = float(os.getenv("FAKE_AGENTS_LATENCY_SCALE", "1.0"))
+        script = None
+        script_path = os.getenv("FAKE_AGENTS_SCRIPT")
+        if script_path:
+            with open(script_path, "r") as f:
+                script = json.load(f)
+        return cls(latency=latency, latency_scale=scale, script=script,
+                   rate_limit=float(os.getenv("FAKE_AGENTS_RATE_LIMIT", "0")))
+
+    # -----------------------------------------------------------
+    # Plumbing
+    # -----------------------------------------------------------
+    def _call(self, operation: str) -> None:
+        with self._lock:
+            self.request_counts[operation] += 1
+            if self.rate_limit:
+                self._check_rate_limit(operation)
+        self._sleep(operation)
+
+    def _check_rate_limit(self, operation: str) -> None:
+        """Sliding one-second window; the caller holds self._lock."""
+        now = time.monotonic()
+        while self._recent_requests and now - self._recent_requests[0] >= 1.0:
+            self._recent_requests.popleft()
+        if len(self._recent_requests) >= self.rate_limit:
+            self.request_counts["throttled"] += 1
+            retry_after = 1.0 - (now - self._recent_requests[0])
+            response = SimpleNamespace(status_code=429, reason="Too Many Requests",
+                                       headers={"Retry-After": f"{retry_after:.3f}"}, text=lambda: "")
+            raise HttpResponseError(message=f"Rate limit exceeded ({operation})", response=response)
+        self._recent_requests.append(now)
+
+    def _latency(self, operation: str) -> float:
+        return self.latency.get(operation, 0.0) * self.latency_scale
+
+    def _sleep(self, operation: str) -> None:
+        delay = self._latency(operation)
+        if delay > 0:
+            time.sleep(delay)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def enable_auto_function_calls(self, tools) -> None:
+        self._functions = _functions_from(tools)
+
+    # -----------------------------------------------------------
+    # Files
+    # -----------------------------------------------------------
+    def _upload_and_poll(self, file_path: str, purpose=None, **kwargs):
+        self._call("files.upload_and_poll")
+        file = SimpleNamespace(
+            id=_new_id("assistant"), filename=os.path.basename(file_path), purpose=purpose,
+            bytes=os.path.getsize(file_path), created_at=_now(), status="processed",
+        )
+        self._files[file.id] = file
+        return file
+
+    def _get_file(self, file_id: str, **kwargs):
+        self._call("files.get")
+        if file_id not in self._files:
+            raise ResourceNotFoundError(f"No file with id '{file_id}'")
+        return self._files[file_id]
+
+    def _list_files(self, purpose=None, **kwargs):
+        self._call("files.list")
+        files = [f for f in self._files.values() if purpose is None or f.purpose == purpose]
+        return SimpleNamespace(data=files)
+
+    def _delete_file(self, file_id: str, **kwargs):
+        self._call("files.delete")
+        if self._files.pop(file_id, None) is None:
+            raise ResourceNotFoundError(f"No file with id '{file_id}'")
+        return SimpleNamespace(id=file_id, deleted=True)
+
+    # -----------------------------------------------------------
+    # Agents
+    # -----------------------------------------------------------
+    def create_agent(self, model: str, name: str = None, instructions: str = None,
+                     toolset=None, tools=None, tool_resources=None, metadata=None, **kwargs):
+        self._call("create_agent")
+        if tool_resources is None and toolset is not None:
+            # The service stores the toolset's resources (Code Interpreter files) on the agent
+            tool_resources = toolset.resources
+        agent = SimpleNamespace(
+            id=_new_id("asst"), name=name, model=model, instructions=instructions,
+            toolset=toolset, tool_resources=tool_resources, metadata=dict(metadata or {}), created_at=_now(),
+        )
+        self._agents[agent.id] = agent
+        return agent
+
+    def update_agent(self, agent_id: str, instructions: str = None, toolset=None, tool_resources=None,
+                     metadata=None, **kwargs):
+        self._call("update_agent")
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            raise ResourceNotFoundError(f"No assistant found with id '{agent_id}'")
+        for name, value in (("instructions", instructions), ("toolset", toolset),
+                            ("tool_resources", tool_resources), ("metadata", metadata)):
+            if value is not None:
+                setattr(agent, name, value)
+        return agent
+
+    def get_agent(self, agent_id: str, **kwargs):
+        self._call("get_agent")
+        if agent_id not in self._agents:
+            raise ResourceNotFoundError(f"No assistant found with id '{agent_id}'")
+        return self._agents[agent_id]
+
+    def list_agents(self, **kwargs):
+        self._call("list_agents")
+        return list(self._agents.values())
+
+    def delete_agent(self, agent_id: str, **kwargs):
+        self._call("delete_agent")
+        if self._agents.pop(agent_id, None) is None:
+            raise ResourceNotFoundError(f"No assistant found with id '{agent_id}'")
+        return SimpleNamespace(id=agent_id, deleted=True)
+
+    # -----------------------------------------------------------
+    # Threads and messages
+    # -----------------------------------------------------------
+    def _create_thread(self, metadata=None, **kwargs):
+        self._call("threads.create")
+        thread = SimpleNamespace(id=_new_id("thread"), metadata=dict(metadata or {}), created_at=_now())
+        self._threads[thread.id] = thread
+        self._messages[thread.id] = []
+        return thread
+
+    def _list_threads(self, limit: int = 100, **kwargs):
+        return _FakePaged(self, "threads.list", list(self._threads.values()), page_size=limit)
+
+    def _delete_thread(self, thread_id: str, **kwargs):
+        self._call("threads.delete")
+        if self._threads.pop(thread_id, None) is None:
+            raise ResourceNotFoundError(f"No thread found with id '{thread_id}'")
+        self._messages.pop(thread_id, None)
+        return SimpleNamespace(id=thread_id, deleted=True)
+
+    def _thread_messages(self, thread_id: str) -> List[Any]:
+        if thread_id not in self._messages:
+            raise ResourceNotFoundError(f"No thread found with id '{thread_id}'")
+        return self._messages[thread_id]
+
+    def _append_message(self, thread_id: str, role: str, content: str):
+        message = SimpleNamespace(
+            id=_new_id("msg"), thread_id=thread_id, role=role, created_at=_now(),
+            text_messages=[SimpleNamespace(text=SimpleNamespace(value=content))],
+        )
+        self._thread_messages(thread_id).append(message)
+        return message
+
+    def _create_message(self, thread_id: str, role: str, content: str, **kwargs):
+        self._call("messages.create")
+        return self._append_message(thread_id, str(getattr(role, "value", role)), content)
+
+    def _list_messages(self, thread_id: str, order=None, limit: Optional[int] = None, **kwargs):
+        messages = list(self._thread_messages(thread_id))
+        if str(getattr(order, "value", order)).lower().startswith("desc"):
+            messages.reverse()
+        return _FakePaged(self, "messages.list", messages, limit or 20)
+
+    def _get_last_message_text_by_role(self, thread_id: str, role, **kwargs):
+        self._call("messages.get_last_message_text_by_role")
+        wanted = str(getattr(role, "value", role)).lower()
+        for message in reversed(self._thread_messages(thread_id)):
+            if message.role == wanted:
+                return message.text_messages[-1]
+        return None
+
+    # -----------------------------------------------------------
+    # Runs
+    # -----------------------------------------------------------
+    def _scripted_calls(self, prompt: str) -> List[Dict[str, Any]]:
+        for pattern, tools in self.script:
+            match = pattern.search(prompt)
+            if match:
+                groups = {k: (v or "").replace(",", "") for k, v in match.groupdict().items()}
+                return [
+                    {"name": t["name"], "arguments": {
+                        k: _json_value(v.format(**groups)) if isinstance(v, str) else v
+                        for k, v in t.get("arguments", {}).items()
+                    }}
+                    for t in tools
+                ]
+        return []
+
+    def _record_tool(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.tool_seconds += seconds
+            self.tool_calls[name] += 1
+
+    def _execute_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        function = self._functions.get(name)
+        if function is None:
+            return json.dumps({"error": f"Function {name} is not enabled"})
+        start = time.perf_counter()
+        try:
+            output = function(**arguments)
+        except Exception as exc:
+            output = json.dumps({"error": f"{type(exc).__name__}: {exc}"})
+        self._record_tool(name, time.perf_counter() - start)
+        return output
+
+    def _start_run(self, thread_id: str, agent_id: str):
+        """Creates a queued run and returns it with the prompt it answers."""
+        if agent_id not in self._agents:
+            raise ResourceNotFoundError(f"No assistant found with id '{agent_id}'")
+        messages = self._thread_messages(thread_id)
+        prompt = next((m.text_messages[-1].text.value for m in reversed(messages) if m.role == "user"), "")
+        run = SimpleNamespace(
+            id=_new_id("run"), thread_id=thread_id, agent_id=agent_id, status="queued",
+            last_error=None, created_at=_now(), started_at=None, completed_at=None, usage=None,
+        )
+        self._runs[run.id] = run
+        return run, prompt
+
+    def _finish_run(self, run, prompt: str, outputs: List[Tuple[str, str]]):
+        """Posts the answer built from the tool outputs and completes the run."""
+        if outputs:
+            answer = "\n".join(f"[{name}] {output[:300]}" for name, output in outputs)
+        else:
+            answer = f"(simulated answer) {prompt}"
+        messages = self._thread_messages(run.thread_id)
+        prompt_tokens = sum(len(m.text_messages[-1].text.value) for m in messages) // 4 + 500
+        self._append_message(run.thread_id, "assistant", answer)
+        run.usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=len(answer) // 4,
+            total_tokens=prompt_tokens + len(answer) // 4,
+        )
+        run.status = "completed"
+        run.completed_at = _now()
+        return run, answer
+
+    def _process(self, thread_id: str, agent_id: str, **kwargs):
+        """Simulates queueing, model time and scripted tool rounds; returns (run, answer)."""
+        run, prompt = self._start_run(thread_id, agent_id)
+        self._sleep("run.queue")
+        run.started_at = _now()
+        run.status = "in_progress"
+
+        outputs = []
+        calls = self._scripted_calls(prompt)
+        if calls:
+            self._sleep("run.tool_round_trip")
+            for call in calls:
+                outputs.append((call["name"], self._execute_tool(call["name"], call["arguments"])))
+        self._sleep("run.model")
+        return self._finish_run(run, prompt, outputs)
+
+    # Manual run loop (runs.create / get / submit_tool_outputs): the run
+    # advances on the clock, so polling sooner or later than a phase ends
+    # shows up as extra requests or as waiting on a finished run.
+    def _create_run(self, thread_id: str, agent_id: str, **kwargs):
+        self._call("runs.create")
+        run, prompt = self._start_run(thread_id, agent_id)
+        run._prompt = prompt
+        run._calls = self._scripted_calls(prompt)
+        run._outputs = []
+        run._stage = "queued"
+        run._stage_ends = time.monotonic() + self._latency("run.queue")
+        return run
+
+    def _advance(self, run) -> None:
+        now = time.monotonic()
+        while run._stage in ("queued", "tools", "model") and now >= run._stage_ends:
+            if run._stage == "queued":
+                run.started_at = _now()
+                run.status = "in_progress"
+                if run._calls:
+                    run._stage, run._stage_ends = "tools", run._stage_ends + self._latency("run.tool_round_trip")
+                else:
+                    run._stage, run._stage_ends = "model", run._stage_ends + self._latency("run.model")
+            elif run._stage == "tools":
+                run.status = "requires_action"
+                run.required_action = SimpleNamespace(
+                    type="submit_tool_outputs",
+                    submit_tool_outputs=SimpleNamespace(tool_calls=[
+                        SimpleNamespace(id=_new_id("call"), type="function", function=SimpleNamespace(
+                            name=call["name"], arguments=json.dumps(call["arguments"])))
+                        for call in run._calls
+                    ]),
+                )
+                run._stage = "waiting"
+            else:
+                run._stage = "done"
+                self._finish_run(run, run._prompt, run._outputs)
+
+    def _get_run(self, thread_id: str, run_id: str, **kwargs):
+        self._call("runs.get")
+        run = self._run_record(thread_id, run_id)
+        self._advance(run)
+        return run
+
+    def _submit_tool_outputs(self, thread_id: str, run_id: str, tool_outputs, **kwargs):
+        self._call("runs.submit_tool_outputs")
+        run = self._run_record(thread_id, run_id)
+        calls = run.required_action.submit_tool_outputs.tool_calls
+        by_id = {o.tool_call_id: o.output for o in tool_outputs}
+        run._outputs = [(c.function.name, by_id.get(c.id, "")) for c in calls]
+        for c in calls:
+            # Outputs were produced by the caller's own executor
+            self._record_tool(c.function.name, 0.0)
+        run.required_action = None
+        run.status = "in_progress"
+        run._stage, run._stage_ends = "model", time.monotonic() + self._latency("run.model")
+        return run
+
+    def _cancel_run(self, thread_id: str, run_id: str, **kwargs):
+        self._call("runs.cancel")
+        run = self._run_record(thread_id, run_id)
+        run.status, run._stage = "cancelled", "done"
+        return run
+
+    def _run_record(self, thread_id: str, run_id: str):
+        run = self._runs.get(run_id)
+        if run is None or run.thread_id != thread_id:
+            raise ResourceNotFoundError(f"No run found with id '{run_id}'")
+        return run
+
+    def _list_run_steps(self, thread_id: str, run_id: str, **kwargs):
+        self._call("run_steps.list")
+        if run_id not in self._runs:
+            raise ResourceNotFoundError(f"No run found with id '{run_id}'")
+        return iter([])
+
+    def _create_and_process(self, thread_id: str, agent_id: str, **kwargs):
+        with self._lock:
+            self.request_counts["runs.create_and_process"] += 1
+        run, _ = self._process(thread_id, agent_id, **kwargs)
+        return run
+
+    def _stream(self, thread_id: str, agent_id: str, event_handler=None, **kwargs):
+        with self._lock:
+            self.request_counts["runs.stream"] += 1
+        return _FakeStream(self, thread_id, agent_id, event_handler, kwargs)
+
+
+class _FakePaged:
+    """Lazily paged list result; each page fetched counts as one request."""
+
+    def __init__(self, client: FakeAgentsClient, operation: str, items: List[Any], page_size: int):
+        self._client = client
+        self._operation = operation
+        self._items = items
+        self._page_size = page_size
+
+    def by_page(self):
+        for start in range(0, max(len(self._items), 1), self._page_size):
+            self._client._call(self._operation)
+            yield iter(self._items[start:start + self._page_size])
+
+    def __iter__(self):
+        for page in self.by_page():
+            yield from page
+
+
+class _FakeStream:
+    """Context manager returned by runs.stream; replays the answer as deltas."""
+
+    def __init__(self, client: FakeAgentsClient, thread_id: str, agent_id: str, handler, kwargs):
+        self._client = client
+        self._thread_id = thread_id
+        self._agent_id = agent_id
+        self._handler = handler
+        self._kwargs = kwargs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def until_done(self) -> None:
+        run, answer = self._client._process(self._thread_id, self._agent_id, **self._kwargs)
+        if self._handler is None:
+            return
+        for word in re.findall(r"\S+\s*", answer):
+            self._handler.on_message_delta(SimpleNamespace(text=word))
+        self._handler.on_thread_run(run)
+
+
+# ---------------------------------------------------------------
+# Async facade (azure.ai.agents.aio.AgentsClient surface)
+# ---------------------------------------------------------------
+class AsyncFakeAgentsClient:
+    """
+    Async counterpart of FakeAgentsClient for the aiohttp server and other
+    azure.ai.agents.aio users. State, scripting and counters live in a
+    FakeAgentsClient that never sleeps; latency is injected here with
+    asyncio.sleep, so concurrent requests overlap like real network calls.
+    Async tool functions (AsyncFunctionTool) are awaited.
+    """
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None, latency_scale: float = 1.0,
+                 script: Optional[List[Dict[str, Any]]] = None):
+        self.core = FakeAgentsClient(latency=latency, latency_scale=0.0, script=script)
+        self.latency = self.core.latency
+        self.latency_scale = latency_scale
+
+        core = self.core
+        self.files = _Operations(
+            upload_and_poll=self._delayed("files.upload_and_poll", core.files.upload_and_poll),
+            get=self._delayed("files.get", core.files.get),
+            delete=self._delayed("files.delete", core.files.delete),
+        )
+        self.create_agent = self._delayed("create_agent", core.create_agent)
+        self.update_agent = self._delayed("update_agent", core.update_agent)
+        self.get_agent = self._delayed("get_agent", core.get_agent)
+        self.delete_agent = self._delayed("delete_agent", core.delete_agent)
+        self.threads = _Operations(
+            create=self._delayed("threads.create", core.threads.create),
+            delete=self._delayed("threads.delete", core.threads.delete),
+        )
+        self.messages = _Operations(
+            create=self._delayed("messages.create", core.messages.create),
+            list=self._list_messages,
+            get_last_message_text_by_role=self._delayed(
+                "messages.get_last_message_text_by_role", core.messages.get_last_message_text_by_role
+            ),
+        )
+        self.runs = _Operations(create_and_process=self._create_and_process)
+
+    @classmethod
+    def from_env(cls) -> "AsyncFakeAgentsClient":
+        """Same settings as FakeAgentsClient.from_env()."""
+        sync = FakeAgentsClient.from_env()
+        client = cls(latency=sync.latency, latency_scale=sync.latency_scale)
+        client.core.script = sync.script
+        return client
+
+    @property
+    def request_counts(self) -> Counter:
+        return self.core.request_counts
+
+    @property
+    def tool_calls(self) -> Counter:
+        return self.core.tool_calls
+
+    @property
+    def tool_seconds(self) -> float:
+        return self.core.tool_seconds
+
+    async def _sleep(self, operation: str) -> None:
+        delay = self.latency.get(operation, 0.0) * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _delayed(self, operation: str, fn: Callable[..., Any]):
+        async def call(*args, **kwargs):
+            await self._sleep(operation)
+            return fn(*args, **kwargs)
+        return call
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self) -> None:
+        pass
+
+    def enable_auto_function_calls(self, tools) -> None:
+        self.core.enable_auto_function_calls(tools)
+
+    def _list_messages(self, thread_id: str, order=None, limit: Optional[int] = None, **kwargs):
+        paged = self.core.messages.list(thread_id=thread_id, order=order, limit=limit)
+        return _AsyncFakePaged(self, paged)
+
+    async def _execute_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        function = self.core._functions.get(name)
+        if function is None:
+            return json.dumps({"error": f"Function {name} is not enabled"})
+        start = time.perf_counter()
+        try:
+            output = function(**arguments)
+            if inspect.isawaitable(output):
+                output = await output
+        except Exception as exc:
+            output = json.dumps({"error": f"{type(exc).__name__}: {exc}"})
+        self.core._record_tool(name, time.perf_counter() - start)
+        return output
+
+    async def _create_and_process(self, thread_id: str, agent_id: str, **kwargs):
+        core = self.core
+        with core._lock:
+            core.request_counts["runs.create_and_process"] += 1
+        run, prompt = core._start_run(thread_id, agent_id)
+        await self._sleep("run.queue")
+        run.started_at = _now()
+        run.status = "in_progress"
+
+        outputs = []
+        calls = core._scripted_calls(prompt)
+        if calls:
+            await self._sleep("run.tool_round_trip")
+            for call in calls:
+                outputs.append((call["name"], await self._execute_tool(call["name"], call["arguments"])))
+        await self._sleep("run.model")
+        run, _ = core._finish_run(run, prompt, outputs)
+        return run
+
+
+class _AsyncFakePaged:
+    """Async version of _FakePaged (AsyncItemPaged surface)."""
+
+    def __init__(self, client: AsyncFakeAgentsClient, paged: _FakePaged):
+        self._client = client
+        self._paged = paged
+
+    async def _pages(self):
+        for page in self._paged.by_page():
+            await self._client._sleep(self._paged._operation)
+            yield _AsyncIter(list(page))
+
+    def by_page(self):
+        return self._pages()
+
+    async def __aiter__(self):
+        async for page in self._pages():
+            async for item in page:
+                yield item
+
+
+class _AsyncIter:
+    def __init__(self, items: List[Any]):
+        self._items = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._items)
+        except StopIteration:
+            raise StopAsyncIteration
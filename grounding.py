@@ -0,0 +1,209 @@
+"""
+Retrieval Grounding for the RFP Expense Agent
+=============================================
+Token-budgeted alternative to embedding the whole policy and data files in
+the agent instructions (GROUNDING_MODE=retrieval in agent_functions.py).
+
+The documents are split into chunks (numbered policy sections, table
+blocks with their header, paragraphs) and indexed once with a lightweight
+BM25 lexical index. The index is persisted under .agent_cache/ keyed by the
+content hashes of the source files. Each turn, only the top-k chunks that
+fit the configured token budget are passed to the run as additional
+instructions.
+"""
+
+import hashlib
+import math
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from cache_utils import CACHE_DIR, cached_file_sha256, read_json, write_json_atomic
+
+MAX_CHUNK_CHARS = 1200
+
+# Words too common in these documents to help ranking
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i",
+    "in", "is", "it", "of", "on", "or", "the", "to", "what", "which", "who",
+    "with", "me", "my", "do", "does", "we", "our", "this", "that",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with a naive plural strip, minus stopwords."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+@dataclass
+class Chunk:
+    """A retrievable piece of a source document."""
+    source: str
+    title: str
+    text: str
+
+
+# ---------------------------------------------------------------
+# Chunking
+# ---------------------------------------------------------------
+def chunk_document(name: str, text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[Chunk]:
+    """
+    Splits a document into blank-line separated blocks. Table blocks that
+    follow the table header get the header repeated so every chunk is
+    self-describing; blocks longer than max_chars are split on lines.
+    """
+    chunks: List[Chunk] = []
+    table_header = ""
+    for block in re.split(r"\n\s*\n", text):
+        lines = [line for line in block.splitlines() if line.strip()]
+        if not lines:
+            continue
+        if "|" in lines[0] and lines[0].split("|")[0].strip().lower() == "category":
+            table_header = lines[0]
+        elif table_header and "|" in lines[0]:
+            lines.insert(0, table_header)
+
+        title = lines[0].strip()
+        current: List[str] = []
+        size = 0
+        for line in lines:
+            if current and size + len(line) > max_chars:
+                chunks.append(Chunk(name, title, "\n".join(current)))
+                current = [table_header] if table_header and "|" in line else []
+                size = sum(len(c) for c in current)
+            current.append(line)
+            size += len(line) + 1
+        chunks.append(Chunk(name, title, "\n".join(current)))
+    return chunks
+
+
+# ---------------------------------------------------------------
+# BM25 index
+# ---------------------------------------------------------------
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks."""
+
+    def __init__(self, chunks: List[Chunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.term_freqs: List[Dict[str, int]] = [dict(Counter(tokenize(c.text))) for c in chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        doc_freq: Counter = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(chunks)
+        self.idf = {t: math.log(1 + (n - df + 0.5) / (df + 0.5)) for t, df in doc_freq.items()}
+
+    def scores(self, query: str) -> List[float]:
+        terms = tokenize(query)
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def to_dict(self) -> Dict:
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "chunks": [asdict(c) for c in self.chunks],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BM25Index":
+        return cls([Chunk(**c) for c in data["chunks"]], k1=data["k1"], b=data["b"])
+
+
+class GroundingIndex:
+    """
+    Chunked, BM25-indexed view of the grounding documents with
+    token-budgeted retrieval.
+    """
+
+    def __init__(self, index: BM25Index, content_key: str):
+        self.index = index
+        self.content_key = content_key
+
+    @classmethod
+    def load(cls, paths: Sequence[Path]) -> "GroundingIndex":
+        """
+        Returns the index for paths, rebuilding it only when one of the
+        files changed. Chunks are persisted as JSON; the term statistics are
+        recomputed on load, which is cheap compared to re-chunking.
+        """
+        hashes = [f"{Path(p).name}:{cached_file_sha256(p)}" for p in paths]
+        content_key = hashlib.sha256("|".join(hashes).encode("utf-8")).hexdigest()[:16]
+        cached = _INDEX_CACHE.get(content_key)
+        if cached is not None:
+            return cached
+
+        cache_path = CACHE_DIR / f"grounding-{content_key}.json"
+        data = read_json(cache_path)
+        if data:
+            index = BM25Index.from_dict(data)
+        else:
+            chunks: List[Chunk] = []
+            for p in paths:
+                chunks.extend(chunk_document(Path(p).name, Path(p).read_text()))
+            index = BM25Index(chunks)
+            write_json_atomic(cache_path, index.to_dict())
+
+        grounding = cls(index, content_key)
+        _INDEX_CACHE[content_key] = grounding
+        return grounding
+
+    def retrieve(self, query: str, top_k: int = 4, token_budget: int = 800) -> List[Chunk]:
+        """
+        Returns up to top_k chunks in relevance order whose combined size
+        stays within token_budget. Chunks that would overflow the budget are
+        skipped in favour of smaller, lower-ranked ones.
+        """
+        scores = self.index.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        selected: List[Chunk] = []
+        used = 0
+        for i in ranked:
+            if len(selected) >= top_k or scores[i] <= 0:
+                break
+            chunk = self.index.chunks[i]
+            cost = estimate_tokens(chunk.text)
+            if used + cost > token_budget:
+                continue
+            selected.append(chunk)
+            used += cost
+        return selected
+
+    def context_for(self, query: str, top_k: int = 4, token_budget: int = 800) -> str:
+        """Formats the retrieved chunks as additional instructions for one run."""
+        chunks = self.retrieve(query, top_k, token_budget)
+        if not chunks:
+            return ""
+        parts = ["RELEVANT EXCERPTS (retrieved for this question):"]
+        for chunk in chunks:
+            parts.append(f"[{chunk.source}]\n{chunk.text}")
+        return "\n\n".join(parts)
+
+
+# content key -> loaded index
+_INDEX_CACHE: Dict[str, GroundingIndex] = {}
@@ -0,0 +1,162 @@
+"""
+Hot Reload of Data and Policy Files for the RFP Expense Agent
+=============================================================
+Lets finance update data.txt or expense_policy.txt while a chat session is
+running (HOT_RELOAD=true):
+
+  - A background thread polls the watched files every HOT_RELOAD_INTERVAL
+    seconds. A file counts as changed when its mtime/size moved and its
+    content hash differs from the version the agent is using.
+  - For a changed file the local caches keyed on it are invalidated and the
+    script's prepare step runs right away in the background (agent.py
+    uploads the new file), so the work overlaps with the user typing.
+  - apply_pending() is called by the chat loop before each turn; it hands
+    the prepared changes to the script's apply step (update_agent with the
+    new file IDs or instructions). The agent, thread and conversation stay
+    the same.
+
+Only changed files are re-uploaded; the others keep their file IDs.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import expense_analytics
+from cache_utils import file_sha256, invalidate_file_hash
+
+
+@dataclass
+class PendingChange:
+    """A changed file whose prepare step has finished (or failed)."""
+    path: Path
+    content_hash: str
+    prepared: Any = None
+    error: Optional[Exception] = None
+
+
+def invalidate_file_caches(path) -> None:
+    """
+    Drops the in-process caches keyed on path, so the next lookup re-hashes
+    and re-parses the file even if an edit kept its mtime and size.
+    Content-hash keyed caches (answer cache, policy and grounding indexes)
+    then stop matching the old version on their own.
+    """
+    invalidate_file_hash(path)
+    expense_analytics.invalidate_expense_table(path)
+
+
+class HotReloader:
+    """Watches files and applies their changes to a running agent between turns."""
+
+    def __init__(self, paths: Sequence[Path], prepare: Callable[[Path], Any],
+                 apply: Callable[[Dict[Path, Any]], None], interval: float = 2.0):
+        self.paths = [Path(p) for p in paths]
+        self.interval = interval
+        self._prepare = prepare
+        self._apply = apply
+        self._stats: Dict[Path, Tuple[int, int]] = {}
+        self._hashes: Dict[Path, str] = {}
+        self._pending: Dict[Path, PendingChange] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+        for path in self.paths:
+            self._stats[path] = self._stat(path)
+            self._hashes[path] = file_sha256(path)
+
+    @classmethod
+    def from_env(cls, paths: Sequence[Path], prepare: Callable[[Path], Any],
+                 apply: Callable[[Dict[Path, Any]], None]) -> Optional["HotReloader"]:
+        """A started reloader when HOT_RELOAD=true, otherwise None."""
+        if os.getenv("HOT_RELOAD", "false").lower() != "true":
+            return None
+        reloader = cls(paths, prepare, apply, interval=float(os.getenv("HOT_RELOAD_INTERVAL", "2")))
+        reloader.start()
+        return reloader
+
+    @staticmethod
+    def _stat(path: Path) -> Tuple[int, int]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Editors often replace files by rename; try again next poll
+            return (0, 0)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    # -----------------------------------------------------------
+    # Watching (background thread)
+    # -----------------------------------------------------------
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._watch, name="hot-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self) -> List[Path]:
+        """Checks every watched file once; prepares and queues the changed ones."""
+        changed = []
+        for path in self.paths:
+            stat = self._stat(path)
+            if stat == self._stats[path] or stat == (0, 0):
+                continue
+            self._stats[path] = stat
+            content_hash = file_sha256(path)
+            with self._lock:
+                pending = self._pending.get(path)
+            known = pending.content_hash if pending else self._hashes[path]
+            if content_hash == known:
+                continue
+
+            invalidate_file_caches(path)
+            change = PendingChange(path, content_hash)
+            try:
+                change.prepared = self._prepare(path)
+            except Exception as exc:
+                change.error = exc
+            with self._lock:
+                self._pending[path] = change
+            changed.append(path)
+        return changed
+
+    # -----------------------------------------------------------
+    # Applying (chat loop, between turns)
+    # -----------------------------------------------------------
+    def apply_pending(self) -> List[str]:
+        """
+        Applies all prepared changes in one apply call and returns a line
+        per file for the chat output. Failed changes are reported and
+        retried on the file's next edit.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return []
+
+        lines = []
+        ready = {}
+        for path, change in pending.items():
+            if change.error is not None:
+                lines.append(f"{path.name} changed but could not be prepared: {change.error}")
+            else:
+                ready[path] = change.prepared
+        if ready:
+            try:
+                self._apply(ready)
+            except Exception as exc:
+                return lines + [f"Reload of {', '.join(p.name for p in ready)} failed: {exc}"]
+            for path in ready:
+                self._hashes[path] = pending[path].content_hash
+                self.reloads += 1
+                lines.append(f"Reloaded {path.name} (sha256 {pending[path].content_hash[:12]})")
+        return lines
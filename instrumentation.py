@@ -0,0 +1,302 @@
+"""
+Per-Turn Instrumentation for the RFP Expense Agent
+==================================================
+Records where the time of each chat turn goes:
+
+  - client phases timed around the agents_client calls (answer cache,
+    retrieval, messages.create, the run, the final message fetch)
+  - the run split into queueing and in-progress time from the run's own
+    timestamps, and optionally Code Interpreter time from its run steps
+    (one extra request per turn, INSTRUMENT_RUN_STEPS=true)
+  - user_functions calls: count, time and errors per tool, plus the wall
+    time during which any tool was running (calls of one step may overlap
+    with PARALLEL_TOOLS, so the per-tool times can add up to more)
+  - token usage reported on the run object
+
+Every turn is appended to a JSONL trace, the running totals are rewritten
+as a Prometheus text-format file (for the node_exporter textfile
+collector), and summary_lines() gives the table printed after the
+CONVERSATION LOG. Service timestamps have one-second resolution, so the
+queue / in-progress split is coarse for fast runs.
+"""
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from cache_utils import CACHE_DIR
+
+METRICS_DIR = CACHE_DIR / "metrics"
+DEFAULT_TRACE_PATH = METRICS_DIR / "turns.jsonl"
+DEFAULT_PROM_PATH = METRICS_DIR / "rfp_agent.prom"
+
+
+def _seconds_between(start, end) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return max((end - start).total_seconds(), 0.0)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)] if ordered else 0.0
+
+
+class TurnMetrics:
+    """Timings, tool calls and token usage of a single turn."""
+
+    def __init__(self, number: int, prompt: str):
+        self.number = number
+        self.prompt_chars = len(prompt)
+        self.started_at = time.time()
+        self.phases: Dict[str, float] = defaultdict(float)
+        self.tools: Dict[str, Dict[str, float]] = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "errors": 0})
+        self.usage: Dict[str, int] = {}
+        self.status = "unknown"
+        self.run_id: Optional[str] = None
+        # Wall time with at least one tool running (overlapping calls count once)
+        self.tool_wall_seconds = 0.0
+        self._tools_active = 0
+        self._tools_busy_since = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "turn": self.number,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "status": self.status,
+            "run_id": self.run_id,
+            "prompt_chars": self.prompt_chars,
+            "phases": {k: round(v, 4) for k, v in self.phases.items()},
+            "tools": {k: {**v, "seconds": round(v["seconds"], 4)} for k, v in self.tools.items()},
+            "usage": self.usage,
+        }
+
+
+class Instrumentation:
+    """Collects TurnMetrics and exports them as JSONL and Prometheus text."""
+
+    def __init__(self, trace_path: Optional[Path] = DEFAULT_TRACE_PATH,
+                 prom_path: Optional[Path] = DEFAULT_PROM_PATH, run_steps: bool = False):
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.prom_path = Path(prom_path) if prom_path else None
+        self.run_steps = run_steps
+        self.turns: List[TurnMetrics] = []
+        self.current: Optional[TurnMetrics] = None
+        self._lock = threading.Lock()
+        for path in (self.trace_path, self.prom_path):
+            if path:
+                path.parent.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        """Configured from METRICS_TRACE_PATH, METRICS_PROM_PATH and INSTRUMENT_RUN_STEPS."""
+        return cls(
+            trace_path=os.getenv("METRICS_TRACE_PATH", str(DEFAULT_TRACE_PATH)) or None,
+            prom_path=os.getenv("METRICS_PROM_PATH", str(DEFAULT_PROM_PATH)) or None,
+            run_steps=os.getenv("INSTRUMENT_RUN_STEPS", "false").lower() == "true",
+        )
+
+    # -----------------------------------------------------------
+    # Recording
+    # -----------------------------------------------------------
+    def begin_turn(self, prompt: str) -> TurnMetrics:
+        self.current = TurnMetrics(len(self.turns) + 1, prompt)
+        return self.current
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the enclosed block as phase `name` of the current turn."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.current is not None:
+                with self._lock:
+                    self.current.phases[name] += time.perf_counter() - start
+
+    def record_phase(self, name: str, seconds: float) -> None:
+        """Records a duration measured elsewhere (e.g. time to first token)."""
+        if self.current is not None:
+            with self._lock:
+                self.current.phases[name] += seconds
+
+    def wrap(self, functions: Set[Callable[..., Any]]) -> Set[Callable[..., Any]]:
+        """
+        Wraps user_functions so each call is counted and timed against the
+        current turn. Name, docstring and signature are preserved, so
+        FunctionTool builds identical definitions.
+        """
+        return {self._wrap_one(f) for f in functions}
+
+    def _wrap_one(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            turn = self.current
+            start = time.perf_counter()
+            if turn is not None:
+                with self._lock:
+                    if turn._tools_active == 0:
+                        turn._tools_busy_since = start
+                    turn._tools_active += 1
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                if turn is not None:
+                    end = time.perf_counter()
+                    with self._lock:
+                        stats = turn.tools[func.__name__]
+                        stats["calls"] += 1
+                        stats["seconds"] += end - start
+                        stats["errors"] += int(failed)
+                        turn._tools_active -= 1
+                        if turn._tools_active == 0:
+                            turn.tool_wall_seconds += end - turn._tools_busy_since
+        return wrapper
+
+    def record_run(self, run, agents_client=None) -> None:
+        """Adds status, token usage and the queue / in-progress split of a finished run."""
+        turn = self.current
+        if turn is None or run is None:
+            return
+        turn.run_id = getattr(run, "id", None)
+        turn.status = str(getattr(run.status, "value", run.status))
+        usage = getattr(run, "usage", None)
+        if usage is not None:
+            turn.usage = {
+                "prompt_tokens": usage.prompt_tokens or 0,
+                "completion_tokens": usage.completion_tokens or 0,
+                "total_tokens": usage.total_tokens or 0,
+            }
+
+        queued = _seconds_between(getattr(run, "created_at", None), getattr(run, "started_at", None))
+        in_progress = _seconds_between(
+            getattr(run, "started_at", None),
+            getattr(run, "completed_at", None) or getattr(run, "failed_at", None),
+        )
+        if queued is not None:
+            turn.phases["run.queued"] = queued
+        if in_progress is not None:
+            # Wall time, not the sum of per-call times: parallel calls overlap
+            turn.phases["run.tools"] = turn.tool_wall_seconds
+            turn.phases["run.model"] = max(in_progress - turn.tool_wall_seconds, 0.0)
+
+        if self.run_steps and agents_client is not None and turn.run_id:
+            with self.phase("run_steps.list"):
+                seconds = self._code_interpreter_seconds(agents_client, run)
+            if seconds:
+                turn.phases["run.code_interpreter"] = seconds
+                turn.phases["run.model"] = max(turn.phases.get("run.model", 0.0) - seconds, 0.0)
+
+    @staticmethod
+    def _code_interpreter_seconds(agents_client, run) -> float:
+        total = 0.0
+        for step in agents_client.run_steps.list(thread_id=run.thread_id, run_id=run.id):
+            calls = getattr(getattr(step, "step_details", None), "tool_calls", None) or []
+            if any(str(getattr(c, "type", "")) == "code_interpreter" for c in calls):
+                total += _seconds_between(step.created_at, step.completed_at) or 0.0
+        return total
+
+    def end_turn(self, status: Optional[str] = None) -> None:
+        """Closes the current turn and appends it to the trace."""
+        turn = self.current
+        if turn is None:
+            return
+        if status:
+            turn.status = status
+        turn.phases["turn"] = time.time() - turn.started_at
+        self.turns.append(turn)
+        self.current = None
+        if self.trace_path:
+            with open(self.trace_path, "a") as f:
+                f.write(json.dumps(turn.to_dict()) + "\n")
+        if self.prom_path:
+            self.write_prometheus()
+
+    # -----------------------------------------------------------
+    # Export
+    # -----------------------------------------------------------
+    def _totals(self):
+        phases: Dict[str, List[float]] = defaultdict(list)
+        tools: Dict[str, Dict[str, float]] = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "errors": 0})
+        tokens: Dict[str, int] = defaultdict(int)
+        statuses: Dict[str, int] = defaultdict(int)
+        for turn in self.turns:
+            statuses[turn.status] += 1
+            for name, seconds in turn.phases.items():
+                phases[name].append(seconds)
+            for name, stats in turn.tools.items():
+                for key, value in stats.items():
+                    tools[name][key] += value
+            for key, value in turn.usage.items():
+                tokens[key] += value
+        return phases, tools, tokens, statuses
+
+    def write_prometheus(self) -> None:
+        """Rewrites the Prometheus text-format file with the running totals."""
+        phases, tools, tokens, statuses = self._totals()
+        lines = [
+            "# HELP rfp_agent_turns_total Chat turns by final run status.",
+            "# TYPE rfp_agent_turns_total counter",
+        ]
+        lines += [f'rfp_agent_turns_total{{status="{s}"}} {n}' for s, n in sorted(statuses.items())]
+        lines += [
+            "# HELP rfp_agent_phase_seconds Time spent per turn phase.",
+            "# TYPE rfp_agent_phase_seconds summary",
+        ]
+        for name, samples in sorted(phases.items()):
+            lines.append(f'rfp_agent_phase_seconds_sum{{phase="{name}"}} {sum(samples):.6f}')
+            lines.append(f'rfp_agent_phase_seconds_count{{phase="{name}"}} {len(samples)}')
+        lines += [
+            "# HELP rfp_agent_tokens_total Tokens reported by the service.",
+            "# TYPE rfp_agent_tokens_total counter",
+        ]
+        lines += [f'rfp_agent_tokens_total{{kind="{k}"}} {v}' for k, v in sorted(tokens.items())]
+        for metric, key, kind in (("tool_calls_total", "calls", "counter"),
+                                  ("tool_seconds_total", "seconds", "counter"),
+                                  ("tool_errors_total", "errors", "counter")):
+            lines.append(f"# TYPE rfp_agent_{metric} {kind}")
+            lines += [f'rfp_agent_{metric}{{tool="{t}"}} {s[key]:g}' for t, s in sorted(tools.items())]
+
+        tmp_path = self.prom_path.with_suffix(".prom.tmp")
+        tmp_path.write_text("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prom_path)
+
+    def summary_lines(self) -> List[str]:
+        """Per-phase p50/p95/total, token and tool tables for the end-of-session printout."""
+        if not self.turns:
+            return ["  No turns recorded."]
+        phases, tools, tokens, statuses = self._totals()
+        lines = [f"  {'Phase':24s} {'p50':>8s} {'p95':>8s} {'total':>9s}"]
+        for name, samples in sorted(phases.items(), key=lambda kv: -sum(kv[1])):
+            lines.append(f"  {name:24s} {_percentile(samples, 50):7.2f}s {_percentile(samples, 95):7.2f}s "
+                         f"{sum(samples):8.2f}s")
+        if len(statuses) > 1:
+            # Turn time per path, e.g. answered locally vs. by a model run
+            lines.append("")
+            lines.append(f"  {'Turns by status':24s} {'turns':>5s} {'p50':>9s} {'p95':>9s}")
+            for status, count in sorted(statuses.items(), key=lambda kv: -kv[1]):
+                samples = [t.phases["turn"] for t in self.turns if t.status == status and "turn" in t.phases]
+                if samples:
+                    lines.append(f"  {status:24s} {count:5d} {_percentile(samples, 50) * 1000:7.1f}ms "
+                                 f"{_percentile(samples, 95) * 1000:7.1f}ms")
+        if tokens:
+            lines.append("")
+            lines.append("  Tokens: " + ", ".join(f"{k.replace('_tokens', '')} {v:,}" for k, v in tokens.items()))
+        if tools:
+            lines.append("")
+            lines.append(f"  {'Tool':32s} {'calls':>5s} {'time':>9s} {'errors':>6s}")
+            for name, stats in sorted(tools.items(), key=lambda kv: -kv[1]["seconds"]):
+                lines.append(f"  {name:32s} {int(stats['calls']):5d} {stats['seconds'] * 1000:7.1f}ms "
+                             f"{int(stats['errors']):6d}")
+        return lines
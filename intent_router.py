@@ -0,0 +1,362 @@
+"""
+Local Fast-Path Intent Router for the RFP Expense Agent
+=======================================================
+Answers the simple lookups that data.txt and expense_policy.txt settle on
+their own, without a model run (ROUTER=true):
+
+  rate_cap   "What's the max rate for an AI Engineer?"
+  totals     "What's the grand total?", "total hours", "highest cost
+             category", "how much did Lina Haddad bill?", "total for Travel"
+  approval   "Who needs to approve $30,000?"
+  chart      "Bar chart of costs by consultant" (drawn as a text chart;
+             cost, hours or hourly rate by consultant or category)
+
+Each intent recognises its phrases and entities (roles, categories,
+consultant names, amounts) and reports which words of the prompt it
+explains. The confidence is the share of the prompt's content words that
+are explained, so "What's the AI Engineer cap?" is answered locally while
+"Why is the AI Engineer rate so much higher than the market?" goes to the
+agent. Prompts below ROUTER_THRESHOLD are forwarded, and so are prompts
+with an action verb ("flag", "remove", "set" ...; answer_cache.ACTION_VERB)
+that the answer does not carry out, since a lookup would silently drop the
+requested action.
+
+Answers come from the parsed table (expense_analytics) and the compiled
+policy index (policy_index); both are cached by content hash, so edits to
+the files (hot reload) show up in the next answer.
+"""
+
+import math
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from answer_cache import ACTION_VERB
+from expense_analytics import category_actuals, compare_to_caps, expense_totals, load_expense_table
+from policy_index import load_policy_index
+
+# Words that carry no intent of their own
+STOPWORDS = frozenset("""
+    a an the what whats is are was were be been for of to me please can could you i we our my
+    in on at it its this that these those and or with there tell give show let us do does did
+    how much many who whom which will would should s current currently just quick
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+_AMOUNT = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)\s*(k|m|thousand|million)?\b"
+                     r"|\b(\d[\d,]*(?:\.\d+)?)\s*(k|m|thousand|million)?\s*(?:usd|dollars?)?\b", re.I)
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6}
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") and not word.endswith("ss") and len(word) > 3 else word
+
+
+def _words(text: str) -> List[str]:
+    return [_singular(w) for w in _WORD.findall(text.lower().replace("'s", ""))]
+
+
+def _vocabulary(text: str) -> FrozenSet[str]:
+    return frozenset(_words(text))
+
+
+def _span_words(pattern: re.Pattern, text: str) -> FrozenSet[str]:
+    """Words inside every match of pattern."""
+    return frozenset(w for m in pattern.finditer(text) for w in _words(m.group(0)))
+
+
+def _money(value: float) -> str:
+    return f"${value:,.0f}" if value == int(value) else f"${value:,.2f}"
+
+
+def ascii_bar_chart(title: str, rows: List[Tuple[str, float]], value_format: str = "{:,.0f}",
+                    width: int = 40) -> str:
+    """Horizontal bar chart in plain text, largest value first."""
+    rows = sorted(rows, key=lambda r: r[1], reverse=True)
+    if not rows:
+        return f"{title}\n  (no data)"
+    label_width = max(len(label) for label, _ in rows)
+    top = max(value for _, value in rows) or 1.0
+    lines = [title]
+    for label, value in rows:
+        bar = "#" * max(int(round(value / top * width)), 1 if value > 0 else 0)
+        lines.append(f"  {label:<{label_width}} |{bar:<{width}} {value_format.format(value)}")
+    return "\n".join(lines)
+
+
+@dataclass
+class Match:
+    """An intent's answer and the prompt words it accounts for."""
+    intent: str
+    answer: str
+    explained: FrozenSet[str]
+
+
+@dataclass
+class RoutedAnswer:
+    intent: str
+    text: str
+    confidence: float
+    seconds: float
+
+
+# ---------------------------------------------------------------
+# Intent vocabularies
+# ---------------------------------------------------------------
+_CAP = re.compile(r"\b(max(imum)?|cap(s|ped)?|limit|ceiling|allowed|allowable)\b", re.I)
+_CAP_WORDS = _vocabulary("max maximum cap capped limit ceiling allowed allowable rate hourly hour per "
+                         "policy")
+
+_TOTAL_FIELDS = [
+    ("grand_total", "Grand total",
+     re.compile(r"\bgrand total\b|\btotal (project |rfp )?(cost|budget|spend|amount)s?\b|"
+                r"\boverall (cost|total|budget)\b|\bcost in total\b", re.I)),
+    ("total_personnel_cost", "Total personnel cost",
+     re.compile(r"\b(total )?personnel (cost|spend)s?\b", re.I)),
+    ("total_other_costs", "Total other (non-personnel) costs",
+     re.compile(r"\b(total )?(other|non-personnel) (cost|expense)s?\b", re.I)),
+    ("total_hours", "Total hours",
+     re.compile(r"\btotal (billed |billable )?hours\b|\bhow many hours\b|\bhours in total\b", re.I)),
+    ("average_hourly_rate", "Average hourly rate",
+     re.compile(r"\baverage (hourly )?rate\b", re.I)),
+    ("highest_cost_category", "Highest cost category",
+     re.compile(r"\b(highest|largest|biggest|most expensive|top) (cost |spend )?category\b", re.I)),
+]
+_TOTAL_WORDS = _vocabulary("total cost spend amount much project rfp usd dollar overall")
+_ENTITY_TRIGGER = _vocabulary("total cost spend spent amount much bill billed charged")
+_CONSULTANT_WORDS = _vocabulary("hours hourly rate")
+# data.txt has no dates, so totals for a period can't be answered from it
+_PERIOD = re.compile(r"\b(jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|"
+                     r"sep(t(ember)?)?|oct(ober)?|nov(ember)?|dec(ember)?|q[1-4]|quarter(ly)?|"
+                     r"year|month(ly)?|week(ly)?|ytd|yesterday|today|since|(19|20)\d\d)\b", re.I)
+
+_APPROVAL = re.compile(r"\b(approv\w*|authori[sz]\w*|sign(s|ed)?[ -]?off)\b", re.I)
+_APPROVAL_WORDS = _vocabulary("approve approves approved approval approver authorize authorise sign off "
+                              "signoff need needs needed require requires required level project expense "
+                              "amount purchase contract deal spend usd dollar k thousand m million")
+
+_CHART = re.compile(r"\b(bar )?(chart|graph|plot|histogram)\b|\bvisuali[sz]e\b", re.I)
+_CHART_WORDS = _vocabulary("bar chart graph plot histogram visualize visualise create make draw generate "
+                           "ascii text simple quick by per each all")
+_CHART_DIMENSIONS = {
+    "consultant": _vocabulary("consultant consultants person people team member members"),
+    "category": _vocabulary("category categories role roles type types line item items"),
+}
+_CHART_METRICS = {
+    "hourly rate": _vocabulary("rate rates hourly"),
+    "hours": _vocabulary("hours hour time"),
+    "cost": _vocabulary("cost costs amount amounts spend expense expenses usd dollar"),
+}
+
+
+class IntentRouter:
+    """Answers lookup intents locally; everything else goes to the agent."""
+
+    def __init__(self, threshold: float = 0.75):
+        self.threshold = threshold
+        self.routed: Counter = Counter()
+        self.forwarded = 0
+        self.near_misses = 0
+        self.seconds: Dict[str, List[float]] = defaultdict(list)
+        self._entity_key: Tuple[str, str] = ("", "")
+        self._entities: List[Tuple[FrozenSet[str], str, str]] = []
+        self._role_words: Dict[str, FrozenSet[str]] = {}
+
+    @classmethod
+    def from_env(cls) -> "IntentRouter":
+        """Configured from ROUTER_THRESHOLD."""
+        return cls(threshold=float(os.getenv("ROUTER_THRESHOLD", "0.75")))
+
+    # -----------------------------------------------------------
+    # Entities (rebuilt when data.txt or the policy changes)
+    # -----------------------------------------------------------
+    def _refresh(self, table, policy) -> None:
+        key = (table.content_hash, policy.content_hash)
+        if key == self._entity_key:
+            return
+        entities = []
+        for name in set(table.categories):
+            entities.append((_vocabulary(name), "category", name))
+        for name in set(table.consultants):
+            if name.lower() != "team":
+                entities.append((_vocabulary(name), "consultant", name))
+        # Longest names first, so "Senior D365 Developer" wins over a shorter overlap
+        entities.sort(key=lambda e: len(e[0]), reverse=True)
+        role_words: Dict[str, FrozenSet[str]] = defaultdict(frozenset)
+        for role in policy.rate_caps:
+            role_words[role] |= _vocabulary(role)
+        for category in table.categories:
+            role = policy.policy_role(category)
+            if role:
+                role_words[role] |= _vocabulary(category)
+        self._entities = entities
+        self._role_words = dict(role_words)
+        self._entity_key = key
+
+    def _entities_in(self, words: FrozenSet[str], kinds=("category", "consultant")):
+        found, covered = [], set()
+        for vocabulary, kind, name in self._entities:
+            if kind in kinds and vocabulary <= words and not vocabulary <= covered:
+                found.append((kind, name))
+                covered |= vocabulary
+        return found, frozenset(covered)
+
+    # -----------------------------------------------------------
+    # Intents
+    # -----------------------------------------------------------
+    def _rate_cap(self, text: str, words: FrozenSet[str], table, policy) -> Optional[Match]:
+        if not _CAP.search(text):
+            return None
+        role = policy.policy_role(text)
+        if role is None:
+            return None
+        cap = policy.rate_caps[role]
+        answer = f"The expense policy caps {role} at {_money(cap)}/hour (1. CONSULTANT RATE CAPS)."
+        rows = [r for r in compare_to_caps(table, policy) if r["policy_role"] == role]
+        if rows:
+            billed = "; ".join(
+                f"{r['consultant']} bills {_money(r['hourly_rate'])}/hour"
+                + (f", {_money(r['excess_per_hour'])} over the cap" if r["exceeds_cap"] else "")
+                for r in rows
+            )
+            answer += f" In data.txt: {billed}."
+        return Match("rate_cap", answer, _CAP_WORDS | self._role_words.get(role, frozenset()))
+
+    def _totals(self, text: str, words: FrozenSet[str], table, policy) -> Optional[Match]:
+        if _PERIOD.search(text):
+            return None
+        totals = expense_totals(table)
+        lines, explained = [], set(_TOTAL_WORDS)
+        for field_name, label, pattern in _TOTAL_FIELDS:
+            span = _span_words(pattern, text)
+            if not span:
+                continue
+            explained |= span
+            value = totals[field_name]
+            if field_name == "total_hours":
+                lines.append(f"{label}: {value:,.0f} hours")
+            elif field_name == "highest_cost_category":
+                lines.append(f"{label}: {value} ({_money(totals['by_category'][value])})")
+            elif field_name == "average_hourly_rate":
+                lines.append(f"{label}: {_money(value)}/hour")
+            else:
+                lines.append(f"{label}: {_money(value)}")
+
+        if not lines and words & _ENTITY_TRIGGER:
+            entities, covered = self._entities_in(words)
+            actuals = category_actuals(table)
+            for kind, name in entities:
+                explained |= covered | (words & _ENTITY_TRIGGER)
+                if kind == "category":
+                    lines.append(f"{name}: {_money(actuals[name])}")
+                    continue
+                rows = [i for i, c in enumerate(table.consultants) if c == name]
+                amount = sum(table.amounts[i] for i in rows)
+                hours = sum(table.hours[i] for i in rows if not math.isnan(table.hours[i]))
+                rate = f", {_money(round(amount / hours, 2))}/hour" if hours else ""
+                explained |= _CONSULTANT_WORDS
+                lines.append(f"{name}: {_money(amount)} for {hours:,.0f} hours{rate}")
+        if not lines:
+            return None
+        return Match("totals", "\n".join(lines) + "\n(from data.txt)", frozenset(explained))
+
+    def _approval(self, text: str, words: FrozenSet[str], table, policy) -> Optional[Match]:
+        if not _APPROVAL.search(text):
+            return None
+        amounts = []
+        for m in _AMOUNT.finditer(text):
+            number, unit = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+            value = float(number.replace(",", "")) * _MULTIPLIERS.get((unit or "").lower(), 1)
+            if re.search(r"[-\u2212]\s*\$?\s*$", text[:m.start()]):
+                # "$-500" or "-$500": no approval band covers a negative amount
+                return None
+            if m.group(1) or unit or value >= 100:
+                amounts.append(value)
+        if len(amounts) != 1:
+            return None
+        band = policy.required_approval(amounts[0])
+        if band is None:
+            return None
+        numbers = frozenset(w for w in words if w[0].isdigit())
+        answer = f"An amount of {_money(amounts[0])} needs {band.approver} approval ({band.rule})."
+        return Match("approval", answer, _APPROVAL_WORDS | numbers)
+
+    def _chart(self, text: str, words: FrozenSet[str], table, policy) -> Optional[Match]:
+        if not _CHART.search(text):
+            return None
+        dimension = next((d for d, vocab in _CHART_DIMENSIONS.items() if words & vocab), "category")
+        metric = next((m for m, vocab in _CHART_METRICS.items() if words & vocab), "cost")
+        labels = table.categories
+        if dimension == "consultant":
+            labels = ["Team (other costs)" if c.lower() == "team" else c for c in table.consultants]
+
+        sums: Dict[str, float] = defaultdict(float)
+        hours: Dict[str, float] = defaultdict(float)
+        for label, amount, hour in zip(labels, table.amounts, table.hours):
+            if metric == "cost":
+                sums[label] += amount
+            elif not math.isnan(hour):
+                sums[label] += amount
+                hours[label] += hour
+        if metric == "hourly rate":
+            rows = [(label, sums[label] / hours[label]) for label in hours if hours[label]]
+            chart = ascii_bar_chart(f"Hourly rate by {dimension} (USD/hour)", rows, "{:,.2f}")
+        elif metric == "hours":
+            chart = ascii_bar_chart(f"Hours by {dimension}", list(hours.items()))
+        else:
+            chart = ascii_bar_chart(f"Cost by {dimension} (USD)", list(sums.items()))
+        explained = _CHART_WORDS | _CHART_DIMENSIONS[dimension] | _CHART_METRICS[metric]
+        return Match("chart", chart, explained)
+
+    # -----------------------------------------------------------
+    # Routing
+    # -----------------------------------------------------------
+    def classify(self, prompt: str) -> Tuple[Optional[Match], float]:
+        """Best matching intent and its confidence (share of content words explained)."""
+        table = load_expense_table()
+        policy = load_policy_index()
+        self._refresh(table, policy)
+        words = frozenset(_words(prompt))
+        content = words - STOPWORDS
+        actions = frozenset(w for m in ACTION_VERB.finditer(prompt) for w in _words(m.group(0)))
+        best, best_confidence = None, 0.0
+        for intent in (self._rate_cap, self._totals, self._approval, self._chart):
+            match = intent(prompt, words, table, policy)
+            if match is None or actions - match.explained:
+                continue
+            confidence = len(content & match.explained) / len(content) if content else 0.0
+            if confidence > best_confidence:
+                best, best_confidence = match, confidence
+        return best, best_confidence
+
+    def route(self, prompt: str) -> Optional[RoutedAnswer]:
+        """A local answer, or None when the prompt should go to the agent."""
+        start = time.perf_counter()
+        match, confidence = self.classify(prompt)
+        seconds = time.perf_counter() - start
+        if match is None or confidence < self.threshold:
+            self.forwarded += 1
+            if match is not None:
+                self.near_misses += 1
+            self.seconds["forward decision"].append(seconds)
+            return None
+        self.routed[match.intent] += 1
+        self.seconds[match.intent].append(seconds)
+        return RoutedAnswer(match.intent, match.answer, confidence, seconds)
+
+    def summary_lines(self) -> List[str]:
+        total = sum(self.routed.values()) + self.forwarded
+        if not total:
+            return ["  Router: no turns"]
+        routed = sum(self.routed.values())
+        lines = [f"  Router: {routed} answered locally, {self.forwarded} forwarded "
+                 f"({routed / total:.0%} local, threshold {self.threshold:g}, "
+                 f"{self.near_misses} below threshold)"]
+        for name, samples in sorted(self.seconds.items()):
+            ordered = sorted(samples)
+            p50 = ordered[len(ordered) // 2] * 1000
+            lines.append(f"    {name:18s} {len(samples):4d}   p50 {p50:6.2f}ms   max {ordered[-1] * 1000:6.2f}ms")
+        return lines
@@ -0,0 +1,539 @@
+"""
+Streaming Ledger Ingestion for the RFP Expense Agent
+====================================================
+Turns a large expense ledger (CSV, JSONL or a pipe table like data.txt)
+into something small enough to hand to Code Interpreter:
+
+  - The file is read in fixed-size chunks of a memory map (plain reads
+    when the file cannot be mapped), so memory use does not grow with the
+    ledger size.
+  - Rows are aggregated per category, consultant and month. Each dimension
+    keeps at most max_groups keys; rows beyond that are counted under
+    "(other)", which keeps the aggregates bounded as well.
+  - A compact summary file (pipe tables, like data.txt) is written for
+    upload, plus a columnar cache of the parsed rows (one binary array
+    file per column, category/consultant/month as dictionary codes) for
+    local analysis without re-parsing.
+
+Results are keyed on the ledger's content hash, so an unchanged ledger is
+not ingested again. agent.py uploads the summary when LEDGER_PATH is set.
+
+Usage:
+    python ledger_ingest.py ledger.csv
+    python ledger_ingest.py ledger.jsonl --max-groups 5000 --force
+"""
+
+import argparse
+import csv
+import gc
+import json
+import math
+import mmap
+import time
+from array import array
+from dataclasses import dataclass, field
+from operator import itemgetter
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+from cache_utils import CACHE_DIR, cached_file_sha256, read_json, write_json_atomic
+
+LEDGER_CACHE_DIR = CACHE_DIR / "ledger"
+OTHER_KEY = "(other)"
+UNKNOWN_MONTH = "unknown"
+
+# Bump when the summary or column layout changes
+_FORMAT_VERSION = 2
+_CHUNK_BYTES = 4 << 20
+
+# Normalized header name -> ledger field
+_COLUMN_ALIASES = {
+    "category": "category", "role": "category", "expense category": "category", "type": "category",
+    "amount": "amount", "amount (usd)": "amount", "amount usd": "amount", "amount_usd": "amount",
+    "cost": "amount", "total": "amount",
+    "hours": "hours", "hrs": "hours",
+    "consultant": "consultant", "name": "consultant", "employee": "consultant", "resource": "consultant",
+    "date": "date", "month": "date", "period": "date", "invoice date": "date", "invoice_date": "date",
+}
+
+# Column order of data.txt, used for pipe tables without a header line
+_DEFAULT_COLUMNS = ["category", "amount", "hours", "consultant"]
+
+# (type code, field) of the columnar cache files
+_COLUMN_TYPES = {"category": "I", "consultant": "I", "month": "I", "amount": "d", "hours": "d"}
+
+
+# ---------------------------------------------------------------
+# Aggregates
+# ---------------------------------------------------------------
+class BoundedGroups:
+    """
+    Row count, amount and hours per key, for at most max_groups keys; rows
+    of keys beyond that are counted under OTHER_KEY. Each key has a stable
+    integer code for the columnar cache. clean() turns a raw field value
+    into its key and is memoized per raw value.
+    """
+
+    def __init__(self, max_groups: int, clean: Callable[[object], str], memo_limit: int = 1 << 16):
+        self.max_groups = max_groups
+        self.clean = clean
+        self.memo_limit = memo_limit
+        self.memo: Dict[object, int] = {}
+        self.codes: Dict[str, int] = {}
+        self.rows: List[int] = []
+        self.amounts: List[float] = []
+        self.hours: List[float] = []
+
+    def lookup(self, raw) -> int:
+        """Code for a raw field value (the fast path reads self.memo directly)."""
+        key = self.clean(raw)
+        code = self.codes.get(key)
+        if code is None:
+            if len(self.codes) >= self.max_groups:
+                key = OTHER_KEY
+                code = self.codes.get(key)
+            if code is None:
+                code = self.codes[key] = len(self.rows)
+                self.rows.append(0)
+                self.amounts.append(0.0)
+                self.hours.append(0.0)
+        if len(self.memo) < self.memo_limit:
+            self.memo[raw] = code
+        return code
+
+    @property
+    def overflow_rows(self) -> int:
+        code = self.codes.get(OTHER_KEY)
+        return self.rows[code] if code is not None else 0
+
+    def items(self) -> List[Dict[str, object]]:
+        """Groups sorted by amount, highest first."""
+        groups = [
+            {"key": key, "rows": self.rows[c], "amount": round(self.amounts[c], 2), "hours": round(self.hours[c], 2)}
+            for key, c in self.codes.items()
+        ]
+        groups.sort(key=lambda g: g["amount"], reverse=True)
+        return groups
+
+    def names(self) -> List[str]:
+        """Keys in code order (index = code)."""
+        names = [""] * len(self.codes)
+        for key, c in self.codes.items():
+            names[c] = key
+        return names
+
+
+@dataclass
+class LedgerSummary:
+    """Totals and per-dimension aggregates of one ingested ledger."""
+    source: str
+    content_hash: str
+    format: str
+    rows: int = 0
+    skipped_rows: int = 0
+    overflow_rows: int = 0
+    grand_total: float = 0.0
+    total_hours: float = 0.0
+    personnel_cost: float = 0.0
+    by_category: List[Dict[str, object]] = field(default_factory=list)
+    by_consultant: List[Dict[str, object]] = field(default_factory=list)
+    by_month: List[Dict[str, object]] = field(default_factory=list)
+    summary_path: str = ""
+    columns_dir: str = ""
+    seconds: float = 0.0
+    cache_hit: bool = False
+
+    @property
+    def average_hourly_rate(self) -> float:
+        return round(self.personnel_cost / self.total_hours, 2) if self.total_hours else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        data = dict(self.__dict__)
+        data.pop("cache_hit")
+        return data
+
+
+# ---------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------
+def detect_format(path: Path, first_line: str) -> str:
+    """'jsonl', 'csv' or 'pipe', from the extension and the first line."""
+    suffix = path.suffix.lower()
+    if suffix in (".jsonl", ".ndjson") or first_line.lstrip().startswith("{"):
+        return "jsonl"
+    if suffix == ".csv" or ("," in first_line and "|" not in first_line):
+        return "csv"
+    return "pipe"
+
+
+def iter_chunks(path, chunk_bytes: int = _CHUNK_BYTES) -> Iterator[List[str]]:
+    """
+    Yields the file's lines in lists covering about chunk_bytes each. Chunks
+    end on a line boundary; the file is memory-mapped when possible.
+    """
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files, pipes and some filesystems cannot be mapped
+            buffer = None
+
+        if buffer is not None:
+            with buffer:
+                size, pos = len(buffer), 0
+                while pos < size:
+                    end = min(pos + chunk_bytes, size)
+                    if end < size:
+                        newline = buffer.rfind(b"\n", pos, end)
+                        end = newline + 1 if newline >= 0 else (buffer.find(b"\n", end) + 1 or size)
+                    yield buffer[pos:end].decode("utf-8", errors="replace").splitlines()
+                    # Drop the consumed pages from this process's resident set
+                    released = pos - pos % mmap.PAGESIZE
+                    if hasattr(buffer, "madvise") and end - released >= mmap.PAGESIZE:
+                        buffer.madvise(mmap.MADV_DONTNEED, released, end - released - (end - released) % mmap.PAGESIZE)
+                    pos = end
+            return
+
+        remainder = b""
+        for block in iter(lambda: f.read(chunk_bytes), b""):
+            block = remainder + block
+            cut = block.rfind(b"\n") + 1
+            if cut:
+                remainder = block[cut:]
+                yield block[:cut].decode("utf-8", errors="replace").splitlines()
+            else:
+                remainder = block
+        if remainder:
+            yield remainder.decode("utf-8", errors="replace").splitlines()
+
+
+def _normalize_header(name: str) -> str:
+    return " ".join(name.strip().lower().replace("_", " ").split())
+
+
+def _column_map(names: List[str]) -> Dict[str, int]:
+    """Ledger field -> column index, for the header names that are recognised."""
+    mapping: Dict[str, int] = {}
+    for i, name in enumerate(names):
+        ledger_field = _COLUMN_ALIASES.get(_normalize_header(name)) or _COLUMN_ALIASES.get(name.strip().lower())
+        if ledger_field and ledger_field not in mapping:
+            mapping[ledger_field] = i
+    return mapping
+
+
+def _number(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(",", "").replace("$", "")
+    if not text or text == "-":
+        return math.nan
+    return float(text)
+
+
+def _month(date: str) -> str:
+    """
+    'YYYY-MM' from ISO dates (2026-02-14, 2026-02) or US dates (02/14/2026);
+    UNKNOWN_MONTH for anything else.
+    """
+    date = date.strip()
+    if len(date) >= 7 and date[4] in "-/" and date[:4].isdigit() and date[5:7].isdigit():
+        return f"{date[:4]}-{date[5:7]}"
+    parts = date.split("/")
+    if len(parts) == 3 and len(parts[2]) == 4 and parts[2].isdigit() and parts[0].strip().isdigit():
+        return f"{parts[2]}-{int(parts[0]):02d}"
+    return UNKNOWN_MONTH
+
+
+# ---------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------
+_FIELDS = ("category", "amount", "hours", "consultant", "date")
+
+
+def _row_getter(columns: Dict[str, int]) -> Callable[[list], tuple]:
+    """(category, amount, hours, consultant, date) from a list of cells."""
+    indexes = [columns.get(name) for name in _FIELDS]
+    if None not in indexes:
+        return itemgetter(*indexes)
+    return lambda cells: tuple(cells[i] if i is not None else "" for i in indexes)
+
+
+def _iter_batches(path: Path, chunk_bytes: int, summary: LedgerSummary) -> Iterator[List[tuple]]:
+    """
+    Yields one list of (category, amount, hours, consultant, date) tuples
+    of raw field values per chunk of the file.
+    """
+    getter = None
+    width = 0
+    for lines in iter_chunks(path, chunk_bytes):
+        if not lines:
+            continue
+        if not summary.format:
+            summary.format = detect_format(path, lines[0])
+
+        if summary.format == "jsonl":
+            batch = []
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    summary.skipped_rows += 1
+                    continue
+                if not isinstance(record, dict):
+                    summary.skipped_rows += 1
+                    continue
+                fields = {_COLUMN_ALIASES.get(_normalize_header(k), k): v for k, v in record.items()}
+                batch.append(tuple(fields.get(name, "") for name in _FIELDS))
+            yield batch
+            continue
+
+        if summary.format == "csv":
+            rows = list(csv.reader(lines))
+        else:
+            rows = [line.split("|") for line in lines if line.count("|") >= 3]
+        if getter is None and rows:
+            columns = _column_map(rows[0])
+            if "category" in columns and "amount" in columns:
+                rows = rows[1:]
+            else:
+                columns = {name: i for i, name in enumerate(_DEFAULT_COLUMNS)}
+            getter = _row_getter(columns)
+            width = max(columns.values()) + 1
+        batch = [getter(cells) for cells in rows if len(cells) >= width]
+        if len(batch) < len(rows):
+            summary.skipped_rows += sum(1 for cells in rows if cells and len(cells) < width)
+        yield batch
+
+
+def _clean_name(default: str) -> Callable[[object], str]:
+    return lambda raw: str(raw).strip() or default
+
+
+def _clean_month(raw) -> str:
+    return _month(str(raw)) if raw else UNKNOWN_MONTH
+
+
+def ingest_ledger(path, max_groups: int = 10_000, chunk_bytes: int = _CHUNK_BYTES,
+                  cache_dir: Path = LEDGER_CACHE_DIR, write_columns: bool = True,
+                  summary_rows: int = 200, force: bool = False) -> LedgerSummary:
+    """
+    Aggregates the ledger at path and writes its summary file and columnar
+    cache. Returns the cached result when the ledger content is unchanged.
+    summary_rows caps the consultant table of the summary file.
+    """
+    path = Path(path)
+    content_hash = cached_file_sha256(path)
+    columns_dir = cache_dir / content_hash[:16]
+    # Next to the manifest, so a cache hit always points at this content's summary
+    summary_path = columns_dir / f"{path.stem}-summary.txt"
+    manifest_path = columns_dir / "manifest.json"
+
+    if not force:
+        manifest = read_json(manifest_path)
+        if (manifest.get("version") == _FORMAT_VERSION and manifest.get("max_groups") == max_groups
+                and Path(manifest.get("summary", {}).get("summary_path", "")).exists()
+                and (manifest.get("columns") or not write_columns)):
+            summary = LedgerSummary(**manifest["summary"])
+            summary.cache_hit = True
+            return summary
+
+    start = time.perf_counter()
+    summary = LedgerSummary(source=str(path), content_hash=content_hash, format="")
+    groups = (
+        BoundedGroups(max_groups, _clean_name("Uncategorized")),
+        BoundedGroups(max_groups, _clean_name("Unassigned")),
+        BoundedGroups(max_groups, _clean_month),
+    )
+    hours_memo: Dict[object, float] = {}
+    grand_total = total_hours = personnel_cost = 0.0
+    rows = skipped = 0
+    if write_columns:
+        columns_dir.mkdir(parents=True, exist_ok=True)
+    files = {name: open(columns_dir / f"{name}.bin", "wb") for name in _COLUMN_TYPES} if write_columns else {}
+
+    # Every chunk allocates a few hundred thousand short-lived lists and
+    # tuples with no reference cycles; cyclic GC passes over them roughly
+    # double the parse time, so collection is paused while ingesting.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for batch in _iter_batches(path, chunk_bytes, summary):
+            # Hot loop: one pass per row with locals only; new raw values
+            # go through BoundedGroups.lookup once and are memoized after.
+            columns = {name: array(code) for name, code in _COLUMN_TYPES.items()}
+            code_columns = (columns["category"], columns["consultant"], columns["month"])
+            amount_column, hours_column = columns["amount"], columns["hours"]
+            for row in batch:
+                amount = row[1]
+                try:
+                    a = float(amount)
+                except (TypeError, ValueError):
+                    try:
+                        a = _number(amount)
+                    except ValueError:
+                        a = math.nan
+                if a != a:
+                    skipped += 1
+                    continue
+                h = hours_memo.get(row[2])
+                if h is None:
+                    try:
+                        h = _number(row[2]) if row[2] not in (None, "") else math.nan
+                    except ValueError:
+                        h = math.nan
+                    if len(hours_memo) < 1 << 16:
+                        hours_memo[row[2]] = h
+                rows += 1
+                grand_total += a
+                has_hours = h == h
+                if has_hours:
+                    total_hours += h
+                    personnel_cost += a
+                for group, raw, codes in zip(groups, (row[0], row[3], row[4]), code_columns):
+                    c = group.memo.get(raw)
+                    if c is None:
+                        c = group.lookup(raw)
+                    group.rows[c] += 1
+                    group.amounts[c] += a
+                    if has_hours:
+                        group.hours[c] += h
+                    codes.append(c)
+                amount_column.append(a)
+                hours_column.append(h)
+            for name, f in files.items():
+                columns[name].tofile(f)
+    except BaseException:
+        # No manifest points at partial column files; don't leave them behind
+        for f in files.values():
+            f.close()
+            Path(f.name).unlink(missing_ok=True)
+        raise
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        for f in files.values():
+            f.close()
+
+    categories, consultants, months = groups
+    summary.rows = rows
+    summary.skipped_rows += skipped
+    summary.overflow_rows = max(g.overflow_rows for g in groups)
+    summary.grand_total = round(grand_total, 2)
+    summary.total_hours = round(total_hours, 2)
+    summary.personnel_cost = round(personnel_cost, 2)
+    summary.by_category = categories.items()
+    summary.by_consultant = consultants.items()
+    summary.by_month = sorted(months.items(), key=lambda g: g["key"])
+    summary.summary_path = str(summary_path)
+    summary.columns_dir = str(columns_dir) if write_columns else ""
+
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(render_summary(summary, summary_rows))
+    summary.seconds = round(time.perf_counter() - start, 3)
+
+    columns_dir.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(manifest_path, {
+        "version": _FORMAT_VERSION,
+        "max_groups": max_groups,
+        "summary": summary.to_dict(),
+        "columns": {
+            "types": _COLUMN_TYPES,
+            "category": categories.names(),
+            "consultant": consultants.names(),
+            "month": months.names(),
+        } if write_columns else None,
+    })
+    return summary
+
+
+# ---------------------------------------------------------------
+# Summary file and columnar cache
+# ---------------------------------------------------------------
+def _group_table(title: str, label: str, groups: List[Dict[str, object]], limit: int = 0) -> List[str]:
+    shown = groups[:limit] if limit else groups
+    heading = title if len(shown) == len(groups) else f"{title} (top {len(shown)} of {len(groups)} by amount)"
+    lines = [heading, "", f"{label:28s} | Line Items | Amount (USD)   | Hours      | Avg Rate",
+             "-" * 80]
+    for g in shown:
+        rate = f"{g['amount'] / g['hours']:,.2f}" if g["hours"] else "-"
+        hours = f"{g['hours']:,.0f}" if g["hours"] else "-"
+        lines.append(f"{str(g['key'])[:28]:28s} | {g['rows']:10,d} | {g['amount']:14,.2f} | {hours:10s} | {rate}")
+    return lines + [""]
+
+
+def render_summary(summary: LedgerSummary, summary_rows: int = 200) -> str:
+    """The uploadable summary: totals plus per-category, per-consultant and per-month tables."""
+    name = Path(summary.source).name
+    lines = [
+        f"Ledger Summary - {name}",
+        "=" * (17 + len(name)),
+        "",
+        f"Source: {name} ({summary.format}, sha256 {summary.content_hash[:16]})",
+        f"Line Items: {summary.rows:,}",
+        f"Skipped Rows: {summary.skipped_rows:,}",
+    ]
+    if summary.overflow_rows:
+        lines.append(f"Rows grouped under {OTHER_KEY}: {summary.overflow_rows:,}")
+    lines += [
+        f"Total Personnel Cost: ${summary.personnel_cost:,.2f}",
+        f"Total Other Costs: ${summary.grand_total - summary.personnel_cost:,.2f}",
+        f"Grand Total: ${summary.grand_total:,.2f}",
+        f"Total Hours: {summary.total_hours:,.0f}",
+        f"Average Hourly Rate: ${summary.average_hourly_rate:,.2f}",
+        "",
+    ]
+    lines += _group_table("By Category", "Category", summary.by_category)
+    lines += _group_table("By Consultant", "Consultant", summary.by_consultant, summary_rows)
+    lines += _group_table("By Month", "Month", summary.by_month)
+    return "\n".join(lines)
+
+
+def load_columns(columns_dir) -> Dict[str, object]:
+    """
+    Loads the columnar cache written by ingest_ledger: the numeric columns
+    as arrays plus the category/consultant/month dictionaries (code ->
+    name).
+    """
+    columns_dir = Path(columns_dir)
+    manifest = read_json(columns_dir / "manifest.json")
+    spec = manifest.get("columns")
+    if not spec:
+        raise FileNotFoundError(f"No columnar cache in {columns_dir}")
+    rows = manifest["summary"]["rows"]
+    loaded: Dict[str, object] = {}
+    for name, code in spec["types"].items():
+        column = array(code)
+        with open(columns_dir / f"{name}.bin", "rb") as f:
+            column.fromfile(f, rows)
+        loaded[name] = column
+    for name in ("category", "consultant", "month"):
+        loaded[f"{name}_names"] = spec[name]
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate a large expense ledger into an uploadable summary.")
+    parser.add_argument("ledger", help="CSV, JSONL or pipe-table ledger")
+    parser.add_argument("--max-groups", type=int, default=10_000, help="keys kept per dimension")
+    parser.add_argument("--chunk-mb", type=int, default=_CHUNK_BYTES >> 20)
+    parser.add_argument("--no-columns", action="store_true", help="skip the columnar cache")
+    parser.add_argument("--force", action="store_true", help="ingest even if the ledger is unchanged")
+    args = parser.parse_args()
+
+    summary = ingest_ledger(args.ledger, max_groups=args.max_groups, chunk_bytes=args.chunk_mb << 20,
+                            write_columns=not args.no_columns, force=args.force)
+    state = "cached" if summary.cache_hit else f"{summary.seconds:.2f}s"
+    rate = summary.rows / summary.seconds if summary.seconds else 0
+    print(f"Ingested {summary.rows:,} rows ({summary.format}, {state}"
+          + (f", {rate:,.0f} rows/s" if not summary.cache_hit else "") + ")")
+    print(f"  Skipped: {summary.skipped_rows:,}   Grouped under {OTHER_KEY}: {summary.overflow_rows:,}")
+    print(f"  Grand total: ${summary.grand_total:,.2f}   Hours: {summary.total_hours:,.0f}")
+    print(f"  Summary: {summary.summary_path}")
+    if summary.columns_dir:
+        print(f"  Columns: {summary.columns_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Compiled Expense Policy Index for the RFP Expense Agent
+=======================================================
+Parses the numbered sections of expense_policy.txt once into a structured,
+precomputed index so policy lookups are deterministic dictionary lookups
+instead of the model re-reading the prose on every question:
+
+  - role -> hourly rate cap             (1. CONSULTANT RATE CAPS)
+  - travel / hotel / per diem limits    (2. TRAVEL EXPENSES)
+  - license approval threshold          (3. SOFTWARE & LICENSES)
+  - training budget per consultant      (4. TRAINING & MATERIALS)
+  - equipment approval threshold        (5. EQUIPMENT)
+  - margin / discount rules             (6. RFP SUBMISSION RULES)
+  - approval threshold bands            (7. APPROVAL THRESHOLDS)
+
+Compiled indexes are cached by file content hash.
+"""
+
+import bisect
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from cache_utils import cached_file_sha256
+
+POLICY_FILE_PATH = Path(__file__).parent / "expense_policy.txt"
+
+_SECTION = re.compile(r"^\s*(\d+)\.\s+(.+?)\s*$")
+_BULLET = re.compile(r"^\s*-\s+(.+?)\s*$")
+_MONEY = r"\$([\d,]+(?:\.\d+)?)"
+
+
+def _money(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") and not word.endswith("ss") else word
+
+
+def _words(text: str) -> FrozenSet[str]:
+    return frozenset(_singular(w) for w in re.findall(r"[a-z0-9]+", text.lower()))
+
+
+@dataclass
+class ApprovalBand:
+    """Amounts in [lower, upper] need approver; 'Under $X' bands exclude X."""
+    lower: float
+    upper: float
+    approver: str
+    rule: str
+    upper_inclusive: bool = True
+
+
+@dataclass
+class PolicyIndex:
+    """Structured view of expense_policy.txt."""
+    version: str = ""
+    content_hash: str = ""
+    sections: Dict[int, Tuple[str, List[str]]] = field(default_factory=dict)
+    rate_caps: Dict[str, float] = field(default_factory=dict)
+    travel: Dict[str, float] = field(default_factory=dict)
+    license_approval_over: Optional[float] = None
+    license_approver: str = ""
+    training_max_per_consultant: Optional[float] = None
+    equipment_approval_over: Optional[float] = None
+    equipment_approver: str = ""
+    min_profit_margin_pct: Optional[float] = None
+    discount_ceo_approval_over_pct: Optional[float] = None
+    approval_bands: List[ApprovalBand] = field(default_factory=list)
+
+    # Precomputed lookup structures (filled by _build_lookups)
+    _role_keys: Dict[FrozenSet[str], str] = field(default_factory=dict, repr=False)
+    _role_vocabulary: FrozenSet[str] = field(default_factory=frozenset, repr=False)
+    _band_bounds: List[float] = field(default_factory=list, repr=False)
+
+    def _build_lookups(self) -> None:
+        self._role_keys = {_words(role): role for role in self.rate_caps}
+        self._role_vocabulary = frozenset().union(*self._role_keys) if self._role_keys else frozenset()
+        self.approval_bands.sort(key=lambda b: b.lower)
+        self._band_bounds = [b.upper for b in self.approval_bands]
+
+    # -----------------------------------------------------------
+    # Lookups
+    # -----------------------------------------------------------
+    def policy_role(self, role_or_category: str) -> Optional[str]:
+        """
+        Maps a role or data.txt category to its policy role. Words that do
+        not occur in any policy role are dropped first, so
+        'Senior D365 Developer' resolves to 'Senior Developers' with a
+        single dictionary lookup.
+        """
+        key = _words(role_or_category) & self._role_vocabulary
+        return self._role_keys.get(key)
+
+    def rate_cap(self, role_or_category: str) -> Optional[float]:
+        """Hourly rate cap for a role, or None when the policy has no cap."""
+        role = self.policy_role(role_or_category)
+        return self.rate_caps[role] if role else None
+
+    def required_approval(self, amount: float) -> Optional[ApprovalBand]:
+        """The approval band that applies to amount; None for a negative (or NaN) amount."""
+        if not self.approval_bands or not amount >= 0:
+            return None
+        i = bisect.bisect_left(self._band_bounds, amount)
+        while i < len(self.approval_bands):
+            band = self.approval_bands[i]
+            if amount < band.upper or (band.upper_inclusive and amount == band.upper):
+                return band
+            i += 1
+        return self.approval_bands[-1]
+
+
+# ---------------------------------------------------------------
+# Compiler
+# ---------------------------------------------------------------
+def _split_sections(text: str) -> Tuple[str, Dict[int, Tuple[str, List[str]]]]:
+    version = ""
+    sections: Dict[int, Tuple[str, List[str]]] = {}
+    current: Optional[int] = None
+    for line in text.splitlines():
+        if not version:
+            m = re.search(r"Version\s+([\w.]+)", line)
+            if m:
+                version = m.group(1)
+        m = _SECTION.match(line)
+        if m:
+            current = int(m.group(1))
+            sections[current] = (m.group(2).strip(), [])
+            continue
+        m = _BULLET.match(line)
+        if m and current is not None:
+            sections[current][1].append(m.group(1))
+    return version, sections
+
+
+def _compile_rules(index: PolicyIndex) -> None:
+    for title, rules in index.sections.values():
+        upper_title = title.upper()
+        for rule in rules:
+            if "RATE CAP" in upper_title:
+                m = re.match(r"(.+?):\s*Maximum " + _MONEY + r"/hour", rule, re.I)
+                if m:
+                    index.rate_caps[m.group(1).strip()] = _money(m.group(2))
+
+            elif "TRAVEL" in upper_title:
+                m = re.search(r"travel budget per project:\s*" + _MONEY, rule, re.I)
+                if m:
+                    index.travel["max_per_project"] = _money(m.group(1))
+                m = re.search(r"per diem.*?:\s*" + _MONEY, rule, re.I)
+                if m:
+                    index.travel["per_diem"] = _money(m.group(1))
+                m = re.search(r"hotel maximum:\s*" + _MONEY, rule, re.I)
+                if m:
+                    index.travel["hotel_max_per_night"] = _money(m.group(1))
+
+            elif "LICENSE" in upper_title:
+                m = re.search(r"exceeding\s+" + _MONEY + r"\s+require\s+(.+?)\s+approval", rule, re.I)
+                if m:
+                    index.license_approval_over = _money(m.group(1))
+                    index.license_approver = m.group(2).strip()
+
+            elif "TRAINING" in upper_title:
+                m = re.search(r"training budget per consultant:\s*" + _MONEY, rule, re.I)
+                if m:
+                    index.training_max_per_consultant = _money(m.group(1))
+
+            elif "EQUIPMENT" in upper_title:
+                m = re.search(r"over\s+" + _MONEY + r"\s+require\s+(.+?)\s+approval", rule, re.I)
+                if m:
+                    index.equipment_approval_over = _money(m.group(1))
+                    index.equipment_approver = m.group(2).strip()
+
+            elif "RFP" in upper_title:
+                m = re.search(r"minimum\s+([\d.]+)%\s+profit margin", rule, re.I)
+                if m:
+                    index.min_profit_margin_pct = float(m.group(1))
+                m = re.search(r"discount.*?exceeding\s+([\d.]+)%", rule, re.I)
+                if m:
+                    index.discount_ceo_approval_over_pct = float(m.group(1))
+
+            elif "APPROVAL" in upper_title:
+                band = _parse_band(rule)
+                if band:
+                    index.approval_bands.append(band)
+
+
+def _parse_band(rule: str) -> Optional[ApprovalBand]:
+    m = re.match(r"Under\s+" + _MONEY + r":\s*(.+?)\s+approval", rule, re.I)
+    if m:
+        return ApprovalBand(0.0, _money(m.group(1)), m.group(2).strip(), rule, upper_inclusive=False)
+    m = re.match(_MONEY + r"\s*-\s*" + _MONEY + r":\s*(.+?)\s+approval", rule, re.I)
+    if m:
+        return ApprovalBand(_money(m.group(1)), _money(m.group(2)), m.group(3).strip(), rule)
+    m = re.match(r"Over\s+" + _MONEY + r":\s*(.+?)\s+approval", rule, re.I)
+    if m:
+        return ApprovalBand(_money(m.group(1)), math.inf, m.group(2).strip(), rule)
+    return None
+
+
+def compile_policy(text: str) -> PolicyIndex:
+    """Compiles policy text into a PolicyIndex."""
+    version, sections = _split_sections(text)
+    index = PolicyIndex(version=version, sections=sections)
+    _compile_rules(index)
+    index._build_lookups()
+    return index
+
+
+# content hash -> compiled index
+_INDEX_CACHE: Dict[str, PolicyIndex] = {}
+
+
+def load_policy_index(path=POLICY_FILE_PATH) -> PolicyIndex:
+    """Returns the compiled index for path, recompiling only when its content changed."""
+    content_hash = cached_file_sha256(path)
+    index = _INDEX_CACHE.get(content_hash)
+    if index is None:
+        index = compile_policy(Path(path).read_text())
+        index.content_hash = content_hash
+        _INDEX_CACHE[content_hash] = index
+    return index
+
+
+# ---------------------------------------------------------------
+# Bulk line-item checks
+# ---------------------------------------------------------------
+def _number(item: Dict[str, Any], key: str) -> Optional[float]:
+    """item[key] as a float (numeric strings such as "95" or "1,200" accepted), or None."""
+    value = item.get(key)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value.replace(",", "").lstrip("$")) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number, got {value!r}")
+
+
+def check_line_item(index: PolicyIndex, item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Checks one line item against the policy. Hourly items need a role (or
+    category) and either hourly_rate or amount + hours; other items are
+    matched on their category (travel, training, equipment, licenses).
+    Items with non-numeric values get status "invalid" and an error.
+    """
+    if not isinstance(item, dict):
+        return {"item": item, "status": "invalid", "error": "line item must be an object",
+                "violations": [], "approvals": []}
+    label = str(item.get("role") or item.get("category") or "")
+    result: Dict[str, Any] = {"item": item, "status": "ok", "violations": [], "approvals": []}
+
+    try:
+        rate = _number(item, "hourly_rate")
+        amount = _number(item, "amount")
+        hours = _number(item, "hours")
+        consultants = max(int(_number(item, "consultants") or 1), 1)
+    except ValueError as exc:
+        result["status"] = "invalid"
+        result["error"] = str(exc)
+        return result
+    if rate is None and amount is not None and hours:
+        rate = amount / hours
+
+    cap = index.rate_cap(label) if label else None
+    if rate is not None:
+        result["hourly_rate"] = round(float(rate), 2)
+        if cap is None:
+            result["status"] = "unknown_role"
+            return result
+        result["rate_cap"] = cap
+        if rate > cap:
+            result["violations"].append(
+                f"Rate ${rate:,.2f}/h exceeds {index.policy_role(label)} cap ${cap:,.2f}/h"
+            )
+
+    words = _words(label)
+    if amount is not None and rate is None:
+        if "travel" in words and "max_per_project" in index.travel:
+            limit = index.travel["max_per_project"]
+            if amount > limit:
+                result["violations"].append(f"Travel ${amount:,.2f} exceeds project maximum ${limit:,.2f}")
+        elif "training" in words and index.training_max_per_consultant is not None:
+            limit = index.training_max_per_consultant * consultants
+            if amount > limit:
+                result["violations"].append(
+                    f"Training ${amount:,.2f} exceeds ${index.training_max_per_consultant:,.2f} "
+                    f"x {consultants} consultant(s) = ${limit:,.2f}"
+                )
+        elif "equipment" in words and index.equipment_approval_over is not None:
+            if amount > index.equipment_approval_over:
+                result["approvals"].append(
+                    f"{index.equipment_approver} approval (equipment over ${index.equipment_approval_over:,.2f})"
+                )
+        elif ("license" in words or "software" in words) and index.license_approval_over is not None:
+            if amount > index.license_approval_over:
+                result["approvals"].append(
+                    f"{index.license_approver} approval (licenses over ${index.license_approval_over:,.2f})"
+                )
+
+    if result["violations"]:
+        result["status"] = "violation"
+    elif result["approvals"]:
+        result["status"] = "requires_approval"
+    return result
+
+
+def check_line_items(index: PolicyIndex, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Checks many line items in one pass and returns per-item results plus counts."""
+    results = [check_line_item(index, item) for item in items]
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return {"policy_version": index.version, "counts": counts, "results": results}
@@ -0,0 +1,267 @@
+"""
+Report Store for the RFP Expense Agent
+======================================
+SQLite-backed storage for expense reports and budget overrun alerts,
+replacing the one-text-file-per-call output of user_functions.py.
+
+  - Reports are indexed by report ID, project, submitter and date; alerts
+    by alert ID, category and date.
+  - Writes are durable (WAL journal, synchronous=FULL) and batched: a list
+    of records is committed in one transaction, so bulk submissions pay for
+    one fsync instead of one per record.
+  - Query and aggregate helpers back the agent's reporting tools.
+  - The original text format stays available through export_report_text /
+    export_alert_text (and REPORT_EXPORT_TEXT=true to write it on submit).
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_DB_PATH = Path(__file__).parent / "reports.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expense_reports (
+    report_id    TEXT PRIMARY KEY,
+    submitted_at TEXT NOT NULL,
+    submitter    TEXT NOT NULL,
+    project      TEXT NOT NULL,
+    description  TEXT NOT NULL,
+    amount       REAL NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'PENDING APPROVAL'
+);
+CREATE INDEX IF NOT EXISTS idx_reports_project   ON expense_reports(project);
+CREATE INDEX IF NOT EXISTS idx_reports_submitter ON expense_reports(submitter);
+CREATE INDEX IF NOT EXISTS idx_reports_date      ON expense_reports(submitted_at);
+
+CREATE TABLE IF NOT EXISTS budget_alerts (
+    alert_id        TEXT PRIMARY KEY,
+    created_at      TEXT NOT NULL,
+    category        TEXT NOT NULL,
+    budgeted_amount REAL NOT NULL,
+    actual_amount   REAL NOT NULL,
+    overrun         REAL NOT NULL,
+    overrun_pct     REAL NOT NULL,
+    reason          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_category ON budget_alerts(category);
+CREATE INDEX IF NOT EXISTS idx_alerts_date     ON budget_alerts(created_at);
+"""
+
+_REPORT_COLUMNS = ("report_id", "submitted_at", "submitter", "project", "description", "amount", "status")
+_ALERT_COLUMNS = ("alert_id", "created_at", "category", "budgeted_amount", "actual_amount",
+                  "overrun", "overrun_pct", "reason")
+
+_GROUP_BY = {
+    "project": "project",
+    "submitter": "submitter",
+    "date": "substr(submitted_at, 1, 10)",
+    "month": "substr(submitted_at, 1, 7)",
+}
+
+
+# ---------------------------------------------------------------
+# Legacy text format (kept for export)
+# ---------------------------------------------------------------
+def format_report_text(report: Dict[str, Any]) -> str:
+    return (
+        f"{'='*50}\n"
+        f"EXPENSE REPORT - {report['report_id']}\n"
+        f"{'='*50}\n"
+        f"Date:        {report['submitted_at']}\n"
+        f"Submitted by: {report['submitter']}\n"
+        f"Project:     {report['project']}\n"
+        f"Amount:      ${report['amount']:,.2f}\n"
+        f"{'='*50}\n"
+        f"Description:\n{report['description']}\n"
+        f"{'='*50}\n"
+        f"Status: {report['status']}\n"
+    )
+
+
+def format_alert_text(alert: Dict[str, Any]) -> str:
+    return (
+        f"{'='*50}\n"
+        f"BUDGET OVERRUN ALERT - {alert['alert_id']}\n"
+        f"{'='*50}\n"
+        f"Date:            {alert['created_at']}\n"
+        f"Category:        {alert['category']}\n"
+        f"Budgeted Amount: ${alert['budgeted_amount']:,.2f}\n"
+        f"Actual Amount:   ${alert['actual_amount']:,.2f}\n"
+        f"Overrun:         ${alert['overrun']:,.2f} ({alert['overrun_pct']:.1f}%)\n"
+        f"{'='*50}\n"
+        f"Reason: {alert['reason']}\n"
+        f"{'='*50}\n"
+        f"Action Required: MANAGEMENT REVIEW\n"
+    )
+
+
+def _date_upper_bound(date_to: str) -> str:
+    """'2026-03-01' -> '2026-03-01 23:59:59' so date-only bounds are inclusive."""
+    return f"{date_to} 23:59:59" if len(date_to) == 10 else date_to
+
+
+class ReportStore:
+    """Thread-safe SQLite store; one connection shared behind a lock."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            try:
+                yield self._db
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+
+    # -----------------------------------------------------------
+    # Batched writes
+    # -----------------------------------------------------------
+    def add_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        """Inserts many reports in a single committed transaction."""
+        rows = [tuple(r.get(c, "PENDING APPROVAL" if c == "status" else None) for c in _REPORT_COLUMNS)
+                for r in reports]
+        with self._transaction() as db:
+            db.executemany(
+                f"INSERT INTO expense_reports ({', '.join(_REPORT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _REPORT_COLUMNS)})",
+                rows,
+            )
+        return len(rows)
+
+    def add_alerts(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        """Inserts many budget alerts in a single committed transaction."""
+        rows = [tuple(a[c] for c in _ALERT_COLUMNS) for a in alerts]
+        with self._transaction() as db:
+            db.executemany(
+                f"INSERT INTO budget_alerts ({', '.join(_ALERT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _ALERT_COLUMNS)})",
+                rows,
+            )
+        return len(rows)
+
+    # -----------------------------------------------------------
+    # Queries
+    # -----------------------------------------------------------
+    def _select(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._select("SELECT * FROM expense_reports WHERE report_id = ?", [report_id.upper()])
+        return rows[0] if rows else None
+
+    def get_alert(self, alert_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._select("SELECT * FROM budget_alerts WHERE alert_id = ?", [alert_id.upper()])
+        return rows[0] if rows else None
+
+    def find_alert(self, category: str, reason: str, actual_amount: float) -> Optional[Dict[str, Any]]:
+        """The newest alert for the same category, reason and actual amount, if any."""
+        rows = self._select(
+            "SELECT * FROM budget_alerts WHERE category = ? AND reason = ? AND actual_amount = ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            [category, reason, actual_amount],
+        )
+        return rows[0] if rows else None
+
+    def query_reports(self, project: str = "", submitter: str = "", date_from: str = "",
+                      date_to: str = "", limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest first; project and submitter match exactly (case-insensitive)."""
+        clauses, params = [], []
+        if project:
+            clauses.append("project = ? COLLATE NOCASE")
+            params.append(project)
+        if submitter:
+            clauses.append("submitter = ? COLLATE NOCASE")
+            params.append(submitter)
+        if date_from:
+            clauses.append("submitted_at >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("submitted_at <= ?")
+            params.append(_date_upper_bound(date_to))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        return self._select(
+            f"SELECT * FROM expense_reports {where} ORDER BY submitted_at DESC LIMIT ?", params
+        )
+
+    def query_alerts(self, category: str = "", date_from: str = "", date_to: str = "",
+                     limit: int = 20) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if category:
+            clauses.append("category = ? COLLATE NOCASE")
+            params.append(category)
+        if date_from:
+            clauses.append("created_at >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("created_at <= ?")
+            params.append(_date_upper_bound(date_to))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        return self._select(
+            f"SELECT * FROM budget_alerts {where} ORDER BY created_at DESC LIMIT ?", params
+        )
+
+    def summarize_reports(self, group_by: str = "project") -> List[Dict[str, Any]]:
+        """Count, total and average amount per project, submitter, date or month."""
+        expression = _GROUP_BY.get(group_by)
+        if expression is None:
+            raise ValueError(f"group_by must be one of {', '.join(_GROUP_BY)}")
+        return self._select(
+            f"SELECT {expression} AS \"group\", COUNT(*) AS reports, "
+            f"ROUND(SUM(amount), 2) AS total_amount, ROUND(AVG(amount), 2) AS average_amount "
+            f"FROM expense_reports GROUP BY {expression} ORDER BY total_amount DESC",
+            [],
+        )
+
+    # -----------------------------------------------------------
+    # Export to the original text format
+    # -----------------------------------------------------------
+    def export_report_text(self, report_id: str, directory=None) -> Optional[Path]:
+        report = self.get_report(report_id)
+        if report is None:
+            return None
+        path = Path(directory or self.db_path.parent) / f"expense-report-{report['report_id']}.txt"
+        path.write_text(format_report_text(report))
+        return path
+
+    def export_alert_text(self, alert_id: str, directory=None) -> Optional[Path]:
+        alert = self.get_alert(alert_id)
+        if alert is None:
+            return None
+        path = Path(directory or self.db_path.parent) / f"budget-alert-{alert['alert_id']}.txt"
+        path.write_text(format_alert_text(alert))
+        return path
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_STORE: Optional[ReportStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    """Process-wide store at REPORT_DB_PATH (default: reports.sqlite next to this file)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = ReportStore(os.getenv("REPORT_DB_PATH") or DEFAULT_DB_PATH)
+        return _STORE
@@ -0,0 +1,192 @@
+"""
+Adaptive Run Driver for the RFP Expense Agent
+=============================================
+Replaces the fixed one-second poll inside runs.create_and_process with a
+run loop whose polling adapts to the run:
+
+  - a few fast polls first, so short runs are noticed quickly
+  - then exponentially growing intervals up to a cap, so long Code
+    Interpreter runs cost a handful of status requests instead of one per
+    second
+  - random jitter on every interval, so many sessions do not poll in step
+  - requires_action steps are answered through a ParallelToolExecutor
+    (one submit_tool_outputs request per step), after which the schedule
+    starts again from the fast polls
+
+Each run records its poll count, the time spent sleeping and an estimate of
+the wasted wait: the run changed state at some point during the sleep
+before the poll that saw it, on average half that sleep too late.
+
+Policies are named (RUN_POLL_POLICY=adaptive, fixed, ...) or given as JSON
+overrides of the adaptive policy, e.g. {"initial": 0.2, "max_interval": 3}.
+"""
+
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from tool_executor import ACTIVE_RUN_STATES, ParallelToolExecutor, run_status
+
+
+@dataclass(frozen=True)
+class PollPolicy:
+    """Poll schedule: fast_polls at initial, then growth by factor up to max_interval."""
+    name: str
+    initial: float = 0.25
+    fast_polls: int = 3
+    factor: float = 1.6
+    max_interval: float = 4.0
+    jitter: float = 0.2
+
+    def intervals(self, rng: random.Random) -> Iterator[float]:
+        """Sleep before each successive poll of one run phase."""
+        interval = self.initial
+        polls = 0
+        while True:
+            spread = interval * self.jitter
+            yield max(interval + rng.uniform(-spread, spread), 0.0)
+            polls += 1
+            if polls >= self.fast_polls:
+                interval = min(interval * self.factor, self.max_interval)
+
+
+POLICIES: Dict[str, PollPolicy] = {
+    # What runs.create_and_process does: one poll per second
+    "fixed": PollPolicy("fixed", initial=1.0, fast_polls=1, factor=1.0, max_interval=1.0, jitter=0.0),
+    "adaptive": PollPolicy("adaptive"),
+    "eager": PollPolicy("eager", initial=0.1, fast_polls=5, factor=1.5, max_interval=2.0),
+    "relaxed": PollPolicy("relaxed", initial=0.5, fast_polls=1, factor=2.0, max_interval=8.0),
+}
+
+
+def policy_from_spec(spec: str) -> PollPolicy:
+    """A named policy, or JSON overrides of the adaptive policy."""
+    spec = spec.strip()
+    if spec.startswith("{"):
+        return replace(POLICIES["adaptive"], name="custom", **json.loads(spec))
+    if spec not in POLICIES:
+        raise ValueError(f"Unknown poll policy '{spec}' (choose from {', '.join(POLICIES)} or JSON)")
+    return POLICIES[spec]
+
+
+class RunTimedOut(Exception):
+    """Raised by RunDriver.process when RUN_TIMEOUT_SECONDS expired; the run was cancelled."""
+
+    def __init__(self, run, seconds: float):
+        super().__init__(f"run {run.id} timed out after {seconds:.0f}s and was cancelled")
+        self.run = run
+        self.seconds = seconds
+
+
+@dataclass
+class RunStats:
+    """Polling cost of one run."""
+    polls: int = 0
+    tool_steps: int = 0
+    sleep_seconds: float = 0.0
+    wasted_wait: float = 0.0
+    seconds: float = 0.0
+    timed_out: bool = False
+
+
+class RunDriver:
+    """Creates a run and drives it to a final state with a PollPolicy."""
+
+    def __init__(self, agents_client, policy: PollPolicy, tool_executor: ParallelToolExecutor,
+                 timeout: float = 0.0, seed: Optional[int] = None):
+        self._client = agents_client
+        self.policy = policy
+        self.tool_executor = tool_executor
+        self.timeout = timeout
+        self._rng = random.Random(seed)
+        self.runs: List[RunStats] = []
+        self.last: Optional[RunStats] = None
+
+    @classmethod
+    def from_env(cls, agents_client, functions: Set[Callable[..., Any]], parallel_tools: bool) -> "RunDriver":
+        """
+        Configured from RUN_POLL_POLICY (adaptive when unset or 'sdk') and
+        RUN_TIMEOUT_SECONDS. Tool calls run on a ParallelToolExecutor,
+        with a single worker unless parallel_tools is set.
+        """
+        spec = os.getenv("RUN_POLL_POLICY", "sdk")
+        return cls(
+            agents_client,
+            policy_from_spec("adaptive" if spec in ("", "sdk") else spec),
+            ParallelToolExecutor.from_env(functions, max_workers=None if parallel_tools else 1),
+            timeout=float(os.getenv("RUN_TIMEOUT_SECONDS", "0")),
+        )
+
+    def process(self, thread_id: str, agent_id: str, **run_kwargs):
+        """
+        create_and_process replacement; returns the run in its final state.
+        Raises RunTimedOut when the run exceeds the timeout: the run is then
+        cancelled and its thread holds no answer for this turn.
+        """
+        stats = RunStats()
+        start = time.perf_counter()
+        run = self._client.runs.create(thread_id=thread_id, agent_id=agent_id, **run_kwargs)
+        status = run_status(run)
+        intervals = self.policy.intervals(self._rng)
+
+        while status in ACTIVE_RUN_STATES:
+            if status == "requires_action":
+                action = getattr(run.required_action, "submit_tool_outputs", None)
+                if action is None:
+                    run = self._client.runs.cancel(thread_id=thread_id, run_id=run.id)
+                else:
+                    run = self._client.runs.submit_tool_outputs(
+                        thread_id=thread_id, run_id=run.id,
+                        tool_outputs=self.tool_executor.execute(action.tool_calls),
+                    )
+                    stats.tool_steps += 1
+                # The next phase starts now: poll fast again
+                intervals = self.policy.intervals(self._rng)
+                status = run_status(run)
+                continue
+
+            if self.timeout and time.perf_counter() - start > self.timeout:
+                run = self._cancel(thread_id, run)
+                stats.timed_out = True
+                break
+
+            delay = next(intervals)
+            time.sleep(delay)
+            stats.sleep_seconds += delay
+            run = self._client.runs.get(thread_id=thread_id, run_id=run.id)
+            stats.polls += 1
+            new_status = run_status(run)
+            if new_status != status:
+                stats.wasted_wait += delay / 2
+                status = new_status
+
+        stats.seconds = time.perf_counter() - start
+        self.runs.append(stats)
+        self.last = stats
+        if stats.timed_out:
+            raise RunTimedOut(run, stats.seconds)
+        return run
+
+    def _cancel(self, thread_id: str, run, settle_seconds: float = 10.0):
+        """Cancels run and waits (bounded) until it leaves "cancelling", so the thread takes new messages."""
+        run = self._client.runs.cancel(thread_id=thread_id, run_id=run.id)
+        deadline = time.perf_counter() + settle_seconds
+        intervals = self.policy.intervals(self._rng)
+        while run_status(run) in ACTIVE_RUN_STATES and time.perf_counter() < deadline:
+            time.sleep(next(intervals))
+            run = self._client.runs.get(thread_id=thread_id, run_id=run.id)
+        return run
+
+    def summary(self) -> str:
+        if not self.runs:
+            return f"{self.policy.name} policy, no runs"
+        polls = sum(r.polls for r in self.runs)
+        wasted = sum(r.wasted_wait for r in self.runs)
+        return (f"{self.policy.name} policy: {len(self.runs)} run(s), {polls} poll(s) "
+                f"({polls / len(self.runs):.1f}/run), ~{wasted:.2f}s wasted wait")
+
+    def shutdown(self) -> None:
+        self.tool_executor.shutdown()
@@ -0,0 +1,441 @@
+"""
+HTTP Service for the RFP Expense Agent
+======================================
+Multi-user alternative to running one copy of agent.py per analyst.
+
+One process holds one async AgentsClient on a pooled aiohttp transport, one
+uploaded copy of data.txt / expense_policy.txt and one agent, and serves
+many concurrent users:
+
+  - Each session maps to its own thread.
+  - Requests of one session are queued and run in order; a full queue is
+    answered with 429.
+  - A global limit caps concurrent runs; requests beyond it wait, and once
+    too many are waiting new ones get 429 with Retry-After (backpressure).
+  - user_functions run in a thread pool through async wrappers, so a slow
+    tool never blocks the event loop.
+
+Endpoints:
+    POST   /sessions                      -> {"session_id", "thread_id"}
+    POST   /sessions/{id}/messages        {"prompt": "..."} -> {"answer", ...}
+    GET    /sessions/{id}/messages?limit= -> conversation so far
+    DELETE /sessions/{id}                 -> deletes the session's thread; its
+                                             pending requests get 409
+    GET    /health                        -> sessions, in-flight and rejected counts
+
+Usage:
+    python server.py --port 8080
+    AGENTS_BACKEND=fake python server.py   # local stand-in service, no endpoint needed
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from agent_registry import tag_metadata
+from instructions import ANALYZER_INSTRUCTIONS
+from tool_executor import offload_tools, run_error, run_status
+from user_functions import user_functions
+
+script_dir = Path(__file__).parent
+
+
+class Busy(Exception):
+    """Raised when a request is rejected for backpressure."""
+
+    def __init__(self, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class SessionClosed(Exception):
+    """Raised to requests whose session was deleted before they finished."""
+
+
+@dataclass
+class Session:
+    """One user conversation: a thread plus the queue of its pending requests."""
+    session_id: str
+    thread_id: str
+    queue: asyncio.Queue
+    worker: Optional[asyncio.Task] = None
+    current: Optional[asyncio.Future] = None   # result future of the running request
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class AnalyzerService:
+    """Shared agent, sessions, per-session queues and the global run limit."""
+
+    def __init__(self, agents_client, agent_id: str, max_concurrent_runs: int = 8,
+                 max_waiting: int = 32, session_queue_size: int = 4, session_idle_seconds: float = 1800):
+        self._client = agents_client
+        self.agent_id = agent_id
+        self._run_slots = asyncio.Semaphore(max_concurrent_runs)
+        self._max_waiting = max_waiting
+        self._session_queue_size = session_queue_size
+        self._session_idle_seconds = session_idle_seconds
+        self.sessions: Dict[str, Session] = {}
+        self.waiting = 0
+        self.in_flight = 0
+        self.stats = {"completed": 0, "failed": 0, "rejected": 0}
+
+    # -----------------------------------------------------------
+    # Sessions
+    # -----------------------------------------------------------
+    async def create_session(self) -> Session:
+        thread = await self._client.threads.create(metadata=tag_metadata(source="server"))
+        session = Session(uuid.uuid4().hex[:12], thread.id, asyncio.Queue(self._session_queue_size))
+        session.worker = asyncio.create_task(self._session_worker(session))
+        self.sessions[session.session_id] = session
+        return session
+
+    async def close_session(self, session_id: str) -> bool:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        # The worker fails the running request's future as it is cancelled
+        session.worker.cancel()
+        while not session.queue.empty():
+            _, done = session.queue.get_nowait()
+            self.waiting -= 1
+            if not done.done():
+                done.set_exception(SessionClosed("session deleted before the request ran"))
+        await self._client.threads.delete(session.thread_id)
+        return True
+
+    async def expire_idle_sessions(self) -> None:
+        """Background task: removes sessions idle longer than the configured limit."""
+        while True:
+            await asyncio.sleep(60)
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                idle = session.queue.empty() and session.current is None
+                if idle and now - session.last_used > self._session_idle_seconds:
+                    try:
+                        await self.close_session(session.session_id)
+                    except Exception as exc:
+                        print(f"  Could not delete thread {session.thread_id}: {exc}")
+
+    # -----------------------------------------------------------
+    # Requests
+    # -----------------------------------------------------------
+    async def ask(self, session: Session, prompt: str) -> Dict[str, Any]:
+        """Queues prompt on the session and waits for its answer."""
+        if self.waiting >= self._max_waiting:
+            self.stats["rejected"] += 1
+            raise Busy("server busy", retry_after=2)
+        loop = asyncio.get_running_loop()
+        done: asyncio.Future = loop.create_future()
+        try:
+            session.queue.put_nowait((prompt, done))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise Busy("too many pending requests for this session")
+        self.waiting += 1
+        session.last_used = time.monotonic()
+        return await done
+
+    async def _session_worker(self, session: Session) -> None:
+        """Runs the session's requests one at a time, in arrival order."""
+        while True:
+            prompt, done = await session.queue.get()
+            session.current = done
+            try:
+                result = await self._run(session, prompt)
+                if not done.done():
+                    done.set_result(result)
+            except asyncio.CancelledError:
+                # Session deleted mid-run: the caller must not wait forever
+                if not done.done():
+                    done.set_exception(SessionClosed("session deleted while the request was running"))
+                raise
+            except Exception as exc:
+                if not done.done():
+                    done.set_exception(exc)
+            finally:
+                session.current = None
+                session.last_used = time.monotonic()
+
+    async def _run(self, session: Session, prompt: str) -> Dict[str, Any]:
+        from azure.ai.agents.models import MessageRole
+
+        start = time.perf_counter()
+        counted_waiting = True
+        try:
+            async with self._run_slots:
+                self.waiting -= 1
+                counted_waiting = False
+                self.in_flight += 1
+                try:
+                    await self._client.messages.create(thread_id=session.thread_id, role="user", content=prompt)
+                    run = await self._client.runs.create_and_process(
+                        thread_id=session.thread_id, agent_id=self.agent_id
+                    )
+                    answer = None
+                    if run_status(run) == "completed":
+                        last_msg = await self._client.messages.get_last_message_text_by_role(
+                            thread_id=session.thread_id, role=MessageRole.AGENT
+                        )
+                        answer = last_msg.text.value if last_msg else ""
+                finally:
+                    self.in_flight -= 1
+        except asyncio.CancelledError:
+            if counted_waiting:
+                self.waiting = max(self.waiting - 1, 0)
+            raise
+
+        # failed, incomplete, cancelled and expired runs are all errors; the
+        # thread's last agent message would be an earlier answer
+        status = "completed" if run_status(run) == "completed" else "failed"
+        self.stats[status] += 1
+        result = {
+            "session_id": session.session_id,
+            "run_id": run.id,
+            "status": status,
+            "run_status": run_status(run),
+            "answer": answer,
+            "latency_s": round(time.perf_counter() - start, 3),
+        }
+        if status == "failed":
+            result["error"] = run_error(run)
+        return result
+
+    async def history(self, session: Session, limit: int = 50):
+        from azure.ai.agents.models import ListSortOrder
+
+        messages = []
+        async for msg in self._client.messages.list(
+            thread_id=session.thread_id, order=ListSortOrder.ASCENDING, limit=min(limit, 100)
+        ):
+            if msg.text_messages:
+                messages.append({"role": str(getattr(msg.role, "value", msg.role)),
+                                 "text": msg.text_messages[-1].text.value})
+            if len(messages) >= limit:
+                break
+        return messages
+
+
+# ---------------------------------------------------------------
+# HTTP handlers
+# ---------------------------------------------------------------
+routes = web.RouteTableDef()
+
+
+def _session_or_404(request) -> Session:
+    session = request.app["service"].sessions.get(request.match_info["session_id"])
+    if session is None:
+        raise web.HTTPNotFound(text='{"error": "unknown session"}', content_type="application/json")
+    return session
+
+
+@routes.post("/sessions")
+async def create_session(request):
+    session = await request.app["service"].create_session()
+    return web.json_response({"session_id": session.session_id, "thread_id": session.thread_id}, status=201)
+
+
+@routes.post("/sessions/{session_id}/messages")
+async def post_message(request):
+    session = _session_or_404(request)
+    try:
+        body = await request.json()
+    except ValueError:
+        return web.json_response({"error": "body must be JSON"}, status=400)
+    if not isinstance(body, dict):
+        return web.json_response({"error": "body must be a JSON object"}, status=400)
+    prompt = str(body.get("prompt", "")).strip()
+    if not prompt:
+        return web.json_response({"error": "prompt is required"}, status=400)
+    try:
+        result = await request.app["service"].ask(session, prompt)
+    except Busy as busy:
+        return web.json_response({"error": busy.reason}, status=429,
+                                 headers={"Retry-After": str(busy.retry_after)})
+    except SessionClosed as closed:
+        return web.json_response({"error": str(closed)}, status=409)
+    return web.json_response(result, status=200 if result["status"] == "completed" else 502)
+
+
+@routes.get("/sessions/{session_id}/messages")
+async def get_messages(request):
+    session = _session_or_404(request)
+    try:
+        limit = int(request.query.get("limit", "50"))
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        return web.json_response({"error": "limit must be a non-negative integer"}, status=400)
+    return web.json_response({"messages": await request.app["service"].history(session, limit)})
+
+
+@routes.delete("/sessions/{session_id}")
+async def delete_session(request):
+    found = await request.app["service"].close_session(request.match_info["session_id"])
+    return web.json_response({"deleted": found}, status=200 if found else 404)
+
+
+@routes.get("/health")
+async def health(request):
+    service = request.app["service"]
+    return web.json_response({
+        "agent_id": service.agent_id,
+        "sessions": len(service.sessions),
+        "in_flight": service.in_flight,
+        "waiting": service.waiting,
+        **service.stats,
+    })
+
+
+# ---------------------------------------------------------------
+# Startup / shutdown: one client, one upload, one agent; the agent and
+# its uploads are deleted again on shutdown
+# ---------------------------------------------------------------
+async def _connect(backend: str, endpoint: str, pool_size: int):
+    """Returns (agents_client, resources to close) for the configured backend."""
+    if backend == "fake":
+        from fake_agents import AsyncFakeAgentsClient
+        return AsyncFakeAgentsClient.from_env(), []
+
+    import aiohttp
+    from azure.core.pipeline.transport import AioHttpTransport
+    from azure.identity.aio import DefaultAzureCredential
+    from azure.ai.agents.aio import AgentsClient
+
+    # One pooled HTTP session shared by every request of every user
+    http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=pool_size))
+    credential = DefaultAzureCredential(
+        exclude_environment_credential=True,
+        exclude_managed_identity_credential=True,
+    )
+    client = AgentsClient(
+        endpoint=endpoint,
+        credential=credential,
+        transport=AioHttpTransport(session=http_session, session_owner=False),
+    )
+    return client, [credential, http_session]
+
+
+async def _delete_files(agents_client, file_ids: List[str]) -> None:
+    for file_id in file_ids:
+        try:
+            await agents_client.files.delete(file_id)
+        except Exception as exc:
+            print(f"  Could not delete file {file_id}: {exc}")
+
+
+async def _create_shared_agent(agents_client, model: str, tool_executor: ThreadPoolExecutor):
+    """The shared agent and the IDs of the files uploaded for it (deleted at shutdown)."""
+    from azure.ai.agents.models import (
+        AsyncFunctionTool,
+        AsyncToolSet,
+        CodeInterpreterTool,
+        FilePurpose,
+    )
+
+    data_file, policy_file = await asyncio.gather(
+        agents_client.files.upload_and_poll(file_path=str(script_dir / "data.txt"), purpose=FilePurpose.AGENTS),
+        agents_client.files.upload_and_poll(
+            file_path=str(script_dir / "expense_policy.txt"), purpose=FilePurpose.AGENTS
+        ),
+    )
+    file_ids = [data_file.id, policy_file.id]
+    toolset = AsyncToolSet()
+    toolset.add(CodeInterpreterTool(file_ids=file_ids))
+    toolset.add(AsyncFunctionTool(offload_tools(user_functions, tool_executor)))
+    agents_client.enable_auto_function_calls(toolset)
+
+    try:
+        agent = await agents_client.create_agent(
+            model=model,
+            name="rfp-expense-server-agent",
+            instructions=ANALYZER_INSTRUCTIONS,
+            toolset=toolset,
+            metadata=tag_metadata(source="server"),
+        )
+    except BaseException:
+        await _delete_files(agents_client, file_ids)
+        raise
+    return agent, file_ids
+
+
+def build_app(backend: str, endpoint: str, model: str, max_concurrent_runs: int, max_waiting: int,
+              session_queue_size: int, tool_workers: int, session_idle_seconds: float) -> web.Application:
+    app = web.Application()
+    app.add_routes(routes)
+
+    async def lifecycle(app):
+        tool_executor = ThreadPoolExecutor(tool_workers, thread_name_prefix="tools")
+        client, resources = await _connect(backend, endpoint, pool_size=max_concurrent_runs * 2)
+        agent, file_ids = await _create_shared_agent(client, model, tool_executor)
+        print(f"Agent created: {agent.name} (ID: {agent.id})")
+        service = AnalyzerService(client, agent.id, max_concurrent_runs, max_waiting,
+                                  session_queue_size, session_idle_seconds)
+        app["service"] = service
+        app["agents_client"] = client
+        sweeper = asyncio.create_task(service.expire_idle_sessions())
+
+        yield
+
+        sweeper.cancel()
+        for session_id in list(service.sessions):
+            try:
+                await service.close_session(session_id)
+            except Exception as exc:
+                print(f"  Could not delete session {session_id}: {exc}")
+        await client.delete_agent(agent.id)
+        await _delete_files(client, file_ids)
+        print("Agent and uploaded files deleted")
+        await client.close()
+        for resource in resources:
+            await resource.close()
+        tool_executor.shutdown(wait=False)
+
+    app.cleanup_ctx.append(lifecycle)
+    return app
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the RFP expense analyzer over HTTP.")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8080")))
+    parser.add_argument("--max-concurrent-runs", type=int, default=int(os.getenv("SERVER_MAX_CONCURRENT_RUNS", "8")))
+    parser.add_argument("--max-waiting", type=int, default=int(os.getenv("SERVER_MAX_WAITING", "32")),
+                        help="queued requests across all sessions before new ones get 429")
+    parser.add_argument("--session-queue", type=int, default=int(os.getenv("SERVER_SESSION_QUEUE", "4")),
+                        help="pending requests per session before new ones get 429")
+    parser.add_argument("--tool-workers", type=int, default=int(os.getenv("SERVER_TOOL_WORKERS", "8")))
+    parser.add_argument("--session-idle-seconds", type=float,
+                        default=float(os.getenv("SERVER_SESSION_IDLE_SECONDS", "1800")))
+    args = parser.parse_args()
+
+    backend = os.getenv("AGENTS_BACKEND", "azure").lower()
+    endpoint = os.getenv("PROJECT_ENDPOINT")
+    if backend != "fake" and (not endpoint or endpoint == "your_project_endpoint"):
+        print("ERROR: Please set PROJECT_ENDPOINT in the .env file.")
+        raise SystemExit(1)
+
+    app = build_app(
+        backend, endpoint, os.getenv("MODEL_DEPLOYMENT_NAME", "gpt-4.1"),
+        args.max_concurrent_runs, args.max_waiting, args.session_queue,
+        args.tool_workers, args.session_idle_seconds,
+    )
+    print("\n" + "=" * 60)
+    print("RFP EXPENSE AGENT - HTTP Service")
+    print("=" * 60)
+    print(f"Backend: {backend}   Listening on http://{args.host}:{args.port}\n")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
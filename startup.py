@@ -0,0 +1,140 @@
+"""
+Startup Pipeline for the RFP Expense Agent
+==========================================
+Runs the independent startup steps of agent.py concurrently instead of one
+after another:
+
+    connect (SDK imports + client) ──┬── token prefetch
+                                     ├── upload data.txt ──────────┐
+                                     ├── upload expense_policy.txt ┴── create agent
+                                     └── create thread
+
+Steps are submitted to a small thread pool and return futures; the script
+only blocks where it needs a result. Every step is timed, and
+breakdown_lines() renders when each one started and finished relative to
+startup, next to what the same steps would have cost back to back.
+
+PARALLEL_STARTUP=false runs each step inline as it is submitted, which
+keeps the same timings output for comparison.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Token audience for Foundry projects and the Agents service
+TOKEN_SCOPE = "https://ai.azure.com/.default"
+
+# Refresh cached tokens this long before they expire
+_TOKEN_REFRESH_MARGIN = 300
+
+
+@dataclass
+class StepTiming:
+    """Start and end of one startup step, relative to pipeline creation."""
+    name: str
+    start: float
+    end: Optional[float] = None
+
+    @property
+    def seconds(self) -> float:
+        return (self.end or self.start) - self.start
+
+
+class PrefetchingCredential:
+    """
+    Token credential wrapper that shares one token per scope between
+    threads. The startup token prefetch and the first requests of the
+    uploads and thread creation all wait for the same token request, and
+    later requests reuse it until shortly before it expires.
+    """
+
+    def __init__(self, credential):
+        self._credential = credential
+        self._tokens: Dict[Tuple[str, ...], Any] = {}
+        self._locks: Dict[Tuple[str, ...], threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def get_token(self, *scopes: str, claims: Optional[str] = None, tenant_id: Optional[str] = None,
+                  **kwargs):
+        if claims or tenant_id:
+            return self._credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+        key = tuple(sorted(scopes))
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            token = self._tokens.get(key)
+            if token is None or token.expires_on - _TOKEN_REFRESH_MARGIN < time.time():
+                token = self._credential.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+            return token
+
+    def close(self) -> None:
+        close = getattr(self._credential, "close", None)
+        if close:
+            close()
+
+
+class StartupPipeline:
+    """Thread pool plus a timing log for the startup steps."""
+
+    def __init__(self, parallel: bool = True, max_workers: int = 4):
+        self.parallel = parallel
+        self.started_at = time.perf_counter()
+        self.steps: List[StepTiming] = []
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="startup") if parallel else None
+
+    def _timed_call(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        step = StepTiming(name, time.perf_counter() - self.started_at)
+        with self._lock:
+            self.steps.append(step)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            step.end = time.perf_counter() - self.started_at
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Starts a step in the background (or inline when not parallel)."""
+        if self._pool is not None:
+            return self._pool.submit(self._timed_call, name, fn, *args, **kwargs)
+        future: Future = Future()
+        try:
+            future.set_result(self._timed_call(name, fn, *args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    @contextmanager
+    def step(self, name: str):
+        """Times a step that runs on the calling thread."""
+        step = StepTiming(name, time.perf_counter() - self.started_at)
+        with self._lock:
+            self.steps.append(step)
+        try:
+            yield
+        finally:
+            step.end = time.perf_counter() - self.started_at
+
+    def finish(self) -> float:
+        """Shuts the pool down and returns the wall time since startup began."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        self.finished_at = time.perf_counter()
+        return self.finished_at - self.started_at
+
+    def breakdown_lines(self) -> List[str]:
+        """Per-step start/end offsets, plus wall time vs the serial sum."""
+        wall = (self.finished_at or time.perf_counter()) - self.started_at
+        lines = [f"  {'Step':30s} {'start':>7s} {'end':>7s} {'time':>7s}"]
+        for step in sorted(self.steps, key=lambda s: s.start):
+            end = f"{step.end:6.2f}s" if step.end is not None else "   ...."
+            lines.append(f"  {step.name:30s} {step.start:6.2f}s {end} {step.seconds:6.2f}s")
+        serial = sum(s.seconds for s in self.steps)
+        mode = "parallel" if self.parallel else "serial"
+        lines.append(f"  Startup total: {wall:.2f}s ({mode}; steps back to back: {serial:.2f}s)")
+        return lines
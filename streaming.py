@@ -0,0 +1,111 @@
+"""
+Streaming Turns for the RFP Expense Agent
+=========================================
+Alternative to runs.create_and_process + get_last_message_text_by_role.
+
+The run is started with agents_client.runs.stream(), message deltas are
+printed as they arrive and the answer text is assembled from the deltas, so
+no extra message fetch is needed afterwards. When the agent asks for one of
+the user_functions mid-run, the SDK executes it through the toolset
+registered with enable_auto_function_calls and keeps streaming on the same
+event handler.
+"""
+
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from azure.ai.agents.models import AgentEventHandler, MessageDeltaChunk, ThreadRun
+
+from tool_executor import run_error, run_status
+
+
+@dataclass
+class StreamedTurn:
+    """Result and timings of one streamed turn."""
+    text: str
+    status: str              # lowercase run status; "completed" on success
+    error: Optional[str]
+    time_to_first_token: Optional[float]
+    total_time: float
+    run: Optional["ThreadRun"] = None
+
+
+class ConsoleStreamHandler(AgentEventHandler):
+    """Prints text deltas to stdout and records time-to-first-token."""
+
+    def __init__(self, prefix: str = "\nAgent: ", out=sys.stdout):
+        super().__init__()
+        self._prefix = prefix
+        self._out = out
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.parts: List[str] = []
+        self.run: Optional[ThreadRun] = None
+        self.error: Optional[str] = None
+
+    def on_message_delta(self, delta: "MessageDeltaChunk") -> None:
+        text = delta.text
+        if not text:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self._out.write(self._prefix)
+        self.parts.append(text)
+        self._out.write(text)
+        self._out.flush()
+
+    def on_thread_run(self, run: "ThreadRun") -> None:
+        self.run = run
+
+    def on_error(self, data: str) -> None:
+        self.error = data
+
+    def finish(self) -> None:
+        """Ends the streamed answer line."""
+        if self.parts:
+            self._out.write("\n")
+            self._out.flush()
+
+
+def stream_turn(agents_client, thread_id: str, agent_id: str, **run_kwargs) -> StreamedTurn:
+    """
+    Runs the agent on thread_id with streaming output and returns the
+    assembled answer with its time-to-first-token and total turn time.
+    Extra keyword arguments are passed through to runs.stream().
+    """
+    handler = ConsoleStreamHandler()
+    with agents_client.runs.stream(
+        thread_id=thread_id,
+        agent_id=agent_id,
+        event_handler=handler,
+        **run_kwargs,
+    ) as stream:
+        stream.until_done()
+    finished_at = time.perf_counter()
+
+    # Anything but "completed" (failed, incomplete after max_prompt_tokens,
+    # cancelled, expired) is a failed turn
+    status = run_status(handler.run) if handler.run else "unknown"
+    error = handler.error
+    if handler.run is not None and status != "completed":
+        error = error or run_error(handler.run)
+    handler.finish()
+
+    return StreamedTurn(
+        text="".join(handler.parts),
+        status=status,
+        error=error,
+        time_to_first_token=(
+            handler.first_token_at - handler.started_at if handler.first_token_at else None
+        ),
+        total_time=finished_at - handler.started_at,
+        run=handler.run,
+    )
+
+
+def format_timings(turn: StreamedTurn) -> str:
+    """Short per-turn timing line shown after each streamed answer."""
+    ttft = f"{turn.time_to_first_token:.2f}s" if turn.time_to_first_token is not None else "n/a"
+    return f"  (first token: {ttft} | turn: {turn.total_time:.2f}s)"
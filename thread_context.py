@@ -0,0 +1,167 @@
+"""
+Bounded Thread Context for the RFP Expense Agent
+================================================
+Keeps long chat sessions from sending an ever-growing history with every
+run:
+
+  - Window: runs only see the last CONTEXT_WINDOW_MESSAGES messages of the
+    thread (truncation_strategy=last_messages) and, optionally, at most
+    CONTEXT_MAX_PROMPT_TOKENS prompt tokens.
+  - Memory: turns that fall out of the window are folded into a compact
+    summary (question + first sentence of the answer), capped at
+    CONTEXT_MEMORY_TOKENS. The summary travels with every run as
+    additional instructions, so the agent still knows what was discussed.
+  - Rollover: after CONTEXT_ROLLOVER_TURNS turns the session moves to a
+    fresh thread; the summary carries the earlier turns across.
+
+The summary is built locally without an extra model call. iter_messages()
+pages through a thread's messages lazily for the conversation log.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List
+
+from azure.ai.agents.models import ListSortOrder, TruncationObject, TruncationStrategy
+
+from agent_registry import tag_metadata
+from grounding import estimate_tokens
+
+_QUESTION_CHARS = 160
+_ANSWER_CHARS = 200
+
+
+@dataclass
+class Turn:
+    """One question/answer pair on the current thread."""
+    prompt: str
+    answer: str
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = re.sub(r"\s+", " ", text).strip()
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= limit else sentence[:limit - 3].rstrip() + "..."
+
+
+def summarize_turn(turn: Turn) -> str:
+    """One compact memory line for a turn."""
+    question = re.sub(r"\s+", " ", turn.prompt).strip()
+    if len(question) > _QUESTION_CHARS:
+        question = question[:_QUESTION_CHARS - 3].rstrip() + "..."
+    return f"- Q: {question} | A: {_first_sentence(turn.answer, _ANSWER_CHARS)}"
+
+
+class ThreadContext:
+    """
+    Tracks the turns of the session's current thread and produces the
+    keyword arguments that bound each run's context.
+    """
+
+    def __init__(self, agents_client, thread, window_messages: int = 0, max_prompt_tokens: int = 0,
+                 memory_tokens: int = 400, rollover_turns: int = 0):
+        self._client = agents_client
+        self.thread = thread
+        self.threads: List[Any] = [thread]
+        self.window_messages = window_messages
+        self.max_prompt_tokens = max_prompt_tokens
+        self.memory_tokens = memory_tokens
+        self.rollover_turns = rollover_turns
+        self.turns: List[Turn] = []
+        self.memory: List[str] = []
+        self.folded_turns = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.window_messages or self.max_prompt_tokens or self.rollover_turns)
+
+    def memory_text(self) -> str:
+        if not self.memory:
+            return ""
+        return "CONVERSATION MEMORY (earlier turns, summarized):\n" + "\n".join(self.memory)
+
+    def run_kwargs(self, additional_instructions: str = "") -> Dict[str, Any]:
+        """Window, token cap and memory for the next run, merged with other instructions."""
+        kwargs: Dict[str, Any] = {}
+        if self.window_messages:
+            kwargs["truncation_strategy"] = TruncationObject(
+                type=TruncationStrategy.LAST_MESSAGES, last_messages=self.window_messages,
+            )
+        if self.max_prompt_tokens:
+            kwargs["max_prompt_tokens"] = self.max_prompt_tokens
+        instructions = "\n\n".join(p for p in (self.memory_text(), additional_instructions) if p)
+        if instructions:
+            kwargs["additional_instructions"] = instructions
+        return kwargs
+
+    def history_text(self) -> str:
+        """
+        Everything the next run sees of the conversation: the memory lines
+        plus the turns still on the current thread. Empty before the first
+        turn.
+        """
+        lines = list(self.memory)
+        lines += [f"- Q: {turn.prompt} | A: {turn.answer}" for turn in self.turns[self.folded_turns:]]
+        return "\n".join(lines)
+
+    def record_turn(self, prompt: str, answer: str) -> bool:
+        """
+        Adds a finished turn, folds turns that left the window into memory
+        and rolls over to a fresh thread when due. Returns True after a
+        rollover.
+        """
+        self.turns.append(Turn(prompt, answer))
+        if self.window_messages:
+            # Each turn is a user and an agent message
+            keep = max(self.window_messages // 2, 1)
+            while len(self.turns) - self.folded_turns > keep:
+                self._fold(self.turns[self.folded_turns])
+                self.folded_turns += 1
+
+        if self.rollover_turns and len(self.turns) >= self.rollover_turns:
+            self.rollover()
+            return True
+        return False
+
+    def note_local_turn(self, prompt: str, answer: str) -> None:
+        """
+        A turn answered without the thread (intent router) goes straight
+        into memory, so follow-up questions to the agent can refer to it.
+        """
+        self._fold(Turn(prompt, answer))
+
+    def _fold(self, turn: Turn) -> None:
+        self.memory.append(summarize_turn(turn))
+        while len(self.memory) > 1 and estimate_tokens("\n".join(self.memory)) > self.memory_tokens:
+            self.memory.pop(0)
+
+    def rollover(self) -> None:
+        """Starts a fresh thread; every turn of the old one is kept only as memory."""
+        for turn in self.turns[self.folded_turns:]:
+            self._fold(turn)
+        previous = self.thread
+        self.thread = self._client.threads.create(metadata=tag_metadata(rolled_over_from=previous.id))
+        self.threads.append(self.thread)
+        self.turns = []
+        self.folded_turns = 0
+
+    def summary(self) -> str:
+        return (f"{len(self.threads)} thread(s), {len(self.memory)} memory line(s) "
+                f"(~{estimate_tokens(self.memory_text()) if self.memory else 0} tokens)")
+
+
+def iter_messages(agents_client, thread_id: str, page_size: int = 20) -> Iterator[Any]:
+    """
+    Yields a thread's messages oldest first, fetching one page of
+    page_size messages at a time as the caller consumes them.
+    """
+    pages = agents_client.messages.list(
+        thread_id=thread_id,
+        order=ListSortOrder.ASCENDING,
+        limit=page_size,
+    )
+    for page in pages.by_page():
+        for message in page:
+            yield message
+
@@ -0,0 +1,154 @@
+"""
+Parallel Tool Execution for the RFP Expense Agent
+=================================================
+Alternative to the auto function calling of runs.create_and_process, which
+runs the user_functions of one required-action step one after another.
+
+ParallelToolExecutor dispatches all function calls of a step to a thread
+pool at once, waits for each with its own timeout and returns the outputs
+in the order of the calls, ready for a single submit_tool_outputs request.
+A call that times out or raises produces a JSON error output instead, so
+the run always receives an output for every call. A timed-out function is
+left to finish on its pool thread (threads cannot be interrupted); its
+result is discarded. Side-effecting tools (answer_cache.SIDE_EFFECT_TOOLS)
+are therefore never timed out: the model would retry a write that is
+still running and store a duplicate report or alert.
+
+run_driver.RunDriver drives the run and hands each requires_action step to
+the executor (PARALLEL_TOOLS=true).
+
+offload_tools serves the async clients (server.py, batch_runner.py), whose
+AsyncFunctionTool awaits each tool: the sync user_functions run on worker
+threads so a slow tool never blocks the event loop.
+"""
+
+import asyncio
+import functools
+import json
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from azure.ai.agents.models import ToolOutput
+
+from answer_cache import SIDE_EFFECT_TOOLS
+
+# Run states in which the service is still working on the run
+ACTIVE_RUN_STATES = ("queued", "in_progress", "requires_action", "cancelling")
+
+
+def run_status(run) -> str:
+    """A run's status as a lowercase string (enum or plain value)."""
+    return str(getattr(run.status, "value", run.status)).lower()
+
+
+def run_error(run) -> str:
+    """Why a run did not complete: last_error, incomplete_details or its status."""
+    for detail in (getattr(run, "last_error", None), getattr(run, "incomplete_details", None)):
+        if detail:
+            return str(getattr(detail, "message", None) or getattr(detail, "reason", None) or detail)
+    return f"run ended with status {run_status(run)}"
+
+
+def offload_tools(functions: Set[Callable[..., Any]],
+                  executor: Optional[Executor] = None) -> Set[Callable[..., Any]]:
+    """
+    Wraps each sync tool in an async function that runs it on executor
+    (the event loop's default executor when None). functools.wraps keeps
+    name, docstring and signature, so AsyncFunctionTool builds identical
+    definitions.
+    """
+    def offload(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(func, **kwargs))
+        return wrapper
+    return {offload(f) for f in functions}
+
+
+class ParallelToolExecutor:
+    """Runs the function calls of one required action concurrently."""
+
+    def __init__(self, functions: Set[Callable[..., Any]], max_workers: int = 8,
+                 timeout: float = 30.0, timeouts: Optional[Dict[str, float]] = None,
+                 untimed: Set[str] = SIDE_EFFECT_TOOLS):
+        self.functions = {f.__name__: f for f in functions}
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.untimed = set(untimed)
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="tool")
+        self.steps = 0
+        self.calls = 0
+        self.timed_out = 0
+        self.failed = 0
+        self.step_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, functions: Set[Callable[..., Any]],
+                 max_workers: Optional[int] = None) -> "ParallelToolExecutor":
+        """
+        Configured from TOOL_WORKERS (unless max_workers is given),
+        TOOL_TIMEOUT_SECONDS and TOOL_TIMEOUTS (JSON of per-tool overrides,
+        e.g. {"submit_expense_report": 60}).
+        """
+        return cls(
+            functions,
+            max_workers=max_workers or int(os.getenv("TOOL_WORKERS", "8")),
+            timeout=float(os.getenv("TOOL_TIMEOUT_SECONDS", "30")),
+            timeouts=json.loads(os.getenv("TOOL_TIMEOUTS") or "{}"),
+        )
+
+    def _call(self, name: str, arguments: str) -> str:
+        function = self.functions.get(name)
+        if function is None:
+            return json.dumps({"error": f"Function {name} is not available"})
+        kwargs = json.loads(arguments) if arguments else {}
+        output = function(**kwargs)
+        return output if isinstance(output, str) else json.dumps(output)
+
+    def execute(self, tool_calls) -> List[ToolOutput]:
+        """
+        Executes the function calls of a required action and returns one
+        ToolOutput per call, in call order. Non-function calls are skipped.
+        """
+        start = time.perf_counter()
+        submitted = []
+        for call in tool_calls:
+            function = getattr(call, "function", None)
+            if function is None:
+                continue
+            future = self._pool.submit(self._call, function.name, function.arguments)
+            if function.name in self.untimed:
+                deadline = None
+            else:
+                deadline = start + self.timeouts.get(function.name, self.timeout)
+            submitted.append((call.id, function.name, future, deadline))
+
+        outputs = []
+        for call_id, name, future, deadline in submitted:
+            remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            try:
+                output = future.result(timeout=remaining)
+            except FutureTimeout:
+                self.timed_out += 1
+                output = json.dumps({"error": f"{name} timed out after "
+                                              f"{self.timeouts.get(name, self.timeout):g}s"})
+            except Exception as exc:
+                self.failed += 1
+                output = json.dumps({"error": f"{type(exc).__name__}: {exc}"})
+            outputs.append(ToolOutput(tool_call_id=call_id, output=output))
+
+        self.steps += 1
+        self.calls += len(submitted)
+        self.step_seconds += time.perf_counter() - start
+        return outputs
+
+    def summary(self) -> str:
+        return (f"{self.calls} call(s) in {self.steps} step(s), {self.step_seconds:.2f}s, "
+                f"{self.timed_out} timed out, {self.failed} failed ({self.max_workers} workers)")
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,130 @@
+"""
+Upload Cache for the RFP Expense Agent
+======================================
+Keeps a local manifest that maps file content hashes to the remote file IDs
+returned by agents_client.files.upload_and_poll().
+
+On startup an unchanged file reuses its existing remote ID (verified with a
+single files.get call) and only files whose content changed are uploaded
+again. The manifest is scoped per project endpoint, because file IDs are
+only valid inside the project that issued them.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from cache_utils import CACHE_DIR, file_sha256, read_json, write_json_atomic
+
+MANIFEST_PATH = CACHE_DIR / "uploads.json"
+
+
+@dataclass
+class UploadResult:
+    """Outcome of a cached upload: the remote file ID and how it was obtained."""
+    file_id: str
+    file_name: str
+    cache_hit: bool
+    seconds: float
+    saved_seconds: float = 0.0
+
+
+class UploadCache:
+    """
+    Content-hash keyed upload manifest.
+
+    Each entry records the remote file ID and how long the original upload
+    took, so a cache hit can report the time it saved. Uploads of different
+    files may run concurrently; manifest updates are serialized.
+    """
+
+    def __init__(self, agents_client, scope: str, manifest_path: Path = MANIFEST_PATH):
+        self._client = agents_client
+        self._scope = scope
+        self._manifest_path = Path(manifest_path)
+        self._manifest = self._load()
+        self._lock = threading.Lock()
+        self.results = []
+
+    # -----------------------------------------------------------
+    # Manifest persistence
+    # -----------------------------------------------------------
+    def _load(self) -> Dict[str, Any]:
+        manifest = read_json(self._manifest_path)
+        manifest.setdefault("scopes", {})
+        return manifest
+
+    def _save(self) -> None:
+        write_json_atomic(self._manifest_path, self._manifest)
+
+    @property
+    def _entries(self) -> Dict[str, Any]:
+        return self._manifest["scopes"].setdefault(self._scope, {})
+
+    # -----------------------------------------------------------
+    # Upload with reuse
+    # -----------------------------------------------------------
+    def upload(self, file_path, purpose) -> UploadResult:
+        """
+        Returns the remote file ID for file_path, uploading only when no
+        live remote copy of the same content exists.
+        """
+        file_path = Path(file_path)
+        key = f"{purpose}:{file_sha256(file_path)}"
+        with self._lock:
+            entry = self._entries.get(key)
+
+        start = time.perf_counter()
+        if entry is not None:
+            try:
+                self._client.files.get(entry["file_id"])
+                elapsed = time.perf_counter() - start
+                result = UploadResult(
+                    file_id=entry["file_id"],
+                    file_name=file_path.name,
+                    cache_hit=True,
+                    seconds=elapsed,
+                    saved_seconds=max(entry.get("upload_seconds", 0.0) - elapsed, 0.0),
+                )
+                with self._lock:
+                    self.results.append(result)
+                return result
+            except ResourceNotFoundError:
+                # Remote file was deleted - fall through and upload again
+                with self._lock:
+                    self._entries.pop(key, None)
+
+        uploaded = self._client.files.upload_and_poll(
+            file_path=str(file_path),
+            purpose=purpose,
+        )
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._entries[key] = {
+                "file_id": uploaded.id,
+                "file_name": file_path.name,
+                "uploaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "upload_seconds": round(elapsed, 3),
+            }
+            self._save()
+
+        result = UploadResult(
+            file_id=uploaded.id,
+            file_name=file_path.name,
+            cache_hit=False,
+            seconds=elapsed,
+        )
+        with self._lock:
+            self.results.append(result)
+        return result
+
+    def summary(self) -> str:
+        """One-line hit/miss and time-saved summary for the startup banner."""
+        hits = sum(1 for r in self.results if r.cache_hit)
+        misses = len(self.results) - hits
+        saved = sum(r.saved_seconds for r in self.results)
+        return f"{hits} hit(s), {misses} miss(es), ~{saved:.1f}s saved"
@@ -9,97 +9,418 @@ the user's request and the function signatures.
 """
 
 import json
-import uuid
+import os
 from pathlib import Path
 from typing import Any, Callable, Set
-from datetime import datetime
+
+from expense_analytics import (
+    DATA_FILE_PATH,
+    compare_to_caps,
+    consultant_rates,
+    expense_totals,
+    load_expense_table,
+    rate_statistics,
+    sweep_overruns,
+)
+from expense_records import prepare_alerts, prepare_reports
+from policy_index import check_line_items, load_policy_index
+from report_store import get_report_store
+
+
+def _export_text_enabled() -> bool:
+    return os.getenv("REPORT_EXPORT_TEXT", "false").lower() == "true"
+
+
+def _parse_items(items_json: str, argument: str):
+    """
+    Parses a JSON array (or single object) tool argument into a list.
+    Raises ValueError naming the argument for invalid JSON or any other
+    JSON value.
+    """
+    try:
+        items = json.loads(items_json)
+    except (TypeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"{argument} is not valid JSON: {exc}") from None
+    if isinstance(items, dict):
+        return [items]
+    if not isinstance(items, list):
+        raise ValueError(f"{argument} must be a JSON array of objects or a single object")
+    return items
+
+
+def _store_reports(items):
+    """Validates and stores report items in one write; returns per-item statuses."""
+    store = get_report_store()
+    rows, statuses = prepare_reports(items)
+    if rows:
+        store.add_reports(rows)
+        if _export_text_enabled():
+            directory = Path(__file__).parent
+            for row, status in zip(rows, (s for s in statuses if s["status"] == "submitted")):
+                status["file"] = store.export_report_text(row["report_id"], directory).name
+    return statuses
+
+
+def _store_alerts(items):
+    """Validates and stores overrun items in one write; returns per-item statuses."""
+    store = get_report_store()
+    rows, statuses = prepare_alerts(items)
+    if rows:
+        store.add_alerts(rows)
+        if _export_text_enabled():
+            directory = Path(__file__).parent
+            for row, status in zip(rows, (s for s in statuses if s["status"] == "flagged")):
+                status["file"] = store.export_alert_text(row["alert_id"], directory).name
+    return statuses
+
+
+def _bulk_summary(statuses, ok_status: str) -> str:
+    ok = sum(1 for s in statuses if s["status"] == ok_status)
+    return json.dumps({
+        "message": f"{ok} of {len(statuses)} item(s) {ok_status}.",
+        "items": statuses,
+    })
 
 
 # ---------------------------------------------------------------
-# Custom Function 1: Submit an expense report
+# Custom Function 1: Submit expense reports (bulk + single)
 # (Mirrors Lab 3's submit_support_ticket pattern)
 # ---------------------------------------------------------------
+def submit_expense_reports(reports: str) -> str:
+    """
+    Submits many expense reports in one call. reports is a JSON array of
+    objects with email_address, project_name, description and total_amount.
+    All items are validated, valid ones are stored in a single write, and a
+    per-item status (submitted with its report ID, or invalid with the
+    reason) is returned.
+    """
+    try:
+        items = _parse_items(reports, "reports")
+    except ValueError as exc:
+        return json.dumps({"error": str(exc)})
+    return _bulk_summary(_store_reports(items), "submitted")
+
+
 def submit_expense_report(email_address: str, project_name: str, description: str, total_amount: float) -> str:
     """
-    Generates an expense report file and returns a confirmation message.
+    Records an expense report and returns a confirmation message.
     The agent collects the required fields from the user, then calls this function.
     """
-    script_dir = Path(__file__).parent
-    report_id = str(uuid.uuid4()).replace('-', '')[:8].upper()
-    file_name = f"expense-report-{report_id}.txt"
-    file_path = script_dir / file_name
-
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    text = (
-        f"{'='*50}\n"
-        f"EXPENSE REPORT - {report_id}\n"
-        f"{'='*50}\n"
-        f"Date:        {timestamp}\n"
-        f"Submitted by: {email_address}\n"
-        f"Project:     {project_name}\n"
-        f"Amount:      ${total_amount:,.2f}\n"
-        f"{'='*50}\n"
-        f"Description:\n{description}\n"
-        f"{'='*50}\n"
-        f"Status: PENDING APPROVAL\n"
-    )
-    file_path.write_text(text)
-
-    message_json = json.dumps({
-        "message": f"Expense report {report_id} submitted successfully. "
-                   f"The report file is saved as {file_name}. "
-                   f"Total amount: ${total_amount:,.2f}."
-    })
+    status = _store_reports([{
+        "email_address": email_address,
+        "project_name": project_name,
+        "description": description,
+        "total_amount": total_amount,
+    }])[0]
+    if status["status"] != "submitted":
+        return json.dumps({"error": f"Expense report not submitted: {status['error']}."})
+
+    message = (f"Expense report {status['id']} submitted successfully. "
+               f"Total amount: ${status['amount']:,.2f}.")
+    if "file" in status:
+        message += f" The report file is saved as {status['file']}."
+
+    message_json = json.dumps({"message": message})
     return message_json
 
 
 # ---------------------------------------------------------------
-# Custom Function 2: Flag a budget overrun
+# Custom Function 2: Flag budget overruns (bulk + single)
 # ---------------------------------------------------------------
+def flag_budget_overruns(overruns: str) -> str:
+    """
+    Flags many budget overruns in one call. overruns is a JSON array of
+    objects with category, budgeted_amount, actual_amount and reason.
+    Overrun amounts and percentages are computed for all items at once,
+    valid alerts are stored in a single write, and a per-item status
+    (flagged with alert ID and overrun, or invalid with the reason) is
+    returned.
+    """
+    try:
+        items = _parse_items(overruns, "overruns")
+    except ValueError as exc:
+        return json.dumps({"error": str(exc)})
+    return _bulk_summary(_store_alerts(items), "flagged")
+
+
 def flag_budget_overrun(category: str, budgeted_amount: float, actual_amount: float, reason: str) -> str:
     """
     Flags a budget overrun for a specific expense category.
-    Creates an alert file for management review.
-    """
-    script_dir = Path(__file__).parent
-    alert_id = str(uuid.uuid4()).replace('-', '')[:6].upper()
-    file_name = f"budget-alert-{alert_id}.txt"
-    file_path = script_dir / file_name
-
-    overrun = actual_amount - budgeted_amount
-    overrun_pct = (overrun / budgeted_amount) * 100 if budgeted_amount > 0 else 0
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    text = (
-        f"{'='*50}\n"
-        f"BUDGET OVERRUN ALERT - {alert_id}\n"
-        f"{'='*50}\n"
-        f"Date:            {timestamp}\n"
-        f"Category:        {category}\n"
-        f"Budgeted Amount: ${budgeted_amount:,.2f}\n"
-        f"Actual Amount:   ${actual_amount:,.2f}\n"
-        f"Overrun:         ${overrun:,.2f} ({overrun_pct:.1f}%)\n"
-        f"{'='*50}\n"
-        f"Reason: {reason}\n"
-        f"{'='*50}\n"
-        f"Action Required: MANAGEMENT REVIEW\n"
-    )
-    file_path.write_text(text)
-
-    message_json = json.dumps({
-        "message": f"Budget overrun alert {alert_id} created for {category}. "
-                   f"Overrun amount: ${overrun:,.2f} ({overrun_pct:.1f}%). "
-                   f"Alert file saved as {file_name}."
-    })
+    Records an alert for management review.
+    """
+    status = _store_alerts([{
+        "category": category,
+        "budgeted_amount": budgeted_amount,
+        "actual_amount": actual_amount,
+        "reason": reason,
+    }])[0]
+    if status["status"] != "flagged":
+        return json.dumps({"error": f"Budget overrun not flagged: {status['error']}."})
+
+    message = (f"Budget overrun alert {status['id']} created for {category}. "
+               f"Overrun amount: ${status['overrun']:,.2f} ({status['overrun_pct']:.1f}%).")
+    if "file" in status:
+        message += f" Alert file saved as {status['file']}."
+
+    message_json = json.dumps({"message": message})
     return message_json
 
 
+# ---------------------------------------------------------------
+# Custom Functions 3-6: Local expense analytics over data.txt
+# Fast, deterministic answers for arithmetic questions; Code
+# Interpreter is only needed for charts.
+# ---------------------------------------------------------------
+def get_expense_totals() -> str:
+    """
+    Returns the RFP cost totals from data.txt: total personnel cost, total
+    other costs, grand total, total hours, average hourly rate, cost per
+    category and the highest cost category.
+    """
+    return json.dumps(expense_totals(load_expense_table()))
+
+
+def get_consultant_rates(consultant: str = "") -> str:
+    """
+    Returns the hourly rate (amount / hours) of every consultant in data.txt,
+    highest first. Pass a consultant name to return only that consultant.
+    """
+    rows = consultant_rates(load_expense_table())
+    if consultant:
+        rows = [r for r in rows if consultant.lower() in r["consultant"].lower()]
+    return json.dumps({"rates": rows})
+
+
+def get_rate_statistics() -> str:
+    """
+    Returns statistics of consultant hourly rates in data.txt: count, mean,
+    population and sample standard deviation, minimum and maximum.
+    """
+    return json.dumps(rate_statistics(load_expense_table()))
+
+
+def compare_rates_to_policy_caps() -> str:
+    """
+    Compares each consultant's hourly rate in data.txt against the rate cap
+    for their role in expense_policy.txt and reports who exceeds the cap.
+    """
+    results = compare_to_caps(load_expense_table(), load_policy_index())
+    return json.dumps({
+        "exceeding": [r["consultant"] for r in results if r["exceeds_cap"]],
+        "comparisons": results,
+    })
+
+
+# ---------------------------------------------------------------
+# Custom Functions 7-8: Compiled expense policy lookups
+# Deterministic answers from the parsed expense_policy.txt index
+# ---------------------------------------------------------------
+def check_policy(line_items: str) -> str:
+    """
+    Checks one or more line items against the expense policy in one call.
+    line_items is a JSON array (or a single JSON object) of items such as
+    {"role": "AI Engineer", "hourly_rate": 160} or
+    {"category": "Senior D365 Developer", "amount": 12500, "hours": 125} for
+    rate caps, and {"category": "Travel", "amount": 6000},
+    {"category": "Training Materials", "amount": 1800, "consultants": 3},
+    {"category": "Office Equipment", "amount": 2400} or
+    {"category": "Software Licenses", "amount": 5500} for other limits.
+    Returns each item's status (ok, violation, requires_approval,
+    unknown_role, invalid) with the violated rules, required approvals or
+    the reason an item is invalid.
+    """
+    try:
+        items = _parse_items(line_items, "line_items")
+    except ValueError as exc:
+        return json.dumps({"error": str(exc)})
+    return json.dumps(check_line_items(load_policy_index(), items))
+
+
+def required_approval(amount: float) -> str:
+    """
+    Returns who must approve a project or expense of the given amount in
+    USD, according to the policy's approval thresholds.
+    """
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        return json.dumps({"error": "amount must be a number."})
+    if not amount >= 0:
+        return json.dumps({"error": "amount must be a non-negative number."})
+    band = load_policy_index().required_approval(amount)
+    if band is None:
+        return json.dumps({"error": "The policy defines no approval thresholds."})
+    return json.dumps({
+        "amount": amount,
+        "approver": band.approver,
+        "rule": band.rule,
+    })
+
+
+# ---------------------------------------------------------------
+# Custom Function 9: One-call overrun sweep over data.txt
+# ---------------------------------------------------------------
+_BUDGET_FILE_SUFFIXES = {".json", ".txt", ".csv"}
+
+
+def _budget_map(data) -> dict:
+    """Category -> amount; errors never quote the input, which may come from a file."""
+    if not isinstance(data, dict):
+        raise ValueError("budget must be a JSON object mapping category to amount")
+    try:
+        return {str(k): float(v) for k, v in data.items()}
+    except (TypeError, ValueError):
+        raise ValueError("budget amounts must be numbers") from None
+
+
+def _budget_path(budget_file: str) -> Path:
+    """budget_file resolved inside the script directory; anything else is refused."""
+    base = Path(__file__).parent.resolve()
+    path = (base / budget_file).resolve()
+    try:
+        path.relative_to(base)
+    except ValueError:
+        raise ValueError("budget_file must be a file in the project directory") from None
+    if path.suffix.lower() not in _BUDGET_FILE_SUFFIXES:
+        raise ValueError(f"budget_file must be one of: {', '.join(sorted(_BUDGET_FILE_SUFFIXES))}")
+    return path
+
+
+def _load_budget(budget: str, budget_file: str):
+    """Budget from a JSON object string or a .json / 'Category | Amount' / CSV file."""
+    if budget:
+        return _budget_map(json.loads(budget))
+    path = _budget_path(budget_file)
+    text = path.read_text()
+    if path.suffix.lower() == ".json":
+        return _budget_map(json.loads(text))
+    result = {}
+    for line in text.splitlines():
+        parts = [p.strip() for p in (line.split("|") if "|" in line else line.split(","))]
+        if len(parts) < 2:
+            continue
+        try:
+            result[parts[0]] = float(parts[1].replace(",", "").replace("$", ""))
+        except ValueError:
+            continue  # header or separator line
+    return result
+
+
+def sweep_budget_overruns(budget: str = "", budget_file: str = "", emit_alerts: bool = True) -> str:
+    """
+    Checks every expense category in data.txt against a budget and the
+    policy limits (travel maximum per project, training budget per
+    consultant, equipment/license approval thresholds) in one call.
+    budget is a JSON object mapping category to budgeted amount, e.g.
+    {"Travel": 3000, "Office Equipment": 2000}; alternatively pass
+    budget_file, a .json, .txt or .csv file in the project directory
+    holding a JSON object or a 'Category | Amount' table.
+    When emit_alerts is true every overrun found is stored as a budget
+    overrun alert in a single write; an overrun already stored by an
+    earlier sweep (same category, rule and actual amount) is reported with
+    its existing alert_id instead of being stored again.
+    """
+    try:
+        budget_map = _load_budget(budget, budget_file) if (budget or budget_file) else {}
+    except (OSError, ValueError, TypeError, AttributeError) as exc:
+        return json.dumps({"error": f"Could not read budget: {exc}"})
+
+    result = sweep_overruns(load_expense_table(DATA_FILE_PATH), budget_map, load_policy_index())
+    if emit_alerts and result["overruns"]:
+        store = get_report_store()
+        new = []
+        for overrun in result["overruns"]:
+            reason = f"Overrun sweep ({overrun['source']}): {overrun['rule']}"
+            existing = store.find_alert(overrun["category"], reason, overrun["actual_amount"])
+            if existing is not None:
+                overrun["alert_id"] = existing["alert_id"]
+                overrun["already_flagged"] = True
+            else:
+                new.append((overrun, reason))
+        statuses = _store_alerts([
+            {
+                "category": o["category"],
+                "budgeted_amount": o["budgeted_amount"],
+                "actual_amount": o["actual_amount"],
+                "reason": reason,
+            }
+            for o, reason in new
+        ]) if new else []
+        for (overrun, _), status in zip(new, statuses):
+            overrun["alert_id"] = status.get("id")
+    result["message"] = (f"{len(result['overruns'])} overrun(s), "
+                         f"{len(result['approvals_required'])} approval(s) required.")
+    return json.dumps(result)
+
+
+# ---------------------------------------------------------------
+# Custom Functions 10-13: Query stored reports and alerts
+# ---------------------------------------------------------------
+def query_expense_reports(project_name: str = "", submitter: str = "", date_from: str = "",
+                          date_to: str = "", report_id: str = "", limit: int = 20) -> str:
+    """
+    Finds submitted expense reports, newest first. Filter by report_id, or by
+    any combination of project_name, submitter (email address) and a date
+    range (date_from / date_to as YYYY-MM-DD, inclusive).
+    """
+    store = get_report_store()
+    if report_id:
+        report = store.get_report(report_id)
+        return json.dumps({"reports": [report] if report else []})
+    return json.dumps({"reports": store.query_reports(project_name, submitter, date_from, date_to, limit)})
+
+
+def summarize_expense_reports(group_by: str = "project") -> str:
+    """
+    Aggregates submitted expense reports: number of reports, total and
+    average amount per group. group_by is one of project, submitter, date
+    or month.
+    """
+    try:
+        return json.dumps({"group_by": group_by, "groups": get_report_store().summarize_reports(group_by)})
+    except ValueError as exc:
+        return json.dumps({"error": str(exc)})
+
+
+def query_budget_alerts(category: str = "", date_from: str = "", date_to: str = "", limit: int = 20) -> str:
+    """
+    Finds budget overrun alerts, newest first, optionally filtered by
+    category and a date range (date_from / date_to as YYYY-MM-DD, inclusive).
+    """
+    return json.dumps({"alerts": get_report_store().query_alerts(category, date_from, date_to, limit)})
+
+
+def export_expense_report(report_id: str) -> str:
+    """
+    Exports a stored expense report or budget alert (by its ID) to the
+    classic text file format and returns the file name.
+    """
+    store = get_report_store()
+    directory = Path(__file__).parent
+    path = store.export_report_text(report_id, directory) or store.export_alert_text(report_id, directory)
+    if path is None:
+        return json.dumps({"error": f"No report or alert with ID {report_id}."})
+    return json.dumps({"message": f"Exported {report_id} to {path.name}."})
+
+
 # ---------------------------------------------------------------
 # Define the set of callable functions (Lab 3 pattern)
 # The agent will auto-detect which function to call based on context
 # ---------------------------------------------------------------
 user_functions: Set[Callable[..., Any]] = {
     submit_expense_report,
+    submit_expense_reports,
     flag_budget_overrun,
+    flag_budget_overruns,
+    sweep_budget_overruns,
+    get_expense_totals,
+    get_consultant_rates,
+    get_rate_statistics,
+    compare_rates_to_policy_caps,
+    check_policy,
+    required_approval,
+    query_expense_reports,
+    summarize_expense_reports,
+    query_budget_alerts,
+    export_expense_report,
 }